@@ -0,0 +1,121 @@
+"""Compare the latency of `PlaceHold` and `CheckoutBook` with the patron and
+book of each command loaded at the same time (`CONCURRENT_LOADS`) against
+loading them in turn.
+
+Each command is processed for a new patron, seeded with returned checkouts,
+and a new book. The gain comes from overlapping round trips to the database,
+so run it against a networked one:
+
+    PROTEAN_ENV=dev python benchmarks/command_latency.py --commands 500
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+from protean import UnitOfWork, current_domain
+
+from lending import Book, Checkout, CheckoutBook, Patron, PlaceHold
+from lending.domain import lending
+from lending.utils.db import drop_db, setup_db
+
+
+def seed(children: int) -> tuple[Patron, Book]:
+    patron = Patron(patron_type="RESEARCHER")
+    for index in range(children):
+        patron.add_checkouts(
+            Checkout(
+                book_id=f"returned-{index}",
+                branch_id="1",
+                status="RETURNED",
+                returned_at=datetime.now(),
+            )
+        )
+    book = Book(isbn="9780306406157")
+
+    with UnitOfWork():
+        current_domain.repository_for(Patron).add(patron)
+        current_domain.repository_for(Book).add(book)
+
+    return patron, book
+
+
+def _timed_ms(command) -> float:
+    started = time.perf_counter()
+    current_domain.process(command)
+    return (time.perf_counter() - started) * 1000
+
+
+def time_commands(commands: int, children: int) -> dict:
+    """Milliseconds each `PlaceHold` and `CheckoutBook` took, by whether loads
+    were concurrent. The two alternate, so that both see stores of the same
+    size.
+    """
+    # Load from storage, and put both settings back once the commands are timed
+    with patch.dict(current_domain.config["custom"], AGGREGATE_CACHE=False):
+        timings = {
+            concurrent: {"PlaceHold": [], "CheckoutBook": []}
+            for concurrent in (False, True)
+        }
+        for index in range(commands * 2):
+            concurrent = bool(index % 2)
+            current_domain.config["custom"]["CONCURRENT_LOADS"] = concurrent
+
+            patron, book = seed(children)
+            timings[concurrent]["PlaceHold"].append(
+                _timed_ms(
+                    PlaceHold(
+                        patron_id=patron.id,
+                        book_id=book.id,
+                        branch_id="1",
+                        hold_type="CLOSED_ENDED",
+                    )
+                )
+            )
+            timings[concurrent]["CheckoutBook"].append(
+                _timed_ms(
+                    CheckoutBook(patron_id=patron.id, book_id=book.id, branch_id="1")
+                )
+            )
+
+        return timings
+
+
+def percentiles(timings: list[float]) -> tuple[float, float]:
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return cuts[49], cuts[98]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--children", type=int, default=20)
+    args = parser.parse_args()
+
+    lending.config = lending.load_config()
+    lending.init()
+    with lending.domain_context():
+        setup_db()
+        try:
+            time_commands(5, args.children)  # Warm up connections and the pool
+            timings = time_commands(args.commands, args.children)
+        finally:
+            drop_db()
+
+    print(f"Environment: {os.environ.get('PROTEAN_ENV') or 'default'}")
+    print(
+        f"{args.commands} commands of each type, "
+        f"patrons with {args.children} returned checkouts"
+    )
+    print(f"{'':14}{'loads':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for command in ("PlaceHold", "CheckoutBook"):
+        for concurrent, loads in ((False, "in turn"), (True, "concurrent")):
+            p50, p99 = percentiles(timings[concurrent][command])
+            print(f"{command:14}{loads:>12}{p50:10.2f}{p99:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
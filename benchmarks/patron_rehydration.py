@@ -0,0 +1,96 @@
+"""Compare loading a patron with its children built from stored values as they
+are (`TRUSTED_REHYDRATION`) against building them through field validation.
+
+The patron is seeded with returned checkouts and cancelled holds, half each,
+and loaded with `PatronRepository.get`.
+
+    PROTEAN_ENV=dev python benchmarks/patron_rehydration.py --children 1000
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+from protean import UnitOfWork, current_domain
+
+from lending import Checkout, Hold, Patron
+from lending.domain import lending
+from lending.utils.db import drop_db, setup_db
+
+
+def seed_patron(children: int) -> Patron:
+    patron = Patron()
+    for index in range(children // 2):
+        patron.add_holds(
+            Hold(
+                book_id=f"held-{index}",
+                branch_id="1",
+                status="CANCELLED",
+                requested_at=datetime.now(),
+            )
+        )
+    for index in range(children - children // 2):
+        patron.add_checkouts(
+            Checkout(
+                book_id=f"returned-{index}",
+                branch_id="1",
+                status="RETURNED",
+                returned_at=datetime.now(),
+            )
+        )
+
+    with UnitOfWork():
+        current_domain.repository_for(Patron).add(patron)
+        patron._events = []  # Without the fact event
+
+    return patron
+
+
+def time_loads(patron: Patron, trusted: bool, runs: int) -> float:
+    """Median milliseconds to load `patron`"""
+    # Loaded from storage, and the config restored afterwards
+    with patch.dict(
+        current_domain.config["custom"],
+        TRUSTED_REHYDRATION=trusted,
+        AGGREGATE_CACHE=False,
+    ):
+        repo = current_domain.repository_for(Patron)
+
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            repo.get(patron.id)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--children", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    lending.config = lending.load_config()
+    lending.init()
+    with lending.domain_context():
+        setup_db()
+        try:
+            patron = seed_patron(args.children)
+            validated = time_loads(patron, False, args.runs)
+            trusted = time_loads(patron, True, args.runs)
+        finally:
+            drop_db()
+
+    print(f"Environment: {os.environ.get('PROTEAN_ENV') or 'default'}")
+    print(f"Patron with {args.children} children, median of {args.runs} loads")
+    print(f"  validated: {validated:10.2f} ms")
+    print(f"  trusted:   {trusted:10.2f} ms")
+    print(f"  speedup:   {validated / trusted:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
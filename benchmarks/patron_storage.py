@@ -0,0 +1,166 @@
+"""Compare the load and save latency of patrons stored as relational rows and as
+their own events (see `PATRON_STORAGE`), for patrons with growing histories.
+
+Each history item is a hold that was placed and cancelled. Loads are timed
+with `PatronRepository.get`, first on a freshly seeded patron, when an
+event-sourced patron is folded from registration and snapshotted, and then
+once warm. Saves are timed from placing a hold on the loaded patron through
+the commit of the Unit of Work.
+
+Run against the environment's stores, like:
+
+    PROTEAN_ENV=dev python benchmarks/patron_storage.py --sizes 10 1000 10000
+
+The memory event store copies every message it holds on each read and write,
+so it only runs the smallest sizes in reasonable time, and with timings that
+do not reflect a deployment.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+from protean import UnitOfWork, current_domain
+
+from lending import (
+    Book,
+    Hold,
+    HoldPlaced,
+    HoldStatus,
+    Patron,
+    place_hold,
+)
+from lending.domain import lending
+from lending.model.patron import HoldCancelled
+from lending.model.patron.event_sourcing import initial_state, write_snapshot
+from lending.utils.db import drop_db, setup_db
+
+STORAGES = ("relational", "events")
+
+
+def seed_patron(storage: str, size: int) -> Patron:
+    """A patron with `size` cancelled holds, stored as `storage`, without
+    running the event handlers
+    """
+    # Holds are built apart from the patron and written straight to their
+    #   table, as adding each to the aggregate checks every other one
+    patron = Patron()
+    holds = []
+    for index in range(size):
+        hold = Hold(
+            patron_id=patron.id,
+            book_id=f"seeded-{index}",
+            branch_id="1",
+            requested_at=datetime.now(),
+            status=HoldStatus.CANCELLED.value,
+        )
+        holds.append(hold)
+
+        values = {
+            "patron_id": patron.id,
+            "patron_type": patron.patron_type,
+            "hold_id": hold.id,
+            "branch_id": hold.branch_id,
+            "book_id": hold.book_id,
+            "hold_type": hold.hold_type,
+            "requested_at": hold.requested_at,
+        }
+        patron.raise_(HoldPlaced(**values))
+        patron.raise_(HoldCancelled(**values))
+    events, patron._events = patron._events, []
+
+    if storage == "relational":
+        with UnitOfWork():
+            current_domain.repository_for(Patron).add(patron)
+            patron._events = []  # Without the fact event
+
+            dao = current_domain.repository_for(Hold)._dao
+            for hold in holds:
+                dao._create(dao.model_cls.from_entity(hold))
+    else:
+        write_snapshot(initial_state(patron.id, patron.patron_type), -1)
+
+        # Only patrons stored as events are loaded from their stream
+        for event in events:
+            current_domain.event_store.store.append(event)
+
+    return patron
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def measure(storage: str, size: int, runs: int) -> dict:
+    # Loaded from storage, and the config restored afterwards
+    with patch.dict(
+        current_domain.config["custom"], PATRON_STORAGE=storage, AGGREGATE_CACHE=False
+    ):
+        repo = current_domain.repository_for(Patron)
+        patron = seed_patron(storage, size)
+
+        started = time.perf_counter()
+        loaded = repo.get(patron.id)
+        first_load = _elapsed_ms(started)
+        # Timings only count with the whole history loaded
+        assert len(loaded.holds) == size, f"Loaded {len(loaded.holds)} of {size} holds"
+
+        loads = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            repo.get(patron.id)
+            loads.append(_elapsed_ms(started))
+
+        saves = []
+        for run in range(runs):
+            book = Book(isbn=f"{storage[0]}-{size}-{run}")
+            current_domain.repository_for(Book).add(book)
+
+            refreshed_patron = repo.get(patron.id)
+            started = time.perf_counter()
+            with UnitOfWork():
+                place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+                repo.add(refreshed_patron)
+            saves.append(_elapsed_ms(started))
+
+        return {
+            "first_load": first_load,
+            "load": statistics.median(loads),
+            "save": statistics.median(saves),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--storages", nargs="+", choices=STORAGES, default=STORAGES)
+    args = parser.parse_args()
+
+    lending.config = lending.load_config()
+    lending.init()
+    with lending.domain_context():
+        print(f"Environment: {os.environ.get('PROTEAN_ENV') or 'default'}")
+        print(
+            f"{'storage':<12}{'items':>8}{'first load ms':>16}"
+            f"{'load p50 ms':>14}{'save p50 ms':>14}"
+        )
+
+        setup_db()
+        try:
+            for size in args.sizes:
+                for storage in args.storages:
+                    result = measure(storage, size, args.runs)
+                    print(
+                        f"{storage:<12}{size:>8}{result['first_load']:>16.2f}"
+                        f"{result['load']:>14.2f}{result['save']:>14.2f}"
+                    )
+        finally:
+            drop_db()
+
+
+if __name__ == "__main__":
+    main()
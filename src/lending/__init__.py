@@ -17,9 +17,17 @@ from lending.model.patron import (
     PatronType,
 )
 
+from lending.app.sheets import CheckoutSheet, HoldSheet  # isort:skip
 from lending.app.dailysheet import DailySheet  # isort:skip
+from lending.app.deadlines import Deadline  # isort:skip
+from lending.app.history import CheckoutHistory, HoldHistory  # isort:skip
 from lending.app.patron.hold import CancelHold, PlaceHold  # isort:skip
-from lending.app.patron.checkout import CheckoutBook, ReturnBook  # isort:skip
+from lending.app.patron.checkout import (  # isort:skip
+    CheckoutBook,
+    CheckoutBooks,
+    ReturnBook,
+    ReturnBooks,
+)
 
 
 __all__ = [
@@ -31,7 +39,9 @@ __all__ = [
     "HoldPlaced",
     "Checkout",
     "CheckoutBook",
+    "CheckoutBooks",
     "ReturnBook",
+    "ReturnBooks",
     "CheckoutStatus",
     "Book",
     "BookStatus",
@@ -42,4 +52,9 @@ __all__ = [
     "DailySheetService",
     "checkout",
     "DailySheet",
+    "HoldSheet",
+    "CheckoutSheet",
+    "Deadline",
+    "HoldHistory",
+    "CheckoutHistory",
 ]
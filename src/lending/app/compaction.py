@@ -0,0 +1,175 @@
+import argparse
+import logging
+from collections.abc import Iterator
+from itertools import chain
+from uuid import uuid4
+
+from protean.utils import fqn
+from protean.utils.mixins import Message
+
+from lending import Patron
+from lending.app.patron.facts import apply_patron_fact
+from lending.domain import lending
+from lending.utils.internals import last_message, write_message
+from lending.utils.streams import all_patron_ids, read_ahead, read_category
+
+logger = logging.getLogger(__name__)
+
+FACT_STREAM_PREFIX = "library::patron-fact-"
+SEGMENTS_STREAM = "library::patron_compaction-segments"
+
+
+def _is_fact(message: Message) -> bool:
+    # Messages copied into a segment keep the stream of the original
+    return (message.metadata.stream or "").startswith(FACT_STREAM_PREFIX)
+
+
+def latest_segment() -> dict | None:
+    """The latest compacted segment, with its `stream` and the global position
+    of the `library::patron` category it covers `through`
+    """
+    message = last_message(SEGMENTS_STREAM)
+    if message:
+        return message["data"]
+
+    return None
+
+
+def _read_stream(stream: str, batch_size: int) -> Iterator[list[Message]]:
+    position = 0
+    while messages := lending.event_store.store.read(
+        stream, position=position, no_of_messages=batch_size
+    ):
+        yield messages
+
+        if len(messages) < batch_size:
+            return
+
+        position = messages[-1].position + 1
+
+
+def read_compacted(batch_size: int | None = None) -> Iterator[list[Message]]:
+    """Read the `library::patron` category in batches, through the latest
+    compacted segment, if any, and then the raw messages after it.
+
+    Subscribers catching up from the start read this instead of the raw
+    category. Messages from the segment carry the metadata of the originals,
+    and raw messages their global positions, which come after the segment's
+    `through`.
+    """
+    batch_size = batch_size or lending.config["custom"]["REBUILD_BATCH_SIZE"]
+
+    position = -1
+    if segment := latest_segment():
+        yield from _read_stream(segment["stream"], batch_size)
+        position = segment["through"]
+
+    yield from read_ahead(position + 1, batch_size)
+
+
+def _history(segment: dict | None, batch_size: int) -> Iterator[Message]:
+    """The domain events of `segment`, then the raw messages after it"""
+    position = -1
+    if segment:
+        for messages in _read_stream(segment["stream"], batch_size):
+            yield from (message for message in messages if not _is_fact(message))
+        position = segment["through"]
+
+    for messages in read_ahead(position + 1, batch_size):
+        yield from messages
+
+
+def _latest_fact(
+    patron_id, through: int, batch_size: int
+) -> tuple[dict, Message] | None:
+    """The state of a patron folded from its fact events up to `through`, with
+    the last of them, or `None` if no full fact event was folded
+    """
+    state = last = None
+    stream = f"{FACT_STREAM_PREFIX}{patron_id}"
+    for message in chain.from_iterable(_read_stream(stream, batch_size)):
+        if message.global_position > through:
+            break
+        state = apply_patron_fact(state, message.to_object())
+        last = message
+
+    return (state, last) if state is not None else None
+
+
+def compact_patron_facts(batch_size: int | None = None) -> int:
+    """Write a compacted segment of the `library::patron` category, and return
+    the global position it covers through.
+
+    Domain events are copied as they are, in order, from the previous segment
+    and the raw messages after it. Then, patron by patron, the fact stream of
+    the patron is folded into one full fact event with its latest state, as of
+    the last message copied. Only one patron's state is held at a time, and
+    each patron is folded from its own stream, which is never rewritten.
+    Earlier segments are left in place, as the event store is append-only.
+    """
+    batch_size = batch_size or lending.config["custom"]["REBUILD_BATCH_SIZE"]
+    segment = latest_segment()
+
+    start = segment["through"] if segment else -1
+    if not read_category(start + 1, 1):
+        return start
+
+    stream = f"library::patron_compacted-{uuid4().hex}"
+    written = 0
+    through = start
+    for message in _history(segment, batch_size):
+        if segment is None or message.stream_name != segment["stream"]:
+            through = message.global_position
+        if _is_fact(message):
+            continue  # Folded patron by patron below
+
+        write_message(stream, message.type, message.data, message.metadata.to_dict())
+        written += 1
+
+    fact_event_cls = Patron._fact_event_cls
+    for patron_id in all_patron_ids(batch_size):
+        latest = _latest_fact(patron_id, through, batch_size)
+        if latest is None:
+            continue
+
+        state, message = latest
+        write_message(
+            stream,
+            fact_event_cls.__type__,
+            state,
+            {
+                **message.metadata.to_dict(),
+                "type": fact_event_cls.__type__,
+                "fqn": fqn(fact_event_cls),
+            },
+        )
+        written += 1
+
+    write_message(
+        SEGMENTS_STREAM,
+        "Segment",
+        {"stream": stream, "through": through, "messages": written},
+    )
+    logger.info(f"Compacted the patron category through {through} into {stream}")
+
+    return through
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compact the fact events of the library::patron category"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="Messages read per batch, and patrons per page (REBUILD_BATCH_SIZE)",
+    )
+    args = parser.parse_args()
+
+    lending.init()
+    with lending.domain_context():
+        compact_patron_facts(args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import logging
+from itertools import islice
+
+from protean import UnitOfWork
+
+from lending import Patron
+from lending.domain import lending
+from lending.utils.streams import all_patron_ids
+
+logger = logging.getLogger(__name__)
+
+
+def check_patron_counters(chunk_size: int | None = None) -> int:
+    """Rebuild the hold and checkout counters of every patron from its holds and
+    checkouts, and return the number of patrons whose counters had drifted.
+
+    Counters drift when children are changed without going through their state
+    transitions, like in data fixes, and are missing on patrons persisted before
+    they were introduced. Patrons are committed in chunks of `chunk_size`.
+    """
+    chunk_size = chunk_size or lending.config["custom"]["DAILY_SHEET_CHUNK_SIZE"]
+    repo = lending.repository_for(Patron)
+
+    fixed = 0
+    patron_ids = all_patron_ids(chunk_size)
+    while chunk := list(islice(patron_ids, chunk_size)):
+        with UnitOfWork():
+            for patron_id in chunk:
+                patron = repo.get(patron_id)
+                if patron.recount():
+                    logger.warning(f"Rebuilt drifted counters of patron {patron_id}")
+                    repo.add(patron)
+                    fixed += 1
+
+    return fixed
@@ -0,0 +1,269 @@
+import logging
+import multiprocessing
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import islice
+
+from protean import UnitOfWork
+from protean.exceptions import (
+    IncorrectUsageError,
+    ObjectNotFoundError,
+    ValidationError,
+)
+from protean.fields import Identifier
+
+from lending import CheckoutSheet, DailySheetService, HoldSheet, Patron
+from lending.domain import lending
+from lending.utils.internals import last_message, write_message
+from lending.utils.streams import shard_for
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DailySheetReport:
+    """Outcome of a daily sheet run, or of one shard of a parallel run"""
+
+    patrons: int = 0
+    holds_expired: int = 0
+    checkouts_overdue: int = 0
+    failures: int = 0
+
+    def __add__(self, other: "DailySheetReport") -> "DailySheetReport":
+        return DailySheetReport(
+            patrons=self.patrons + other.patrons,
+            holds_expired=self.holds_expired + other.holds_expired,
+            checkouts_overdue=self.checkouts_overdue + other.checkouts_overdue,
+            failures=self.failures + other.failures,
+        )
+
+
+def due_items(on: date | None = None) -> tuple[dict, dict]:
+    """Gather holds expiring and checkouts falling due on or before a date
+    (yesterday by default) from the hold and checkout sheets, grouped by
+    patron. Items of days on which the daily sheet did not run are included.
+
+    Returns two mappings of patron id to a set of hold ids and checkout ids.
+    """
+    hold_ids = defaultdict(set)
+    for sheet in lending.repository_for(HoldSheet).expiring(on=on):
+        hold_ids[sheet.patron_id].add(sheet.id)
+
+    checkout_ids = defaultdict(set)
+    for sheet in lending.repository_for(CheckoutSheet).to_be_marked_overdue(on=on):
+        checkout_ids[sheet.patron_id].add(sheet.id)
+
+    return hold_ids, checkout_ids
+
+
+def _ids_for(items_by_patron: dict | None, patron_id: Identifier) -> set | None:
+    if items_by_patron is None:
+        return None
+
+    return items_by_patron.get(patron_id, set())
+
+
+class DailySheetRun:
+    """A resumable run of `DailySheetService` over a stream of patrons.
+
+    Patrons (or their identities) are consumed lazily in chunks of `chunk_size`.
+    Each chunk is committed in its own Unit of Work, after which a checkpoint
+    holding the last processed patron id is written to the event store under
+    `run_id`. Running again with the same `run_id` skips patrons already covered
+    by the checkpoint, so the stream must be supplied in ascending patron id order.
+
+    A chunk that was committed but not checkpointed is processed again on resume,
+    which is harmless because `DailySheetService` only acts on holds and checkouts
+    that are still active.
+    """
+
+    def __init__(self, run_id: str, chunk_size: int | None = None):
+        self.run_id = run_id
+        self.chunk_size = (
+            chunk_size or lending.config["custom"]["DAILY_SHEET_CHUNK_SIZE"]
+        )
+
+    @property
+    def stream_name(self) -> str:
+        return f"library::daily_sheet_run-{self.run_id}"
+
+    def last_checkpoint(self) -> Identifier | None:
+        message = last_message(self.stream_name)
+        if message:
+            return message["data"]["patron_id"]
+
+        return None
+
+    def _write_checkpoint(self, patron_id: Identifier) -> None:
+        write_message(self.stream_name, "Checkpoint", {"patron_id": patron_id})
+
+    def process(
+        self,
+        patrons: Iterable[Patron | Identifier],
+        hold_ids: dict | None = None,
+        checkout_ids: dict | None = None,
+    ) -> DailySheetReport:
+        """Run the daily sheet over `patrons` and report on the outcome.
+
+        `hold_ids` and `checkout_ids`, when supplied, map patron ids to the items
+        to be considered for each patron (see `DailySheetService`).
+        """
+        checkpoint = self.last_checkpoint()
+        items = iter(patrons)
+        report = DailySheetReport()
+
+        while chunk := list(islice(items, self.chunk_size)):
+            pending = [
+                (item.id if isinstance(item, Patron) else item, item) for item in chunk
+            ]
+            if checkpoint is not None:
+                pending = [
+                    (patron_id, item)
+                    for patron_id, item in pending
+                    if patron_id > checkpoint
+                ]
+            if not pending:
+                continue
+
+            patron_ids = [patron_id for patron_id, _ in pending]
+            if patron_ids != sorted(set(patron_ids)):
+                raise IncorrectUsageError(
+                    "Patrons must be supplied in ascending order of identity"
+                )
+
+            with UnitOfWork():
+                repo = lending.repository_for(Patron)
+                for patron_id, item in pending:
+                    report.patrons += 1
+                    try:
+                        patron_hold_ids = _ids_for(hold_ids, patron_id)
+                        patron_checkout_ids = _ids_for(checkout_ids, patron_id)
+                        patron = (
+                            item
+                            if isinstance(item, Patron)
+                            else repo.get_with_items(
+                                item, patron_hold_ids, patron_checkout_ids
+                            )
+                        )
+                        service = DailySheetService(
+                            patrons=[patron],
+                            hold_ids=patron_hold_ids,
+                            checkout_ids=patron_checkout_ids,
+                        )
+                        service.run()
+                    except (ObjectNotFoundError, ValidationError) as exc:
+                        logger.error(
+                            f"Daily sheet failed for patron {patron_id}: {exc}"
+                        )
+                        report.failures += 1
+                        continue
+
+                    repo.add(patron)
+                    report.holds_expired += service.holds_expired
+                    report.checkouts_overdue += service.checkouts_overdue
+
+            checkpoint = patron_ids[-1]
+            self._write_checkpoint(checkpoint)
+
+        return report
+
+
+def run_daily_sheet(
+    on: date | None = None, chunk_size: int | None = None
+) -> DailySheetReport:
+    """Expire holds and mark checkouts overdue, starting from the daily sheet.
+
+    Only patrons with a hold or checkout falling due are loaded, instead of
+    scanning every patron in the library. Patrons are processed in chunks, with
+    a checkpoint per chunk, so an interrupted run for the same day resumes where
+    it stopped.
+    """
+    on = on or date.today() - timedelta(days=1)
+    hold_ids, checkout_ids = due_items(on)
+
+    return DailySheetRun(on.isoformat(), chunk_size).process(
+        sorted(hold_ids.keys() | checkout_ids.keys()),
+        hold_ids=hold_ids,
+        checkout_ids=checkout_ids,
+    )
+
+
+def _process_local() -> bool:
+    """Whether patrons or their events are held in this process's memory, out
+    of reach of worker processes
+    """
+    return (
+        lending.repository_for(Patron)._provider.conn_info["provider"] == "memory"
+        or lending.config["event_store"]["provider"] == "memory"
+    )
+
+
+def _init_worker() -> None:
+    lending.init()
+
+
+def _run_shard(
+    run_id: str,
+    patron_ids: list[Identifier],
+    hold_ids: dict,
+    checkout_ids: dict,
+    chunk_size: int | None,
+) -> DailySheetReport:
+    with lending.domain_context():
+        return DailySheetRun(run_id, chunk_size).process(
+            patron_ids, hold_ids=hold_ids, checkout_ids=checkout_ids
+        )
+
+
+def run_daily_sheet_in_parallel(
+    shards: int,
+    on: date | None = None,
+    chunk_size: int | None = None,
+    executor: Executor | None = None,
+) -> DailySheetReport:
+    """Run the daily sheet with patrons hash-partitioned across `shards` workers.
+
+    By default, each shard runs in its own process with a freshly initialized
+    domain, and so its own database connections. Each shard checkpoints under
+    its own run id and processes its patrons in ascending id order, so the same
+    input produces the same events irrespective of the number of shards. The
+    per-shard reports are merged into one.
+
+    With the memory provider or event store, a worker process would start
+    from an empty store, so the shards run one after the other in this
+    process instead.
+    """
+    on = on or date.today() - timedelta(days=1)
+    hold_ids, checkout_ids = due_items(on)
+
+    partitions = [[] for _ in range(shards)]
+    for patron_id in sorted(hold_ids.keys() | checkout_ids.keys()):
+        partitions[shard_for(patron_id, shards)].append(patron_id)
+
+    if executor is None and _process_local():
+        executor = ThreadPoolExecutor(max_workers=1)
+    elif executor is None:
+        executor = ProcessPoolExecutor(
+            max_workers=shards,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    with executor:
+        futures = [
+            executor.submit(
+                _run_shard,
+                f"{on.isoformat()}-{shard}-of-{shards}",
+                patron_ids,
+                {id_: hold_ids[id_] for id_ in patron_ids if id_ in hold_ids},
+                {id_: checkout_ids[id_] for id_ in patron_ids if id_ in checkout_ids},
+                chunk_size,
+            )
+            for shard, patron_ids in enumerate(partitions)
+            if patron_ids
+        ]
+
+        return sum((future.result() for future in futures), DailySheetReport())
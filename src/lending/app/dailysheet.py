@@ -1,11 +1,16 @@
-from datetime import date, timedelta
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import date
 from typing import Union
 
-from protean import handle
-from protean.exceptions import ObjectNotFoundError
-from protean.fields import Auto, Date, DateTime, Identifier, String
+from protean import UnitOfWork, handle
+from protean.exceptions import IncorrectUsageError
+from protean.fields import Date, DateTime, Identifier, String
+from protean.utils.mixins import Message
+from sqlalchemy import Table
 
 from lending import Checkout, CheckoutStatus, Hold, HoldStatus
+from lending.app.sheets import CheckoutSheet, HoldSheet
 from lending.domain import lending
 from lending.model.patron import (
     BookCheckedOut,
@@ -15,11 +20,41 @@ from lending.model.patron import (
     HoldExpired,
     HoldPlaced,
 )
+from lending.utils.internals import undecorated
+
+# `DailySheet` fields, mapped to their `HoldSheet` and `CheckoutSheet` counterparts
+HOLD_FIELDS = {
+    "hold_id": "id",
+    "hold_book_id": "book_id",
+    "hold_branch_id": "branch_id",
+    "hold_type": "hold_type",
+    "hold_status": "status",
+    "hold_requested_at": "requested_at",
+    "hold_expires_on": "expires_on",
+}
+CHECKOUT_FIELDS = {
+    "checkout_id": "id",
+    "checkout_book_id": "book_id",
+    "checkout_branch_id": "branch_id",
+    "checkout_checked_out_at": "checked_out_at",
+    "checkout_status": "status",
+    "checkout_due_on": "due_on",
+    "checkout_returned_at": "returned_at",
+    "checkout_overdue_at": "overdue_at",
+}
 
 
 @lending.view
 class DailySheet:
-    id = Auto(identifier=True)
+    """A hold or a checkout, in the shape of the former wide daily sheet.
+
+    Records are stored in `HoldSheet` and `CheckoutSheet`, and converted by
+    `DailySheetRepository`, so the view has no table of its own. It is kept
+    for readers of the wide shape that predate the split, like the daily sheet
+    scenarios, which look holds and checkouts up through its repository.
+    """
+
+    id = Identifier(identifier=True)  # The hold or checkout id
     patron_id = Identifier(required=True)
     patron_type = String(required=True)
     hold_id = Identifier()
@@ -39,231 +74,274 @@ class DailySheet:
     checkout_overdue_at = DateTime()
 
 
+def _to_daily_sheet(sheet: HoldSheet | CheckoutSheet, fields: dict) -> DailySheet:
+    return DailySheet(
+        id=sheet.id,
+        patron_id=sheet.patron_id,
+        patron_type=sheet.patron_type,
+        **{wide: getattr(sheet, narrow) for wide, narrow in fields.items()},
+    )
+
+
+def _to_sheet(record: DailySheet, sheet_cls: type, fields: dict):
+    return sheet_cls(
+        patron_id=record.patron_id,
+        patron_type=record.patron_type,
+        **{narrow: getattr(record, wide) for wide, narrow in fields.items()},
+    )
+
+
 @lending.repository(part_of=DailySheet)
 class DailySheetRepository:
-    def find_hold_for_patron(self, patron_id, hold_id) -> Union[Hold, None]:
-        daily_sheet_record = None
-        try:
-            daily_sheet_record = self._dao.find_by(
-                patron_id=patron_id,
-                hold_id=hold_id,
-            )
-        except ObjectNotFoundError:
-            pass
+    """Compatibility layer over `HoldSheetRepository` and `CheckoutSheetRepository`"""
 
-        return daily_sheet_record
+    # Records are stored in the hold and checkout sheets only
+    has_table = False
 
-    def find_checkout_for_patron(self, patron_id, checkout_id) -> Union[Checkout, None]:
-        daily_sheet_record = None
-        try:
-            daily_sheet_record = self._dao.find_by(
-                patron_id=patron_id,
-                checkout_id=checkout_id,
+    def add(self, record: DailySheet) -> DailySheet:
+        if record.hold_id:
+            sheet_cls, fields = HoldSheet, HOLD_FIELDS
+        elif record.checkout_id:
+            sheet_cls, fields = CheckoutSheet, CHECKOUT_FIELDS
+        else:
+            raise IncorrectUsageError(
+                "A daily sheet record must be for a hold or a checkout"
             )
-        except ObjectNotFoundError:
-            pass
 
-        return daily_sheet_record
-
-    def expiring_holds(self, on=date.today() - timedelta(days=1)):
-        return (
-            self._dao.query.filter(
-                hold_status=HoldStatus.ACTIVE.value,
-                hold_expires_on=on,
-            )
-            .all()
-            .items
+        lending.repository_for(sheet_cls).upsert(
+            _to_sheet(record, sheet_cls, fields),
+            "patron_type",
+            *(narrow for narrow in fields.values() if narrow != "id"),
         )
+        return record
 
-    def expired_holds(self):
-        return (
-            self._dao.query.filter(
-                hold_status=HoldStatus.EXPIRED.value,
-            )
-            .all()
-            .items
+    def find_hold_for_patron(self, patron_id, hold_id) -> Union[Hold, None]:
+        sheet = lending.repository_for(HoldSheet).find_for_patron(patron_id, hold_id)
+        return sheet and _to_daily_sheet(sheet, HOLD_FIELDS)
+
+    def find_checkout_for_patron(self, patron_id, checkout_id) -> Union[Checkout, None]:
+        sheet = lending.repository_for(CheckoutSheet).find_for_patron(
+            patron_id, checkout_id
+        )
+        return sheet and _to_daily_sheet(sheet, CHECKOUT_FIELDS)
+
+    def expiring_holds(
+        self,
+        on: date | None = None,
+        branch_id: Identifier | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[DailySheet]:
+        for sheet in lending.repository_for(HoldSheet).expiring(
+            on, branch_id, batch_size
+        ):
+            yield _to_daily_sheet(sheet, HOLD_FIELDS)
+
+    def count_expiring_holds(
+        self, on: date | None = None, branch_id: Identifier | None = None
+    ) -> int:
+        return lending.repository_for(HoldSheet).count_expiring(on, branch_id)
+
+    def expired_holds(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[DailySheet]:
+        for sheet in lending.repository_for(HoldSheet).expired(
+            branch_id, since, until, batch_size
+        ):
+            yield _to_daily_sheet(sheet, HOLD_FIELDS)
+
+    def count_expired_holds(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> int:
+        return lending.repository_for(HoldSheet).count_expired(branch_id, since, until)
+
+    def checkouts_to_be_marked_overdue(
+        self,
+        on: date | None = None,
+        branch_id: Identifier | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[DailySheet]:
+        for sheet in lending.repository_for(CheckoutSheet).to_be_marked_overdue(
+            on, branch_id, batch_size
+        ):
+            yield _to_daily_sheet(sheet, CHECKOUT_FIELDS)
+
+    def count_checkouts_to_be_marked_overdue(
+        self, on: date | None = None, branch_id: Identifier | None = None
+    ) -> int:
+        return lending.repository_for(CheckoutSheet).count_to_be_marked_overdue(
+            on, branch_id
         )
 
-    def checkouts_to_be_marked_overdue(self, on=date.today() - timedelta(days=1)):
-        return (
-            self._dao.query.filter(
-                checkout_status=CheckoutStatus.ACTIVE.value,
-                checkout_due_on=on,
-            )
-            .all()
-            .items
+    def overdue_checkouts(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[DailySheet]:
+        for sheet in lending.repository_for(CheckoutSheet).overdue(
+            branch_id, since, until, batch_size
+        ):
+            yield _to_daily_sheet(sheet, CHECKOUT_FIELDS)
+
+    def count_overdue_checkouts(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> int:
+        return lending.repository_for(CheckoutSheet).count_overdue(
+            branch_id, since, until
         )
 
-    def overdue_checkouts(self):
-        return (
-            self._dao.query.filter(
-                checkout_status=CheckoutStatus.OVERDUE.value,
+
+def _hold_sheet(event, status: str) -> HoldSheet:
+    return HoldSheet(
+        id=event.hold_id,
+        patron_id=event.patron_id,
+        patron_type=event.patron_type,
+        status=status,
+        book_id=event.book_id,
+        branch_id=event.branch_id,
+        hold_type=event.hold_type,
+        requested_at=event.requested_at,
+        expires_on=event.expires_on,
+    )
+
+
+def _checkout_sheet(event, status: str, **values) -> CheckoutSheet:
+    return CheckoutSheet(
+        id=event.checkout_id,
+        patron_id=event.patron_id,
+        patron_type=event.patron_type,
+        book_id=event.book_id,
+        branch_id=event.branch_id,
+        checked_out_at=event.checked_out_at,
+        due_on=event.due_on,
+        status=status,
+        **values,
+    )
+
+
+class DailySheetBatch:
+    """Sheet writes pending in memory, coalesced by hold/checkout id"""
+
+    def __init__(self):
+        self._rows: dict[tuple[type, Identifier], tuple[object, set[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, record: HoldSheet | CheckoutSheet, update_fields: Iterable[str]):
+        key = (type(record), record.id)
+        if key not in self._rows:
+            self._rows[key] = (record, set(update_fields))
+            return
+
+        # Fold the later event into the pending row state
+        pending, pending_update_fields = self._rows[key]
+        for field_name in update_fields:
+            setattr(pending, field_name, getattr(record, field_name))
+        pending_update_fields.update(update_fields)
+
+    def flush(self, tables: dict[type, Table] | None = None) -> None:
+        """Write pending rows with one bulk upsert per sheet. `tables` optionally
+        redirects the writes of a sheet to another table, like a shadow table.
+        """
+        rows_by_sheet = defaultdict(list)
+        for (sheet_cls, _), row in self._rows.items():
+            rows_by_sheet[sheet_cls].append(row)
+
+        for sheet_cls, rows in rows_by_sheet.items():
+            lending.repository_for(sheet_cls).upsert_many(
+                rows, (tables or {}).get(sheet_cls)
             )
-            .all()
-            .items
-        )
+
+        self._rows.clear()
 
 
 @lending.event_handler(stream_category="library::patron")
 class DailySheetManager:
-    @handle(HoldExpired)
-    def handle_hold_expired(self, event: HoldExpired):
-        repo = lending.repository_for(DailySheet)
+    """Project hold and checkout events onto the hold and checkout sheets.
 
-        daily_sheet_record = repo.find_hold_for_patron(
-            patron_id=event.patron_id,
-            hold_id=event.hold_id,
-        )
+    Rows are keyed by hold/checkout id and written with a single upsert per
+    event, so replaying the stream is idempotent. Events that create a hold or
+    checkout only insert its row, so one redelivered after the hold or
+    checkout ended, as in a rebuild's catch-up or a partition handoff, does
+    not make it active again.
 
-        if daily_sheet_record:
-            daily_sheet_record.hold_status = HoldStatus.EXPIRED.value
-        else:
-            daily_sheet_record = DailySheet(
-                patron_id=event.patron_id,
-                patron_type=event.patron_type,
-                hold_id=event.hold_id,
-                hold_status=HoldStatus.EXPIRED.value,
-                hold_book_id=event.book_id,
-                hold_branch_id=event.branch_id,
-                hold_type=event.hold_type,
-                hold_requested_at=event.requested_at,
-                hold_expires_on=event.expires_on,
-            )
+    `handle_batch` projects a batch of messages instead, coalescing all events
+    for the same hold/checkout in memory and flushing them in one bulk write.
+    """
 
-        repo.add(daily_sheet_record)
+    def __init__(self):
+        self._batch: DailySheetBatch | None = None
 
-    @handle(HoldPlaced)
-    def handle_hold_placed(self, event: HoldPlaced):
-        repo = lending.repository_for(DailySheet)
-
-        daily_sheet_record = repo.find_hold_for_patron(
-            patron_id=event.patron_id,
-            hold_id=event.hold_id,
-        )
+    @classmethod
+    def handle_batch(cls, messages: list[Message]) -> None:
+        batch = cls.project_batch(messages)
 
-        if daily_sheet_record:
-            daily_sheet_record.hold_status = HoldStatus.EXPIRED.value
-        else:
-            daily_sheet_record = DailySheet(
-                patron_id=event.patron_id,
-                patron_type=event.patron_type,
-                hold_id=event.hold_id,
-                hold_status=HoldStatus.ACTIVE.value,
-                hold_book_id=event.book_id,
-                hold_branch_id=event.branch_id,
-                hold_type=event.hold_type,
-                hold_requested_at=event.requested_at,
-                hold_expires_on=event.expires_on,
-            )
+        with UnitOfWork():
+            batch.flush()
 
-        repo.add(daily_sheet_record)
+    @classmethod
+    def project_batch(cls, messages: list[Message]) -> DailySheetBatch:
+        """Project `messages` into a batch of pending writes, without flushing it"""
+        manager = cls()
+        manager._batch = DailySheetBatch()
 
-    @handle(HoldCancelled)
-    def handle_hold_cancelled(self, event: HoldCancelled):
-        repo = lending.repository_for(DailySheet)
+        for message in messages:
+            for handler_method in cls._handlers.get(message.type, ()):
+                # Call the undecorated method, without a Unit of Work per event
+                undecorated(handler_method)(manager, message.to_object())
 
-        daily_sheet_record = repo.find_hold_for_patron(
-            patron_id=event.patron_id,
-            hold_id=event.hold_id,
-        )
+        return manager._batch
 
-        if daily_sheet_record:
-            daily_sheet_record.hold_status = HoldStatus.CANCELLED.value
+    def _project(self, record: HoldSheet | CheckoutSheet, *update_fields: str):
+        if self._batch is None:
+            lending.repository_for(type(record)).upsert(record, *update_fields)
         else:
-            daily_sheet_record = DailySheet(
-                patron_id=event.patron_id,
-                patron_type=event.patron_type,
-                hold_id=event.hold_id,
-                hold_status=HoldStatus.CANCELLED.value,
-                hold_book_id=event.book_id,
-                hold_branch_id=event.branch_id,
-                hold_type=event.hold_type,
-                hold_requested_at=event.requested_at,
-                hold_expires_on=event.expires_on,
-            )
+            self._batch.add(record, update_fields)
 
-        repo.add(daily_sheet_record)
-
-    @handle(BookCheckedOut)
-    def handle_book_checked_out(self, event: BookCheckedOut):
-        repo = lending.repository_for(DailySheet)
+    @handle(HoldExpired)
+    def handle_hold_expired(self, event: HoldExpired):
+        self._project(_hold_sheet(event, HoldStatus.EXPIRED.value), "status")
 
-        daily_sheet_record = repo.find_checkout_for_patron(
-            patron_id=event.patron_id,
-            checkout_id=event.checkout_id,
-        )
+    @handle(HoldPlaced)
+    def handle_hold_placed(self, event: HoldPlaced):
+        self._project(_hold_sheet(event, HoldStatus.ACTIVE.value))
 
-        if daily_sheet_record:
-            daily_sheet_record.checkout_id = event.checkout_id
-            daily_sheet_record.checkout_book_id = event.book_id
-            daily_sheet_record.checkout_branch_id = event.branch_id
-            daily_sheet_record.checkout_checked_out_at = event.checked_out_at
-            daily_sheet_record.checkout_due_on = event.due_on
-            daily_sheet_record.checkout_status = "ACTIVE"
-        else:
-            daily_sheet_record = DailySheet(
-                patron_id=event.patron_id,
-                patron_type=event.patron_type,
-                checkout_id=event.checkout_id,
-                checkout_book_id=event.book_id,
-                checkout_branch_id=event.branch_id,
-                checkout_checked_out_at=event.checked_out_at,
-                checkout_due_on=event.due_on,
-                checkout_status="ACTIVE",
-            )
+    @handle(HoldCancelled)
+    def handle_hold_cancelled(self, event: HoldCancelled):
+        self._project(_hold_sheet(event, HoldStatus.CANCELLED.value), "status")
 
-        repo.add(daily_sheet_record)
+    @handle(BookCheckedOut)
+    def handle_book_checked_out(self, event: BookCheckedOut):
+        self._project(_checkout_sheet(event, CheckoutStatus.ACTIVE.value))
 
     @handle(BookReturned)
     def handle_book_returned(self, event: BookReturned):
-        repo = lending.repository_for(DailySheet)
-
-        daily_sheet_record = repo.find_checkout_for_patron(
-            patron_id=event.patron_id,
-            checkout_id=event.checkout_id,
+        self._project(
+            _checkout_sheet(
+                event, CheckoutStatus.RETURNED.value, returned_at=event.returned_at
+            ),
+            "returned_at",
+            "status",
         )
 
-        if daily_sheet_record:
-            daily_sheet_record.checkout_returned_at = event.returned_at
-            daily_sheet_record.checkout_status = "RETURNED"
-        else:
-            daily_sheet_record = DailySheet(
-                patron_id=event.patron_id,
-                patron_type=event.patron_type,
-                checkout_id=event.checkout_id,
-                checkout_book_id=event.book_id,
-                checkout_branch_id=event.branch_id,
-                checkout_checked_out_at=event.checked_out_at,
-                checkout_due_on=event.due_on,
-                checkout_returned_at=event.returned_at,
-                checkout_status="RETURNED",
-            )
-
-        repo.add(daily_sheet_record)
-
     @handle(BookOverdue)
     def handle_book_overdue(self, event: BookOverdue):
-        repo = lending.repository_for(DailySheet)
-
-        daily_sheet_record = repo.find_checkout_for_patron(
-            patron_id=event.patron_id,
-            checkout_id=event.checkout_id,
+        self._project(
+            _checkout_sheet(
+                event, CheckoutStatus.OVERDUE.value, overdue_at=event.checked_out_at
+            ),
+            "overdue_at",
+            "status",
         )
-
-        if daily_sheet_record:
-            daily_sheet_record.checkout_overdue_at = event.checked_out_at
-            daily_sheet_record.checkout_status = "OVERDUE"
-        else:
-            daily_sheet_record = DailySheet(
-                patron_id=event.patron_id,
-                patron_type=event.patron_type,
-                checkout_id=event.checkout_id,
-                checkout_book_id=event.book_id,
-                checkout_branch_id=event.branch_id,
-                checkout_checked_out_at=event.checked_out_at,
-                checkout_due_on=event.due_on,
-                checkout_overdue_at=event.checked_out_at,
-                checkout_status="OVERDUE",
-            )
-
-        repo.add(daily_sheet_record)
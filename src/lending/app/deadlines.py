@@ -0,0 +1,222 @@
+import argparse
+import logging
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from enum import Enum
+
+from protean import UnitOfWork, handle
+from protean.exceptions import (
+    ExpectedVersionError,
+    ObjectNotFoundError,
+    ValidationError,
+)
+from protean.fields import Date, Identifier, String
+from sqlalchemy import Index
+
+from lending import DailySheetService, Patron
+from lending.app.daily_run import DailySheetReport
+from lending.domain import lending
+from lending.model.patron import (
+    BookCheckedOut,
+    BookOverdue,
+    BookReturned,
+    HoldCancelled,
+    HoldExpired,
+    HoldPlaced,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineKind(Enum):
+    HOLD_EXPIRY = "HOLD_EXPIRY"
+    CHECKOUT_DUE = "CHECKOUT_DUE"
+
+
+@lending.view
+class Deadline:
+    """A pending hold expiry or checkout due date, keyed by hold/checkout id.
+
+    Deadlines are bucketed by `fire_on`, the first day on which the hold is
+    past its expiry or the checkout past its due date.
+    """
+
+    id = Identifier(identifier=True)
+    patron_id = Identifier(required=True)
+    kind = String(required=True, max_length=12)
+    fire_on = Date(required=True)
+
+
+@lending.model(part_of=Deadline, schema_name="deadline")
+class DeadlineModel:
+    __table_args__ = (Index("ix_deadline_fire_on", "fire_on"),)
+
+
+@lending.repository(part_of=Deadline)
+class DeadlineRepository:
+    def due(self, on: date | None = None, limit: int | None = None):
+        """Deadlines firing on or before `on` (today by default), earliest first"""
+        on = on or date.today()
+        query = self._dao.query.filter(fire_on__lte=on).order_by("fire_on")
+        if limit:
+            query = query.limit(limit)
+
+        return query.all().items
+
+    def schedule(self, deadline: Deadline) -> None:
+        """Add `deadline`, or reschedule the existing one, so replays are harmless"""
+        try:
+            existing = self._dao.get(deadline.id)
+        except ObjectNotFoundError:
+            self.add(deadline)
+        else:
+            existing.fire_on = deadline.fire_on
+            self.add(existing)
+
+    def remove(self, id: Identifier) -> None:
+        try:
+            self._dao.delete(self._dao.get(id))
+        except ObjectNotFoundError:
+            pass
+
+
+@lending.event_handler(stream_category="library::patron")
+class DeadlineScheduler:
+    @handle(HoldPlaced)
+    def schedule_hold_expiry(self, event: HoldPlaced):
+        # Open-ended holds never expire
+        if event.expires_on is None:
+            return
+
+        lending.repository_for(Deadline).schedule(
+            Deadline(
+                id=event.hold_id,
+                patron_id=event.patron_id,
+                kind=DeadlineKind.HOLD_EXPIRY.value,
+                fire_on=event.expires_on + timedelta(days=1),
+            )
+        )
+
+    @handle(BookCheckedOut)
+    def schedule_checkout_due(self, event: BookCheckedOut):
+        lending.repository_for(Deadline).schedule(
+            Deadline(
+                id=event.checkout_id,
+                patron_id=event.patron_id,
+                kind=DeadlineKind.CHECKOUT_DUE.value,
+                fire_on=event.due_on + timedelta(days=1),
+            )
+        )
+
+    @handle(HoldCancelled)
+    def unschedule_cancelled_hold(self, event: HoldCancelled):
+        lending.repository_for(Deadline).remove(event.hold_id)
+
+    @handle(HoldExpired)
+    def unschedule_expired_hold(self, event: HoldExpired):
+        lending.repository_for(Deadline).remove(event.hold_id)
+
+    @handle(BookReturned)
+    def unschedule_returned_checkout(self, event: BookReturned):
+        lending.repository_for(Deadline).remove(event.checkout_id)
+
+    @handle(BookOverdue)
+    def unschedule_overdue_checkout(self, event: BookOverdue):
+        lending.repository_for(Deadline).remove(event.checkout_id)
+
+
+def fire_due_deadlines(
+    on: date | None = None, limit: int | None = None
+) -> DailySheetReport:
+    """Expire holds and mark checkouts overdue for deadlines that have fallen due.
+
+    Only the due entries are read, at most `limit` of them, earliest first.
+    Each patron is loaded once for all its due deadlines and committed in its
+    own Unit of Work. Fired deadlines are removed from the index, including
+    those that no longer apply because the hold or checkout moved on, or whose
+    patron cannot be loaded or rejects them. A patron changed concurrently keeps
+    its deadlines, to be fired again on the next call.
+    """
+    deadline_repo = lending.repository_for(Deadline)
+    patron_repo = lending.repository_for(Patron)
+
+    due_by_patron = defaultdict(list)
+    for deadline in deadline_repo.due(on, limit):
+        due_by_patron[deadline.patron_id].append(deadline)
+
+    report = DailySheetReport()
+    for patron_id, deadlines in due_by_patron.items():
+        report.patrons += 1
+        try:
+            with UnitOfWork():
+                hold_ids = {
+                    deadline.id
+                    for deadline in deadlines
+                    if deadline.kind == DeadlineKind.HOLD_EXPIRY.value
+                }
+                checkout_ids = {
+                    deadline.id
+                    for deadline in deadlines
+                    if deadline.kind == DeadlineKind.CHECKOUT_DUE.value
+                }
+                patron = patron_repo.get_with_items(patron_id, hold_ids, checkout_ids)
+                service = DailySheetService(
+                    patrons=[patron], hold_ids=hold_ids, checkout_ids=checkout_ids
+                )
+                service.run()
+                patron_repo.add(patron)
+        except ExpectedVersionError as exc:
+            logger.warning(f"Deadlines for patron {patron_id} will be retried: {exc}")
+            report.failures += 1
+            continue
+        except (ObjectNotFoundError, ValidationError) as exc:
+            logger.error(f"Deadlines failed to fire for patron {patron_id}: {exc}")
+            report.failures += 1
+        else:
+            report.holds_expired += service.holds_expired
+            report.checkouts_overdue += service.checkouts_overdue
+
+        for deadline in deadlines:
+            deadline_repo.remove(deadline.id)
+
+    return report
+
+
+def run_scheduler(interval: float | None = None, limit: int | None = None) -> None:
+    """Poll the deadline index and fire due deadlines, `limit` at a time.
+
+    Firing a bounded batch every `interval` seconds spreads the work of a day's
+    bucket out, instead of processing it all in one sweep. The scheduler also
+    waits out a batch in which every patron failed, before retrying it.
+    """
+    interval = interval or lending.config["custom"]["DEADLINE_POLL_INTERVAL"]
+    limit = limit or lending.config["custom"]["DEADLINE_BATCH_SIZE"]
+
+    with lending.domain_context():
+        while True:
+            report = fire_due_deadlines(limit=limit)
+            if report.patrons == report.failures:
+                time.sleep(interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the deadline scheduler")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds to wait when no deadline is due (DEADLINE_POLL_INTERVAL)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Deadlines fired per tick (DEADLINE_BATCH_SIZE)",
+    )
+    args = parser.parse_args()
+
+    lending.init()
+    run_scheduler(interval=args.interval, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
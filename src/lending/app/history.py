@@ -0,0 +1,275 @@
+import logging
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from protean import UnitOfWork
+from protean.exceptions import ObjectNotFoundError
+from protean.fields import Date, DateTime, Identifier, String
+from protean.utils.reflection import declared_fields
+from sqlalchemy import Index
+
+from lending import Checkout, Hold, Patron
+from lending.domain import lending
+from lending.model.patron.event_sourcing import stream_name
+from lending.model.patron.patron import ENDED_CHECKOUT_STATUSES, ENDED_HOLD_STATUSES
+from lending.utils.repository import BulkRepository
+from lending.utils.streams import all_patron_ids
+
+logger = logging.getLogger(__name__)
+
+
+@lending.view
+class HoldHistory:
+    """A hold that ended, archived out of the `Patron` aggregate"""
+
+    id = Identifier(identifier=True)  # The hold id
+    patron_id = Identifier(required=True)
+    book_id = Identifier(required=True)
+    branch_id = Identifier(required=True)
+    hold_type = String(required=True)
+    status = String(required=True)
+    requested_at = DateTime(required=True)
+    expires_on = Date()
+    ended_at = DateTime()
+    archived_at = DateTime(required=True)
+
+
+@lending.model(part_of=HoldHistory, schema_name="hold_history")
+class HoldHistoryModel:
+    __table_args__ = (Index("ix_hold_history_patron", "patron_id", "id"),)
+
+
+@lending.repository(part_of=HoldHistory)
+class HoldHistoryRepository(BulkRepository):
+    def for_patron(
+        self, patron_id: Identifier, batch_size: int | None = None
+    ) -> Iterator[HoldHistory]:
+        return self._iterate({"patron_id": patron_id}, batch_size)
+
+
+@lending.view
+class CheckoutHistory:
+    """A returned checkout, archived out of the `Patron` aggregate"""
+
+    id = Identifier(identifier=True)  # The checkout id
+    patron_id = Identifier(required=True)
+    book_id = Identifier(required=True)
+    branch_id = Identifier(required=True)
+    checked_out_at = DateTime(required=True)
+    status = String(required=True)
+    due_on = Date(required=True)
+    returned_at = DateTime()
+    archived_at = DateTime(required=True)
+
+
+@lending.model(part_of=CheckoutHistory, schema_name="checkout_history")
+class CheckoutHistoryModel:
+    __table_args__ = (Index("ix_checkout_history_patron", "patron_id", "id"),)
+
+
+@lending.repository(part_of=CheckoutHistory)
+class CheckoutHistoryRepository(BulkRepository):
+    def for_patron(
+        self, patron_id: Identifier, batch_size: int | None = None
+    ) -> Iterator[CheckoutHistory]:
+        return self._iterate({"patron_id": patron_id}, batch_size)
+
+
+def _to_history(
+    item: Hold | Checkout, history_cls: type, archived_at: datetime, **overrides
+):
+    """The history record of `item`, with the values of `overrides` in place of
+    its own
+    """
+    values = {
+        field_name: getattr(item, field_name)
+        for field_name in declared_fields(history_cls)
+        if field_name not in ("patron_id", "archived_at")
+    }
+    return history_cls(
+        patron_id=item.patron_id, archived_at=archived_at, **(values | overrides)
+    )
+
+
+def _ended(entity_cls: type, criteria: dict, batch_size: int) -> Iterator:
+    """Stream ended children matching `criteria` straight from their table"""
+    query = (
+        lending.repository_for(entity_cls)
+        ._dao.query.filter(**criteria)
+        .order_by("id")
+        .limit(batch_size)
+    )
+
+    last_id = None
+    while True:
+        page = query if last_id is None else query.filter(id__gt=last_id)
+        items = page.all().items
+        yield from items
+
+        if len(items) < batch_size:
+            return
+
+        last_id = items[-1].id
+
+
+def _ended_ids(
+    entity_cls: type, patron_ids: list[Identifier], criteria: dict, page_size: int
+) -> dict[Identifier, set]:
+    """Ids of the ended children of `patron_ids` matching `criteria`, by patron"""
+    ids = defaultdict(set)
+    for item in _ended(
+        entity_cls, {"patron_id__in": patron_ids, **criteria}, page_size
+    ):
+        ids[item.patron_id].add(item.id)
+
+    return ids
+
+
+def _last_event_times(
+    patron_id: Identifier, batch_size: int
+) -> dict[Identifier, datetime]:
+    """When an event of the patron last named each book, by book id, in local
+    time like the dates of holds
+    """
+    store = lending.event_store.store
+
+    times = {}
+    position = 0
+    while messages := store.read(
+        stream_name(patron_id), position=position, no_of_messages=batch_size
+    ):
+        for message in messages:
+            if book_id := message.data.get("book_id"):
+                # The event store records times in UTC
+                time = message.time
+                if time.tzinfo is None:
+                    time = time.replace(tzinfo=timezone.utc)
+                times[book_id] = time.astimezone().replace(tzinfo=None)
+
+        if len(messages) < batch_size:
+            break
+
+        position = messages[-1].position + 1
+
+    return times
+
+
+def _undated_holds(
+    patron_ids: list[Identifier], before: datetime, page_size: int
+) -> Iterator[Hold]:
+    """Ended holds of `patron_ids` without `ended_at`, because they ended before
+    it was recorded, that ended before `before`, with `ended_at` filled in.
+
+    Such a hold is dated by the last event of its patron that names its book,
+    which is never earlier than the event that ended the hold.
+    """
+    times = {}
+    for hold in _ended(
+        Hold,
+        {"patron_id__in": patron_ids, "status__in": list(ENDED_HOLD_STATUSES)},
+        page_size,
+    ):
+        # Picked out here, as the memory provider matches no null value
+        if hold.ended_at is not None:
+            continue
+
+        if hold.patron_id not in times:
+            times[hold.patron_id] = _last_event_times(hold.patron_id, page_size)
+
+        ended_at = times[hold.patron_id].get(hold.book_id)
+        if ended_at is not None and ended_at < before:
+            hold.ended_at = ended_at
+            yield hold
+
+
+def archive_patron_history(
+    before: datetime | None = None, chunk_size: int | None = None
+) -> int:
+    """Move holds and checkouts that ended before `before` out of their patrons
+    and into the hold and checkout history, returning the number archived.
+
+    Holds are dated by when they ended and checkouts by when they were
+    returned. Holds that ended before that was recorded are dated by the last
+    event of their patron about their book. By default, items older than
+    `ARCHIVE_AFTER_DAYS` are archived, so recently ended items stay visible on
+    the patron for a while.
+
+    Patrons are taken in chunks of `chunk_size`, in order of identity, and the
+    items to archive are looked up for one chunk at a time. Each patron is
+    loaded with only those items, and the chunk committed in one Unit of Work,
+    with each history row written along with the removal of the item from its
+    patron.
+    """
+    before = before or datetime.now() - timedelta(
+        days=lending.config["custom"]["ARCHIVE_AFTER_DAYS"]
+    )
+    chunk_size = chunk_size or lending.config["custom"]["DAILY_SHEET_CHUNK_SIZE"]
+    page_size = lending.config["custom"]["DAILY_SHEET_PAGE_SIZE"]
+
+    patron_repo = lending.repository_for(Patron)
+    hold_history_repo = lending.repository_for(HoldHistory)
+    checkout_history_repo = lending.repository_for(CheckoutHistory)
+
+    archived = 0
+    patron_ids = all_patron_ids(chunk_size)
+    while chunk := list(islice(patron_ids, chunk_size)):
+        hold_ids = _ended_ids(
+            Hold,
+            chunk,
+            {"status__in": list(ENDED_HOLD_STATUSES), "ended_at__lt": before},
+            page_size,
+        )
+        ended_at = {}
+        for hold in _undated_holds(chunk, before, page_size):
+            hold_ids[hold.patron_id].add(hold.id)
+            ended_at[hold.id] = hold.ended_at
+
+        checkout_ids = _ended_ids(
+            Checkout,
+            chunk,
+            {"status__in": list(ENDED_CHECKOUT_STATUSES), "returned_at__lt": before},
+            page_size,
+        )
+        if not (hold_ids or checkout_ids):
+            continue
+
+        archived_at = datetime.now()
+        with UnitOfWork():
+            for patron_id in sorted(hold_ids.keys() | checkout_ids.keys()):
+                try:
+                    patron = patron_repo.get_with_items(
+                        patron_id,
+                        hold_ids.get(patron_id, set()),
+                        checkout_ids.get(patron_id, set()),
+                    )
+                except ObjectNotFoundError:
+                    logger.error(f"History not archived for missing patron {patron_id}")
+                    continue
+
+                holds, checkouts = patron.archive_ended_items()
+                hold_history_repo.upsert_many(
+                    (
+                        _to_history(
+                            hold,
+                            HoldHistory,
+                            archived_at,
+                            ended_at=ended_at.get(hold.id, hold.ended_at),
+                        ),
+                        ["archived_at"],
+                    )
+                    for hold in holds
+                )
+                checkout_history_repo.upsert_many(
+                    (
+                        _to_history(checkout, CheckoutHistory, archived_at),
+                        ["archived_at"],
+                    )
+                    for checkout in checkouts
+                )
+                patron_repo.add(patron)
+
+                archived += len(holds) + len(checkouts)
+
+    return archived
@@ -0,0 +1,144 @@
+from protean.fields import Float, Identifier, Integer, String
+from protean.utils.query import Q
+from sqlalchemy.exc import IntegrityError
+
+from lending.domain import lending
+from lending.utils.streams import shard_for
+
+
+def partition_of(stream_name: str, partitions: int) -> int:
+    """Partition of a stream in the `library::patron` category, by patron id,
+    so that a patron's fact stream falls in the same partition as its events
+    """
+    stream_id = stream_name.split("-", 1)[1]
+    return shard_for(stream_id.removeprefix("fact-"), partitions)
+
+
+@lending.view
+class PartitionWorker:
+    """A worker sharing the partitions of a subscription, for as long as it
+    renews its membership before `expires_at`
+    """
+
+    id = Identifier(identifier=True)
+    subscriber_id = String(required=True, max_length=255)
+    worker_id = String(required=True, max_length=100)
+    expires_at = Float(required=True)  # Seconds since the epoch
+
+
+@lending.repository(part_of=PartitionWorker)
+class PartitionWorkerRepository:
+    def renew(self, subscriber_id: str, worker_id: str, until: float) -> None:
+        """Join, or stay a member of, the workers of `subscriber_id`"""
+        id = f"{subscriber_id}-{worker_id}"
+        if not self._dao.query.filter(id=id).update_all(expires_at=until):
+            self.add(
+                PartitionWorker(
+                    id=id,
+                    subscriber_id=subscriber_id,
+                    worker_id=worker_id,
+                    expires_at=until,
+                )
+            )
+
+    def live(self, subscriber_id: str, now: float, limit: int) -> list[str]:
+        """Identities of the first `limit` workers still members at `now`,
+        ordered so that every worker sees the same list
+        """
+        self._dao.query.filter(
+            subscriber_id=subscriber_id, expires_at__lt=now
+        ).delete_all()
+
+        workers = (
+            self._dao.query.filter(subscriber_id=subscriber_id)
+            .order_by("worker_id")
+            .limit(limit)
+            .all()
+            .items
+        )
+        return [worker.worker_id for worker in workers]
+
+    def leave(self, subscriber_id: str, worker_id: str) -> None:
+        self._dao.query.filter(id=f"{subscriber_id}-{worker_id}").delete_all()
+
+
+@lending.view
+class PartitionLease:
+    """A partition of a subscription, with the worker it is leased to until
+    `expires_at`, and the global position of the category read up to
+    """
+
+    id = Identifier(identifier=True)
+    subscriber_id = String(required=True, max_length=255)
+    partition = Integer(required=True)
+    owner = String(max_length=100)
+    expires_at = Float(default=0.0)  # Seconds since the epoch
+    position = Integer(default=-1)
+
+
+@lending.repository(part_of=PartitionLease)
+class PartitionLeaseRepository:
+    def for_subscriber(
+        self, subscriber_id: str, partitions: int, position: int
+    ) -> list[PartitionLease]:
+        """The leases of the `partitions` of `subscriber_id`, in order.
+        Missing leases are added, unleased, read up to `position`.
+        """
+        leases = self._for_subscriber(subscriber_id, partitions)
+        if len(leases) == partitions:
+            return leases
+
+        existing = {lease.partition for lease in leases}
+        for partition in range(partitions):
+            if partition in existing:
+                continue
+            try:
+                self.add(
+                    PartitionLease(
+                        id=f"{subscriber_id}-{partition}",
+                        subscriber_id=subscriber_id,
+                        partition=partition,
+                        position=position,
+                    )
+                )
+            except IntegrityError:
+                pass  # Added meanwhile by another worker
+
+        return self._for_subscriber(subscriber_id, partitions)
+
+    def _for_subscriber(self, subscriber_id: str, partitions: int) -> list:
+        return (
+            self._dao.query.filter(subscriber_id=subscriber_id)
+            .order_by("partition")
+            .limit(partitions)
+            .all()
+            .items
+        )
+
+    def claim(self, id: str, worker_id: str, until: float, now: float) -> bool:
+        """Lease the partition to `worker_id` until `until`, if it already is,
+        or its lease has run out or been released. Returns whether it was.
+        """
+        return bool(
+            self._dao.query.filter(
+                Q(id=id) & (Q(owner=worker_id) | Q(expires_at__lt=now))
+            ).update_all(owner=worker_id, expires_at=until)
+        )
+
+    def release(self, id: str, worker_id: str) -> None:
+        self._dao.query.filter(id=id, owner=worker_id).update_all(
+            owner=None, expires_at=0.0
+        )
+
+    def advance(
+        self, subscriber_id: str, worker_id: str, partitions: list[int], position: int
+    ) -> None:
+        """Record that `partitions`, while leased to `worker_id`, have been read
+        up to `position`
+        """
+        self._dao.query.filter(
+            subscriber_id=subscriber_id,
+            owner=worker_id,
+            partition__in=partitions,
+            position__lt=position,
+        ).update_all(position=position)
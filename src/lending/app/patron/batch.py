@@ -0,0 +1,117 @@
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from protean import UnitOfWork
+from protean.exceptions import (
+    ExpectedVersionError,
+    IncorrectUsageError,
+    ObjectNotFoundError,
+    ValidationError,
+)
+from protean.fields import Identifier
+
+from lending import (
+    Book,
+    CheckoutBook,
+    Patron,
+    PlaceHold,
+    ReturnBook,
+    checkout,
+    place_hold,
+)
+from lending.domain import lending
+
+logger = logging.getLogger(__name__)
+
+# Commands a batch can carry, and whether each acts on a book loaded with it
+BATCH_COMMANDS = {CheckoutBook: True, PlaceHold: True, ReturnBook: False}
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a command processed in a batch"""
+
+    command: CheckoutBook | PlaceHold | ReturnBook
+    error: Exception | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def _run(command, patron: Patron, book: Book | None, held: set) -> None:
+    match command:
+        case CheckoutBook():
+            checkout(patron, book, command.branch_id)()
+        case PlaceHold():
+            # `PatronHoldEventsHandler` marks books on hold only once the batch
+            #   commits, so books held earlier in the batch are tracked here
+            if book.id in held:
+                raise ValidationError({"book": ["Book is already on hold"]})
+            place_hold(patron, book, command.branch_id, command.hold_type)()
+            held.add(book.id)
+        case ReturnBook():
+            patron.return_book(command.book_id)
+
+
+def run_for_patron(patron_id: Identifier, commands: list) -> list[CommandResult]:
+    """Run `commands` for one patron in order, with the patron and each book
+    loaded once, and save the patron once, in one Unit of Work.
+
+    A command rejected by the rules, which are checked before anything
+    changes, fails alone. If the patron cannot be loaded, or was saved
+    elsewhere meanwhile, every command fails.
+    """
+    results = [CommandResult(command) for command in commands]
+    try:
+        with UnitOfWork():
+            patron = lending.repository_for(Patron).get(patron_id)
+
+            books, held = {}, set()
+            for result in results:
+                book_id = result.command.book_id
+                try:
+                    if BATCH_COMMANDS[type(result.command)] and book_id not in books:
+                        books[book_id] = lending.repository_for(Book).get(book_id)
+                    _run(result.command, patron, books.get(book_id), held)
+                except (ObjectNotFoundError, ValidationError) as exc:
+                    result.error = exc
+
+            if any(result.succeeded for result in results):
+                lending.repository_for(Patron).add(patron)
+    except (ObjectNotFoundError, ExpectedVersionError) as exc:
+        logger.error(f"Batch failed for patron {patron_id}: {exc}")
+        for result in results:
+            result.error = exc
+
+    return results
+
+
+def process_batch(commands: Iterable) -> list[CommandResult]:
+    """Process `CheckoutBook`, `PlaceHold` and `ReturnBook` commands grouped by
+    patron, each group in the order submitted, and report on each command in
+    the same order.
+
+    Each patron's commands share one load and one save (see
+    `run_for_patron`), instead of one of each per command. Events are handled
+    as each patron's commands commit.
+    """
+    commands = list(commands)
+    for command in commands:
+        if type(command) not in BATCH_COMMANDS:
+            raise IncorrectUsageError(
+                f"`{type(command).__name__}` cannot be processed in a batch"
+            )
+
+    positions: dict[Identifier, list[int]] = {}
+    for position, command in enumerate(commands):
+        positions.setdefault(command.patron_id, []).append(position)
+
+    results = [None] * len(commands)
+    for patron_id, group in positions.items():
+        group_results = run_for_patron(patron_id, [commands[i] for i in group])
+        for position, result in zip(group, group_results):
+            results[position] = result
+
+    return results
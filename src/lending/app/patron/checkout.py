@@ -1,8 +1,11 @@
 from protean import current_domain, handle
-from protean.fields import Identifier
+from protean.exceptions import ObjectNotFoundError, ValidationError
+from protean.fields import Identifier, List
 
 from lending import Book, Patron, checkout
 from lending.domain import lending
+from lending.model.patron import BookCheckoutRejected, BookReturnRejected
+from lending.utils.concurrency import load_concurrently
 
 
 @lending.command(part_of="Patron")
@@ -18,19 +21,97 @@ class ReturnBook:
     book_id = Identifier(required=True)
 
 
+@lending.command(part_of="Patron")
+class CheckoutBooks:
+    """Check out several books at once, such as at the desk"""
+
+    patron_id = Identifier(required=True, identifier=True)
+    book_ids = List(content_type=Identifier, required=True)
+    branch_id = Identifier(required=True)
+
+
+@lending.command(part_of="Patron")
+class ReturnBooks:
+    """Return several books at once, such as through the drop box"""
+
+    patron_id = Identifier(required=True, identifier=True)
+    book_ids = List(content_type=Identifier, required=True)
+
+
+def _reasons(exc: ObjectNotFoundError | ValidationError) -> dict:
+    if isinstance(exc, ObjectNotFoundError):
+        return {"book": ["Book does not exist"]}
+
+    return exc.messages
+
+
 @lending.command_handler(part_of="Patron")
 class CheckoutCommandHandler:
     @handle(CheckoutBook)
     def handle_checkout_book(self, command: CheckoutBook) -> None:
-        patron = current_domain.repository_for(Patron).get(command.patron_id)
-        book = current_domain.repository_for(Book).get(command.book_id)
+        patron, book = load_concurrently(
+            (Patron, command.patron_id), (Book, command.book_id)
+        )
 
         checkout(patron, book, command.branch_id)()
         current_domain.repository_for(Patron).add(patron)
 
     @handle(ReturnBook)
     def handle_return_book(self, command: ReturnBook) -> None:
-        patron = current_domain.repository_for(Patron).get(command.patron_id)
+        patron = current_domain.repository_for(Patron).get_with_checkout_of(
+            command.patron_id, command.book_id
+        )
 
         patron.return_book(command.book_id)
         current_domain.repository_for(Patron).add(patron)
+
+    @handle(CheckoutBooks)
+    def handle_checkout_books(self, command: CheckoutBooks) -> None:
+        """Check out each book in turn, with one load and one save of the
+        patron. Books that cannot be checked out are rejected one by one,
+        with `BookCheckoutRejected`, and the others are checked out.
+        """
+        repo = current_domain.repository_for(Patron)
+        patron = repo.get(command.patron_id)
+
+        for book_id in dict.fromkeys(command.book_ids):
+            try:
+                book = current_domain.repository_for(Book).get(book_id)
+                checkout(patron, book, command.branch_id)()
+            except (ObjectNotFoundError, ValidationError) as exc:
+                patron.raise_(
+                    BookCheckoutRejected(
+                        patron_id=patron.id,
+                        patron_type=patron.patron_type,
+                        book_id=book_id,
+                        branch_id=command.branch_id,
+                        reasons=_reasons(exc),
+                    )
+                )
+
+        repo.add(patron)
+
+    @handle(ReturnBooks)
+    def handle_return_books(self, command: ReturnBooks) -> None:
+        """Return each book in turn, with the patron loaded once with only the
+        checkouts of the books. Books that cannot be returned are rejected one
+        by one, with `BookReturnRejected`, and the others are returned.
+        """
+        repo = current_domain.repository_for(Patron)
+        book_ids = list(dict.fromkeys(command.book_ids))
+        patron = repo.get_with_checkouts_of(command.patron_id, book_ids)
+
+        for book_id in book_ids:
+            try:
+                patron.return_book(book_id)
+            except ValidationError as exc:
+                patron.raise_(
+                    BookReturnRejected(
+                        patron_id=patron.id,
+                        patron_type=patron.patron_type,
+                        book_id=book_id,
+                        reasons=_reasons(exc),
+                    )
+                )
+
+        repo.add(patron)
@@ -0,0 +1,70 @@
+from collections.abc import Iterable, Iterator
+
+from protean.core.event import BaseEvent
+from protean.fields import Identifier
+
+from lending.domain import lending
+from lending.model.patron import PatronDeltaFactEvent
+
+
+def patron_facts(
+    patron_id: Identifier, batch_size: int | None = None
+) -> Iterator[BaseEvent]:
+    """The fact events of a patron, oldest first, read in batches of `batch_size`"""
+    batch_size = batch_size or lending.config["custom"]["REBUILD_BATCH_SIZE"]
+    stream = f"library::patron-fact-{patron_id}"
+
+    position = 0
+    while True:
+        messages = lending.event_store.store.read(
+            stream, position=position, no_of_messages=batch_size
+        )
+        for message in messages:
+            yield message.to_object()
+
+        if len(messages) < batch_size:
+            return
+
+        position = messages[-1].position + 1
+
+
+def apply_patron_fact(state: dict | None, fact: BaseEvent) -> dict | None:
+    """Apply a patron's fact event on its `state`, shaped like the payload of a
+    full fact event. A full fact event replaces the state, and a delta updates
+    it in place. Deltas are skipped while there is no state.
+    """
+    if not isinstance(fact, PatronDeltaFactEvent):
+        return fact.payload
+
+    if state is None:
+        return None
+
+    state.update(fact.changes)
+    state["_version"] = fact.version
+    for field_name in ("holds", "checkouts"):
+        delta = getattr(fact, field_name) or {}
+        removed = set(delta.get("removed", []))
+        changed = delta.get("changed", {})
+        state[field_name] = [
+            {**item, **changed.get(item["id"], {})}
+            for item in state[field_name]
+            if item["id"] not in removed
+        ] + delta.get("added", [])
+
+    return state
+
+
+def fold_patron_facts(facts: Iterable[BaseEvent]) -> dict | None:
+    """Fold a patron's fact events, oldest first, into the full state of the
+    patron, or `None` if there was no full fact event.
+    """
+    state = None
+    for fact in facts:
+        state = apply_patron_fact(state, fact)
+
+    return state
+
+
+def patron_state(patron_id: Identifier) -> dict | None:
+    """The latest state of a patron, folded from its fact events"""
+    return fold_patron_facts(patron_facts(patron_id))
@@ -3,6 +3,7 @@ from protean.fields import Identifier, String
 
 from lending import Book, Patron, place_hold
 from lending.domain import lending
+from lending.utils.concurrency import load_concurrently
 
 
 @lending.command(part_of="Patron")
@@ -23,14 +24,17 @@ class CancelHold:
 class HoldCommandHandler:
     @handle(PlaceHold)
     def handle_place_hold(self, command: PlaceHold) -> None:
-        patron = current_domain.repository_for(Patron).get(command.patron_id)
-        book = current_domain.repository_for(Book).get(command.book_id)
+        patron, book = load_concurrently(
+            (Patron, command.patron_id), (Book, command.book_id)
+        )
 
         place_hold(patron, book, command.branch_id, command.hold_type)()
         current_domain.repository_for(Patron).add(patron)
 
     @handle(CancelHold)
     def handle_cancel_hold(self, command: CancelHold) -> None:
-        patron = current_domain.repository_for(Patron).get(command.patron_id)
+        patron = current_domain.repository_for(Patron).get_with_hold(
+            command.patron_id, command.hold_id
+        )
         patron.cancel_hold(command.hold_id)
         current_domain.repository_for(Patron).add(patron)
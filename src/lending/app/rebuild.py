@@ -0,0 +1,193 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from protean.utils.mixins import Message
+from sqlalchemy import MetaData, Table, inspect, text
+
+from lending import CheckoutSheet, HoldSheet
+from lending.app.dailysheet import DailySheetManager
+from lending.domain import lending
+from lending.utils.internals import last_message, write_message
+from lending.utils.streams import read_ahead, shard_for
+
+logger = logging.getLogger(__name__)
+
+SHEETS = (HoldSheet, CheckoutSheet)
+
+
+def _project_partition(
+    messages: list[Message], tables: dict[type, Table] | None
+) -> None:
+    with lending.domain_context():
+        DailySheetManager.project_batch(messages).flush(tables)
+
+
+class DailySheetRebuild:
+    """A resumable rebuild of the hold and checkout sheets from the event store.
+
+    On SQL providers, each sheet is rebuilt into a shadow table while the live
+    tables keep serving reads, and the shadow tables are swapped in with one
+    transaction at the end. The memory provider has no tables, so the sheets
+    are cleared and rebuilt in place.
+
+    The `library::patron` category is read in batches of `batch_size`, with the
+    next batch read ahead. Each batch is partitioned by patron id across
+    `workers`, so all events of a patron are projected in order by one worker,
+    and a checkpoint with the last position is written once the batch is
+    flushed. Running again with the same `rebuild_id` resumes after it. The
+    memory provider is not thread-safe, so its sheets are rebuilt by one worker.
+    """
+
+    def __init__(
+        self, rebuild_id: str, workers: int = 4, batch_size: int | None = None
+    ):
+        self.rebuild_id = rebuild_id
+        self.batch_size = batch_size or lending.config["custom"]["REBUILD_BATCH_SIZE"]
+
+        self.repos = [lending.repository_for(sheet) for sheet in SHEETS]
+        self.provider = self.repos[0]._provider
+
+        # Shadow tables, by sheet, when the sheets live in SQL tables
+        self.shadow_tables: dict[type, Table] | None = None
+        if self.provider.conn_info["provider"] in ("postgresql", "sqlite"):
+            metadata = MetaData()
+            # Indexes are created after the bulk load, as part of the swap
+            self.shadow_tables = {
+                repo.meta_.part_of: Table(
+                    f"{repo._dao.model_cls.__table__.name}_rebuild",
+                    metadata,
+                    *(column._copy() for column in repo._dao.model_cls.__table__.c),
+                )
+                for repo in self.repos
+            }
+
+        self.workers = workers if self.shadow_tables is not None else 1
+
+    @property
+    def stream_name(self) -> str:
+        return f"library::daily_sheet_rebuild-{self.rebuild_id}"
+
+    def last_checkpoint(self) -> dict | None:
+        message = last_message(self.stream_name)
+        if message:
+            return message["data"]
+
+        return None
+
+    def _write_checkpoint(self, position: int, swapped: bool = False) -> None:
+        write_message(
+            self.stream_name,
+            "Checkpoint",
+            {"position": position, "swapped": swapped},
+        )
+
+    def run(self, executor: Executor | None = None) -> int:
+        """Rebuild the projection, returning the last position projected"""
+        checkpoint = self.last_checkpoint()
+        if checkpoint and checkpoint["swapped"]:
+            return checkpoint["position"]
+
+        position = checkpoint["position"] if checkpoint else -1
+        if checkpoint is None:
+            self._prepare()
+
+        # A run that stopped between the swap and its checkpoint only has
+        #   the catch-up left
+        if checkpoint is None or not self._swapped():
+            executor = executor or ThreadPoolExecutor(max_workers=self.workers)
+            with executor:
+                for messages in read_ahead(position + 1, self.batch_size):
+                    self._project(executor, messages, self.shadow_tables)
+
+                    position = messages[-1].global_position
+                    self._write_checkpoint(position)
+
+            if self.shadow_tables is not None:
+                self._swap()
+
+        if self.shadow_tables is not None:
+            position = self._catch_up(position)
+
+        self._write_checkpoint(position, swapped=True)
+        return position
+
+    def _project(
+        self,
+        executor: Executor,
+        messages: list[Message],
+        tables: dict[type, Table] | None,
+    ) -> None:
+        partitions = defaultdict(list)
+        for message in messages:
+            if DailySheetManager._handlers.get(message.type):
+                patron_id = message.data["patron_id"]
+                partitions[shard_for(patron_id, self.workers)].append(message)
+
+        futures = [
+            executor.submit(_project_partition, partition, tables)
+            for partition in partitions.values()
+        ]
+        for future in futures:
+            future.result()
+
+    def _prepare(self) -> None:
+        if self.shadow_tables is None:
+            for repo in self.repos:
+                repo._dao.delete_all()
+            return
+
+        engine = self.provider._engine
+        for shadow_table in self.shadow_tables.values():
+            shadow_table.drop(engine, checkfirst=True)
+            shadow_table.create(engine)
+
+    def _swapped(self) -> bool:
+        """Whether the shadow tables are gone, swapped in as the live tables"""
+        if self.shadow_tables is None:
+            return False
+
+        existing = set(inspect(self.provider._engine).get_table_names())
+        return not any(table.name in existing for table in self.shadow_tables.values())
+
+    def _swap(self) -> None:
+        """Replace the live tables with the shadow tables in one transaction"""
+        with self.provider._engine.begin() as conn:
+            for repo in self.repos:
+                live_table = repo._dao.model_cls.__table__
+                live = live_table.name
+                shadow = self.shadow_tables[repo.meta_.part_of].name
+
+                conn.execute(text(f"ALTER TABLE {live} RENAME TO {live}_retired"))
+                conn.execute(text(f"ALTER TABLE {shadow} RENAME TO {live}"))
+                conn.execute(text(f"DROP TABLE {live}_retired"))
+                if conn.dialect.name == "postgresql":
+                    # Free up the shadow table's primary key name for the next rebuild
+                    conn.execute(
+                        text(f"ALTER INDEX {shadow}_pkey RENAME TO {live}_pkey")
+                    )
+                for index in live_table.indexes:
+                    index.create(conn)
+
+        logger.info("Swapped rebuilt sheets in")
+
+    def _catch_up(self, position: int) -> int:
+        """Project events that the live projection wrote to the retired table
+        between the end of the rebuild and the swap.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for messages in read_ahead(position + 1, self.batch_size):
+                self._project(executor, messages, None)
+                position = messages[-1].global_position
+
+        return position
+
+
+def rebuild_daily_sheet(
+    rebuild_id: str,
+    workers: int = 4,
+    batch_size: int | None = None,
+    executor: Executor | None = None,
+) -> int:
+    """Rebuild the daily sheet projection from the `library::patron` category"""
+    return DailySheetRebuild(rebuild_id, workers, batch_size).run(executor)
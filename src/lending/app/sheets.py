@@ -0,0 +1,157 @@
+from collections.abc import Iterator
+from datetime import date, timedelta
+
+from protean.fields import Date, DateTime, Identifier, String
+from sqlalchemy import Index
+
+from lending import CheckoutStatus, HoldStatus
+from lending.domain import lending
+from lending.utils.repository import BulkRepository
+
+
+def _criteria(**criteria) -> dict:
+    """Drop the optional filters that were not supplied"""
+    return {key: value for key, value in criteria.items() if value is not None}
+
+
+@lending.view
+class HoldSheet:
+    """Read model of the holds placed by patrons"""
+
+    id = Identifier(identifier=True)  # The hold id
+    patron_id = Identifier(required=True)
+    patron_type = String(required=True)
+    book_id = Identifier()
+    branch_id = Identifier()
+    hold_type = String()
+    status = String()
+    requested_at = DateTime()
+    expires_on = Date()
+
+
+@lending.model(part_of=HoldSheet, schema_name="hold_sheet")
+class HoldSheetModel:
+    __table_args__ = (Index("ix_hold_sheet_due", "status", "expires_on"),)
+
+
+@lending.repository(part_of=HoldSheet)
+class HoldSheetRepository(BulkRepository):
+    def expiring(
+        self,
+        on: date | None = None,
+        branch_id: Identifier | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[HoldSheet]:
+        return self._iterate(self._expiring(on, branch_id), batch_size)
+
+    def count_expiring(
+        self, on: date | None = None, branch_id: Identifier | None = None
+    ) -> int:
+        return self._count(self._expiring(on, branch_id))
+
+    def expired(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[HoldSheet]:
+        return self._iterate(self._expired(branch_id, since, until), batch_size)
+
+    def count_expired(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> int:
+        return self._count(self._expired(branch_id, since, until))
+
+    def _expiring(self, on: date | None, branch_id: Identifier | None) -> dict:
+        return _criteria(
+            status=HoldStatus.ACTIVE.value,
+            expires_on__lte=on or date.today() - timedelta(days=1),
+            branch_id=branch_id,
+        )
+
+    def _expired(
+        self, branch_id: Identifier | None, since: date | None, until: date | None
+    ) -> dict:
+        return _criteria(
+            status=HoldStatus.EXPIRED.value,
+            branch_id=branch_id,
+            expires_on__gte=since,
+            expires_on__lte=until,
+        )
+
+
+@lending.view
+class CheckoutSheet:
+    """Read model of the books checked out by patrons"""
+
+    id = Identifier(identifier=True)  # The checkout id
+    patron_id = Identifier(required=True)
+    patron_type = String(required=True)
+    book_id = Identifier()
+    branch_id = Identifier()
+    checked_out_at = DateTime()
+    status = String()
+    due_on = Date()
+    returned_at = DateTime()
+    overdue_at = DateTime()
+
+
+@lending.model(part_of=CheckoutSheet, schema_name="checkout_sheet")
+class CheckoutSheetModel:
+    __table_args__ = (Index("ix_checkout_sheet_due", "status", "due_on"),)
+
+
+@lending.repository(part_of=CheckoutSheet)
+class CheckoutSheetRepository(BulkRepository):
+    def to_be_marked_overdue(
+        self,
+        on: date | None = None,
+        branch_id: Identifier | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[CheckoutSheet]:
+        return self._iterate(self._to_be_marked_overdue(on, branch_id), batch_size)
+
+    def count_to_be_marked_overdue(
+        self, on: date | None = None, branch_id: Identifier | None = None
+    ) -> int:
+        return self._count(self._to_be_marked_overdue(on, branch_id))
+
+    def overdue(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[CheckoutSheet]:
+        return self._iterate(self._overdue(branch_id, since, until), batch_size)
+
+    def count_overdue(
+        self,
+        branch_id: Identifier | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> int:
+        return self._count(self._overdue(branch_id, since, until))
+
+    def _to_be_marked_overdue(
+        self, on: date | None, branch_id: Identifier | None
+    ) -> dict:
+        return _criteria(
+            status=CheckoutStatus.ACTIVE.value,
+            due_on__lte=on or date.today() - timedelta(days=1),
+            branch_id=branch_id,
+        )
+
+    def _overdue(
+        self, branch_id: Identifier | None, since: date | None, until: date | None
+    ) -> dict:
+        return _criteria(
+            status=CheckoutStatus.OVERDUE.value,
+            branch_id=branch_id,
+            due_on__gte=since,
+            due_on__lte=until,
+        )
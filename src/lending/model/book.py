@@ -1,10 +1,15 @@
+from contextlib import nullcontext
 from enum import Enum
 
-from protean import UnitOfWork, current_domain, handle
-from protean.fields import String
+from protean import UnitOfWork, current_domain, current_uow, handle
+from protean.core.repository import BaseRepository
+from protean.fields import Identifier, String
 
 from lending.domain import lending
 from lending.model.patron import HoldPlaced
+from lending.utils.cache import aggregate_cache
+from lending.utils.identity_map import loaded
+from lending.utils.internals import add_to_identity_map
 
 
 class BookStatus(Enum):
@@ -35,7 +40,35 @@ class Book:
 
 
 @lending.repository(part_of=Book)
-class BookRepository:
+class BookRepository(BaseRepository):
+    def get(self, identifier: Identifier) -> Book:
+        # A book already loaded in the Unit of Work
+        if book := loaded(Book, identifier):
+            return book
+
+        cache = aggregate_cache()
+        if cache and (entry := cache.get(Book, identifier)):
+            book = Book(**entry["state"])
+            book.state_.mark_retrieved()
+            if current_uow:
+                add_to_identity_map(book)
+            return book
+
+        book = super().get(identifier)
+        if cache:
+            cache.put(Book, identifier, book._version, book.to_dict())
+
+        return book
+
+    def add(self, book: Book) -> Book:
+        with nullcontext() if current_uow and current_uow.in_progress else UnitOfWork():
+            super().add(book)
+
+            if cache := aggregate_cache():
+                cache.invalidate(Book, book.id, book._version)
+
+        return book
+
     def find_by_isbn(self, isbn):
         return current_domain.repository_for(Book)._dao.find_by(isbn=isbn)
 
@@ -1,5 +1,5 @@
 from protean import invariant
-from protean.exceptions import ObjectNotFoundError, ValidationError
+from protean.exceptions import ValidationError
 from protean.fields import Identifier
 
 from lending.domain import lending
@@ -35,13 +35,8 @@ class checkout:
         )
         self.patron.add_checkouts(checkout)
 
-        # Find and update hold corresponding to book if it exists
-        hold = None
-        try:
-            hold = self.patron.get_one_from_holds(book_id=self.book.id)
-        except ObjectNotFoundError:
-            hold = None
-
+        # Find and update the active hold on the book if it exists
+        hold = self.patron.active_hold_on(self.book.id)
         if hold:
             hold.checkout()
 
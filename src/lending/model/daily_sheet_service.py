@@ -1,30 +1,68 @@
 from datetime import date
 
+from protean import atomic_change
+from protean.fields import Identifier
+
 from lending.domain import lending
 from lending.model.book import Book
-from lending.model.patron import HoldStatus, Patron
+from lending.model.patron import CheckoutStatus, HoldStatus, Patron
 
 
 @lending.domain_service(part_of=[Patron, Book])
 class DailySheetService:
-    def __init__(self, patrons: list[Patron]):
+    """Expire holds and mark checkouts overdue for a set of patrons.
+
+    By default, every hold and checkout of every patron is inspected. When
+    `hold_ids` and/or `checkout_ids` are supplied (typically sourced from the
+    `DailySheet` view), only those items are considered, so the cost of a run
+    is bound by the number of items falling due instead of patron history.
+    """
+
+    def __init__(
+        self,
+        patrons: list[Patron],
+        hold_ids: set[Identifier] | None = None,
+        checkout_ids: set[Identifier] | None = None,
+    ):
         self.patrons = patrons
+        self.hold_ids = hold_ids
+        self.checkout_ids = checkout_ids
+
+        self.holds_expired = 0
+        self.checkouts_overdue = 0
 
     def run(self):
-        self._expire_holds()
-        self._overdue_checkouts()
+        today = date.today()
 
-    def _expire_holds(self):
+        self._expire_holds(today)
+        self._overdue_checkouts(today)
+
+    def _expire_holds(self, today: date):
         for patron in self.patrons:
-            for hold in patron.holds:
-                if (
-                    hold.status == HoldStatus.ACTIVE.value
-                    and hold.expires_on < date.today()
-                ):
-                    patron.expire_hold(hold.id)
-
-    def _overdue_checkouts(self):
+            # Check the patron's invariants once, instead of on every change
+            with atomic_change(patron):
+                for hold in self._select(patron.holds, self.hold_ids):
+                    if (
+                        hold.status == HoldStatus.ACTIVE.value
+                        and hold.expires_on is not None
+                        and hold.expires_on < today
+                    ):
+                        patron.expire_hold(hold.id)
+                        self.holds_expired += 1
+
+    def _overdue_checkouts(self, today: date):
         for patron in self.patrons:
-            for checkout in patron.checkouts:
-                if checkout.due_on < date.today():
-                    checkout.overdue()
+            with atomic_change(patron):
+                for checkout in self._select(patron.checkouts, self.checkout_ids):
+                    if (
+                        checkout.status == CheckoutStatus.ACTIVE.value
+                        and checkout.due_on < today
+                    ):
+                        checkout.overdue()
+                        self.checkouts_overdue += 1
+
+    def _select(self, items, ids):
+        if ids is None:
+            return items
+
+        return [item for item in items if item.id in ids]
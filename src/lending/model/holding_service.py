@@ -59,7 +59,7 @@ class place_hold:
     def regular_patron_is_limited_to_five_holds(self):
         if (
             self.patron.patron_type == PatronType.REGULAR.value
-            and len(self.patron.holds) >= 5
+            and self.patron.active_holds >= 5
         ):
             raise ValidationError(
                 {"regular_patron_holds": ["Regular patron is limited to 5 holds"]}
@@ -67,12 +67,7 @@ class place_hold:
 
     @invariant.pre
     def patron_cannot_not_have_more_than_two_overdue_checkouts_in_branch(self):
-        overdue_checkouts_in_branch = [
-            checkout
-            for checkout in self.patron.checkouts
-            if checkout.due_on < date.today() and checkout.branch_id == self.branch_id
-        ]
-        if len(overdue_checkouts_in_branch) > 2:
+        if self.patron.overdue_checkouts_in_branch(self.branch_id) > 2:
             raise ValidationError(
                 {
                     "overdue_checkouts_in_branch": [
@@ -83,7 +78,7 @@ class place_hold:
 
     @invariant.post
     def open_holds_do_not_have_expiry_date(self):
-        if self.hold_type == HoldType.OPEN_ENDED:
+        if self.hold_type == HoldType.OPEN_ENDED.value:
             if self.patron.holds[-1].expires_on:
                 raise ValidationError(
                     {"expires_on": ["Open-ended holds do not have an expiry date"]}
@@ -91,8 +86,10 @@ class place_hold:
 
     def __call__(self):
         expires_on = None
-        if self.hold_type == HoldType.CLOSED_ENDED:
-            expires_on = date.today() + timedelta(days=lending.HOLD_EXPIRY_DAYS)
+        if self.hold_type == HoldType.CLOSED_ENDED.value:
+            expires_on = date.today() + timedelta(
+                days=lending.config["custom"]["HOLD_EXPIRY_DAYS"]
+            )
 
         hold = Hold(
             book_id=self.book.id,
@@ -1,16 +1,22 @@
 from .checkout import (
     BookCheckedOut,
+    BookCheckoutRejected,
     BookOverdue,
     BookReturned,
+    BookReturnRejected,
     Checkout,
     CheckoutStatus,
 )
+from .fact_events import PatronDeltaFactEvent
 from .hold import Hold, HoldCancelled, HoldExpired, HoldPlaced, HoldStatus, HoldType
 from .patron import Patron, PatronType
+from .repository import PatronRepository
 
 __all__ = [
     Patron,
     PatronType,
+    PatronDeltaFactEvent,
+    PatronRepository,
     Hold,
     HoldStatus,
     HoldType,
@@ -22,4 +28,6 @@ __all__ = [
     BookCheckedOut,
     BookReturned,
     BookOverdue,
+    BookCheckoutRejected,
+    BookReturnRejected,
 ]
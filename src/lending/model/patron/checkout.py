@@ -1,10 +1,12 @@
 from datetime import date, datetime, timedelta
 from enum import Enum
 
-from protean.fields import Date, DateTime, Identifier, String
+from protean.fields import Date, DateTime, Dict, Identifier, String
 
 from lending.domain import lending
 from lending.utils import utc_now
+from lending.utils.changes import track_changes
+from lending.utils.rehydration import rehydrate_trusted
 
 
 class CheckoutStatus(Enum):
@@ -41,6 +43,31 @@ class BookOverdue(CheckoutEvent):
     """Event raised when a book is marked overdue"""
 
 
+@lending.event(part_of="Patron")
+class BookCheckoutRejected:
+    """Event raised when a book among several checked out at once cannot be
+    checked out, with the reasons why"""
+
+    patron_id = Identifier(required=True)
+    patron_type = String(required=True)
+    book_id = Identifier(required=True)
+    branch_id = Identifier(required=True)
+    reasons = Dict(required=True)
+
+
+@lending.event(part_of="Patron")
+class BookReturnRejected:
+    """Event raised when a book among several returned at once cannot be
+    returned, with the reasons why"""
+
+    patron_id = Identifier(required=True)
+    patron_type = String(required=True)
+    book_id = Identifier(required=True)
+    reasons = Dict(required=True)
+
+
+@track_changes
+@rehydrate_trusted
 @lending.entity(part_of="Patron")
 class Checkout:
     """The action of a patron borrowing a book from the library
@@ -58,6 +85,9 @@ class Checkout:
     returned_at = DateTime()
 
     def return_(self):
+        if self.status != CheckoutStatus.RETURNED.value:
+            self._owner._checkout_ended(self)
+
         self.status = CheckoutStatus.RETURNED.value
         self.returned_at = datetime.now()
 
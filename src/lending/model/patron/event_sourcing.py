@@ -0,0 +1,149 @@
+"""Folding of a patron's own events into its state, for patrons stored as events
+(see `PATRON_STORAGE`)
+
+State is kept as plain dicts, the patron's attributes along with its `holds`
+and `checkouts` by id, so that folding a long history builds no entities.
+Snapshots of it are written to the `library::patron:snapshot-<id>` stream,
+as Protean does for event-sourced aggregates.
+"""
+
+from copy import deepcopy
+from functools import cache
+
+from lending.domain import lending
+from lending.utils.internals import last_message, read_messages, write_message
+
+from .checkout import BookCheckedOut, BookOverdue, BookReturned, CheckoutStatus
+from .hold import HoldCancelled, HoldExpired, HoldPlaced, HoldStatus
+
+SNAPSHOT_TYPE = "SNAPSHOT"
+
+
+def stream_name(patron_id) -> str:
+    return f"library::patron-{patron_id}"
+
+
+def snapshot_stream_name(patron_id) -> str:
+    return f"library::patron:snapshot-{patron_id}"
+
+
+def initial_state(patron_id, patron_type: str) -> dict:
+    return {"id": patron_id, "patron_type": patron_type, "holds": {}, "checkouts": {}}
+
+
+def _hold_placed(state: dict, data: dict) -> None:
+    state["holds"][data["hold_id"]] = {
+        "id": data["hold_id"],
+        "book_id": data["book_id"],
+        "branch_id": data["branch_id"],
+        "hold_type": data["hold_type"],
+        "status": HoldStatus.ACTIVE.value,
+        "requested_at": data["requested_at"],
+        "expires_on": data["expires_on"],
+    }
+
+
+def _hold_ended(status: str):
+    def apply(state: dict, data: dict) -> None:
+        state["holds"][data["hold_id"]]["status"] = status
+
+    return apply
+
+
+def _book_checked_out(state: dict, data: dict) -> None:
+    state["checkouts"][data["checkout_id"]] = {
+        "id": data["checkout_id"],
+        "book_id": data["book_id"],
+        "branch_id": data["branch_id"],
+        "checked_out_at": data["checked_out_at"],
+        "status": CheckoutStatus.ACTIVE.value,
+        "due_on": data["due_on"],
+        "returned_at": None,
+    }
+
+    # The active hold on the book, if any, was checked out along with it
+    for hold in state["holds"].values():
+        if (
+            hold["book_id"] == data["book_id"]
+            and hold["status"] == HoldStatus.ACTIVE.value
+        ):
+            hold["status"] = HoldStatus.CHECKED_OUT.value
+            break
+
+
+def _book_returned(state: dict, data: dict) -> None:
+    checkout = state["checkouts"][data["checkout_id"]]
+    checkout["status"] = CheckoutStatus.RETURNED.value
+    checkout["returned_at"] = data["returned_at"]
+
+
+def _book_overdue(state: dict, data: dict) -> None:
+    state["checkouts"][data["checkout_id"]]["status"] = CheckoutStatus.OVERDUE.value
+
+
+_APPLIERS = {
+    HoldPlaced: _hold_placed,
+    HoldCancelled: _hold_ended(HoldStatus.CANCELLED.value),
+    HoldExpired: _hold_ended(HoldStatus.EXPIRED.value),
+    BookCheckedOut: _book_checked_out,
+    BookReturned: _book_returned,
+    BookOverdue: _book_overdue,
+}
+
+
+@cache
+def _appliers_by_type() -> dict:
+    # Event types are only known once the domain is initialized
+    return {event_cls.__type__: applier for event_cls, applier in _APPLIERS.items()}
+
+
+def apply_event(state: dict, message: dict) -> dict:
+    """Apply one raw message of the patron's stream to `state`, in place.
+    Messages of other types are skipped.
+    """
+    if applier := _appliers_by_type().get(message["type"]):
+        data = message["data"]
+        applier(state, data)
+
+        # Every event carries the patron type in effect when it was raised
+        state["patron_type"] = data["patron_type"]
+
+    return state
+
+
+def read_state(patron_id, batch_size: int | None = None) -> tuple[dict, int] | None:
+    """The state of the patron and the position of the last event folded into
+    it, or `None` for an unknown patron.
+
+    Folding starts from the latest snapshot. When it had to fold
+    `snapshot_threshold` events or more, a new snapshot is written, so that the
+    next read folds only the events after it.
+    """
+    batch_size = batch_size or lending.config["custom"]["REBUILD_BATCH_SIZE"]
+    snapshot = last_message(snapshot_stream_name(patron_id))
+    if snapshot is None:
+        return None
+
+    state = deepcopy(snapshot["data"]["patron"])
+    snapshot_position = position = snapshot["data"]["position"]
+    while messages := read_messages(stream_name(patron_id), position + 1, batch_size):
+        for message in messages:
+            apply_event(state, message)
+        position = messages[-1]["position"]
+
+        if len(messages) < batch_size:
+            break
+
+    if position - snapshot_position >= lending.config["snapshot_threshold"]:
+        write_snapshot(state, position)
+
+    return state, position
+
+
+def write_snapshot(state: dict, position: int) -> None:
+    """Record `state` as the patron's state after the event at `position`"""
+    write_message(
+        snapshot_stream_name(state["id"]),
+        SNAPSHOT_TYPE,
+        {"position": position, "patron": state},
+    )
@@ -0,0 +1,100 @@
+from contextlib import nullcontext
+
+from protean import UnitOfWork, current_uow
+from protean.exceptions import ObjectNotFoundError
+from protean.fields import Identifier
+from protean.utils.reflection import attributes, fields
+
+from lending.utils.changes import changed_attributes, clear_changes
+from lending.utils.internals import add_to_identity_map, pending_children
+
+from .event_sourcing import initial_state, read_state, write_snapshot
+from .fact_events import as_dict
+from .patron import COUNTERS, Patron
+
+
+def state_of(patron: Patron) -> dict:
+    """The patron as the state folded from its events"""
+    state = initial_state(patron.id, patron.patron_type)
+    for field_name in ("holds", "checkouts"):
+        state[field_name] = {
+            item.id: as_dict(
+                item, [name for name in attributes(item) if name != "patron_id"]
+            )
+            for item in getattr(patron, field_name)
+        }
+
+    return state
+
+
+class EventStorage:
+    """Loading and saving of patrons stored as their own events, for
+    `PatronRepository` (see `PATRON_STORAGE`).
+
+    Patrons are folded from their events, starting from the latest snapshot,
+    and saved by storing the events raised. Collections are then always
+    loaded in full.
+    """
+
+    def _get_from_events(self, identifier: Identifier) -> Patron:
+        found = read_state(identifier)
+        if found is None:
+            raise ObjectNotFoundError(
+                f"`Patron` object with identifier {identifier} does not exist."
+            )
+
+        state, position = found
+        return self._from_state(state, position, position)
+
+    def _from_state(self, state: dict, version: int, event_position: int) -> Patron:
+        """Build a stored patron, with all its children, from its `state`"""
+        patron = Patron(id=state["id"], patron_type=state["patron_type"])
+        for field_name in ("holds", "checkouts"):
+            field = fields(patron)[field_name]
+            field.preload(
+                patron, [field.to_cls(**item) for item in state[field_name].values()]
+            )
+        patron.recount()
+
+        patron._version = version
+        patron._next_version = version + 1
+        # Events raised are appended after this one, or the commit fails
+        patron._event_position = event_position
+        for entity in (patron, *patron.holds, *patron.checkouts):
+            entity.state_.mark_retrieved()
+            clear_changes(entity)
+
+        if current_uow:
+            add_to_identity_map(patron)
+
+        return patron
+
+    def _add_as_events(self, patron: Patron) -> Patron:
+        """Store a patron as its events, which are appended to its stream when
+        the Unit of Work commits.
+
+        Changes that come with no event, like a new patron type, are written
+        as a snapshot, unless events are pending, which carry the patron type
+        themselves. A new patron starts with a snapshot of its own.
+        """
+        with nullcontext() if current_uow and current_uow.in_progress else UnitOfWork():
+            if not patron.state_.is_persisted:
+                write_snapshot(initial_state(patron.id, patron.patron_type), -1)
+            elif not patron._events and set(changed_attributes(patron)) - set(COUNTERS):
+                write_snapshot(state_of(patron), patron._event_position)
+
+            # The collections now stand as saved
+            for field_name in ("holds", "checkouts"):
+                items = list(getattr(patron, field_name))
+                pending_children(patron, field_name).update(
+                    added={}, updated={}, removed={}
+                )
+                fields(patron)[field_name].preload(patron, items)
+
+            for entity in (patron, *patron.holds, *patron.checkouts):
+                entity.state_.mark_saved()
+                clear_changes(entity)
+
+            add_to_identity_map(patron)
+
+        return patron
@@ -0,0 +1,75 @@
+from protean.fields import Dict, Identifier, Integer
+from protean.utils.reflection import attributes, fields
+
+from lending.domain import lending
+from lending.utils.changes import changed_attributes
+from lending.utils.internals import pending_children
+
+from .patron import Patron
+
+
+@lending.event(part_of=Patron)
+class PatronDeltaFactEvent:
+    """What one save changed on a patron, raised in place of the full fact event
+    when `PATRON_FACT_EVENTS` is `"delta"`. `changes` holds the attributes set
+    on the patron, and `holds` and `checkouts` the children `added` in full,
+    the attributes `changed` by child id, and the ids `removed`.
+    """
+
+    id = Identifier(required=True)  # The patron id
+    version = Integer(required=True)
+    changes = Dict()
+    holds = Dict()
+    checkouts = Dict()
+
+
+def as_dict(entity, names) -> dict:
+    return {
+        name: attributes(entity)[name].as_dict(getattr(entity, name))
+        for name in names
+        if name != "_version"
+    }
+
+
+def delta_of(patron: Patron) -> dict:
+    """The changes made on `patron` since it was loaded, as carried by
+    `PatronDeltaFactEvent`
+    """
+    delta = {"changes": as_dict(patron, changed_attributes(patron))}
+    for field_name in ("holds", "checkouts"):
+        pending = pending_children(patron, field_name)
+        delta[field_name] = {
+            "added": [item.to_dict() for item in pending["added"].values()],
+            "changed": {
+                item.id: as_dict(item, changed_attributes(item))
+                for item in getattr(patron, field_name)
+                if item.id not in pending["added"] and changed_attributes(item)
+            },
+            "removed": list(pending["removed"]),
+        }
+
+    return delta
+
+
+def fact_event_for(patron: Patron, delta: dict | None):
+    """The full fact event, or with `delta`, a delta fact event except every
+    `PATRON_SNAPSHOT_EVERY` versions, so that consumers need not fold a
+    patron's whole history. Full fact events read the children that were
+    not loaded.
+    """
+    if (
+        delta is None
+        or patron._version % lending.config["custom"]["PATRON_SNAPSHOT_EVERY"] == 0
+    ):
+        payload = patron.to_dict()
+        payload.pop("state_", None)
+
+        # Include the children left out of a scoped load
+        for field_name in ("holds", "checkouts"):
+            payload[field_name] = [
+                item.to_dict() for item in fields(patron)[field_name].complete(patron)
+            ]
+
+        return patron._fact_event_cls(**payload)
+
+    return PatronDeltaFactEvent(id=patron.id, version=patron._version, **delta)
@@ -1,10 +1,12 @@
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 
 from protean.exceptions import ValidationError
 from protean.fields import Date, DateTime, Identifier, String
 
 from lending.domain import lending
+from lending.utils.changes import track_changes
+from lending.utils.rehydration import rehydrate_trusted
 
 
 class HoldType(Enum):
@@ -46,6 +48,8 @@ class HoldCancelled(HoldEvent):
     """Event raised when a hold placed by a patron is cancelled"""
 
 
+@track_changes
+@rehydrate_trusted
 @lending.entity(part_of="Patron")
 class Hold:
     """A reservation placed by a patron on a book.
@@ -57,12 +61,20 @@ class Hold:
     status = String(max_length=11, default=HoldStatus.ACTIVE.value)
     requested_at = DateTime(required=True)
     expires_on = Date()
+    ended_at = DateTime()  # When the hold left the `ACTIVE` status
+
+    def _end(self, status: str) -> None:
+        if self.status == HoldStatus.ACTIVE.value:
+            self._owner._hold_ended(self)
+
+        self.status = status
+        self.ended_at = datetime.now()
 
     def checkout(self):
-        self.status = HoldStatus.CHECKED_OUT.value
+        self._end(HoldStatus.CHECKED_OUT.value)
 
     def expire(self):
-        self.status = HoldStatus.EXPIRED.value
+        self._end(HoldStatus.EXPIRED.value)
 
         self.raise_(
             HoldExpired(
@@ -86,7 +98,7 @@ class Hold:
         if self.status == HoldStatus.CHECKED_OUT.value:
             raise ValidationError({"checked_out": ["Cannot cancel a checked out hold"]})
 
-        self.status = HoldStatus.CANCELLED.value
+        self._end(HoldStatus.CANCELLED.value)
 
         self.raise_(
             HoldCancelled(
@@ -1,9 +1,29 @@
+from bisect import bisect_left, insort
+from datetime import date
 from enum import Enum
 
-from protean.exceptions import ObjectNotFoundError, ValidationError
-from protean.fields import HasMany, Identifier, String
+from protean.exceptions import ValidationError
+from protean.fields import Dict, Identifier, Integer, String
+from protean.utils.reflection import fields
 
 from lending.domain import lending
+from lending.utils.associations import ScopedHasMany
+from lending.utils.changes import track_changes
+from lending.utils.rehydration import rehydrate_trusted
+
+from .checkout import CheckoutStatus
+from .hold import HoldStatus
+
+# Statuses from which holds and checkouts do not move on
+ENDED_HOLD_STATUSES = (
+    HoldStatus.EXPIRED.value,
+    HoldStatus.CANCELLED.value,
+    HoldStatus.CHECKED_OUT.value,
+)
+ENDED_CHECKOUT_STATUSES = (CheckoutStatus.RETURNED.value,)
+
+# Attributes kept up to date from the holds and checkouts
+COUNTERS = ("active_holds", "due_dates_by_branch")
 
 
 class PatronType(Enum):
@@ -11,6 +31,8 @@ class PatronType(Enum):
     RESEARCHER = "RESEARCHER"
 
 
+@track_changes
+@rehydrate_trusted
 @lending.aggregate(fact_events=True)
 class Patron:
     """A user of the public library who can place holds on books, check out books,
@@ -18,29 +40,152 @@ class Patron:
     Patrons can be either regular patrons or researcher patrons."""
 
     patron_type = String(max_length=10, choices=PatronType, default="REGULAR")
-    holds = HasMany("Hold")
-    checkouts = HasMany("Checkout")
+    holds = ScopedHasMany("Hold", on_add="_hold_added", on_remove="_hold_removed")
+    checkouts = ScopedHasMany(
+        "Checkout", on_add="_checkout_added", on_remove="_checkout_removed"
+    )
 
-    def expire_hold(self, hold_id: Identifier):
-        try:
-            hold = self.get_one_from_holds(id=hold_id)
-        except ObjectNotFoundError:
-            raise ValidationError({"hold": ["Hold does not exist"]})
+    # Counters maintained as holds and checkouts change state, so that rules
+    #   on them do not depend on loading the patron's history
+    active_holds = Integer(default=0)
+    # ISO due dates of unreturned checkouts, sorted, by branch id
+    due_dates_by_branch = Dict(default=dict)
 
-        hold.expire()
+    def overdue_checkouts_in_branch(
+        self, branch_id: Identifier, on: date | None = None
+    ) -> int:
+        """Number of unreturned checkouts at the branch that fell due before `on`"""
+        due_dates = self.due_dates_by_branch.get(branch_id, [])
+        return bisect_left(due_dates, (on or date.today()).isoformat())
 
-    def cancel_hold(self, hold_id: Identifier):
-        try:
-            hold = self.get_one_from_holds(id=hold_id)
-        except ObjectNotFoundError:
+    def recount(self) -> bool:
+        """Rebuild the counters from the holds and checkouts, which must all be
+        loaded, and return whether they were out of date.
+        """
+        active_holds = sum(
+            1 for hold in self.holds if hold.status == HoldStatus.ACTIVE.value
+        )
+        due_dates_by_branch = {}
+        for checkout in self.checkouts:
+            if checkout.status not in ENDED_CHECKOUT_STATUSES:
+                due_dates_by_branch.setdefault(checkout.branch_id, []).append(
+                    checkout.due_on.isoformat()
+                )
+        for due_dates in due_dates_by_branch.values():
+            due_dates.sort()
+
+        if (
+            self.active_holds == active_holds
+            and self.due_dates_by_branch == due_dates_by_branch
+        ):
+            return False
+
+        self.active_holds = active_holds
+        self.due_dates_by_branch = due_dates_by_branch
+        return True
+
+    def _hold_added(self, hold) -> None:
+        if hold.status == HoldStatus.ACTIVE.value:
+            self.active_holds += 1
+
+    def _hold_removed(self, hold) -> None:
+        if hold.status == HoldStatus.ACTIVE.value:
+            self.active_holds -= 1
+
+    def _hold_ended(self, hold) -> None:
+        """Called by a hold as it leaves the `ACTIVE` status"""
+        self.active_holds -= 1
+
+    def _checkout_added(self, checkout) -> None:
+        if checkout.status not in ENDED_CHECKOUT_STATUSES:
+            due_dates = list(self.due_dates_by_branch.get(checkout.branch_id, []))
+            insort(due_dates, checkout.due_on.isoformat())
+            self.due_dates_by_branch = {
+                **self.due_dates_by_branch,
+                checkout.branch_id: due_dates,
+            }
+
+    def _checkout_removed(self, checkout) -> None:
+        if checkout.status not in ENDED_CHECKOUT_STATUSES:
+            self._checkout_ended(checkout)
+
+    def _checkout_ended(self, checkout) -> None:
+        """Called by a checkout as it is returned"""
+        due_dates = list(self.due_dates_by_branch.get(checkout.branch_id, []))
+        due_on = checkout.due_on.isoformat()
+        if due_on in due_dates:
+            due_dates.remove(due_on)
+
+        # Dict values are replaced, not mutated, so the change is tracked
+        due_dates_by_branch = {
+            **self.due_dates_by_branch,
+            checkout.branch_id: due_dates,
+        }
+        if not due_dates:
+            del due_dates_by_branch[checkout.branch_id]
+        self.due_dates_by_branch = due_dates_by_branch
+
+    def hold(self, hold_id: Identifier):
+        """The hold with `hold_id`, looked up through an index of the holds"""
+        holds = fields(self)["holds"].lookup(self, "id", hold_id)
+        if not holds:
             raise ValidationError({"hold": ["Hold does not exist"]})
 
-        hold.cancel()
+        return holds[0]
+
+    def active_hold_on(self, book_id: Identifier):
+        """The active hold on `book_id`, if any"""
+        return next(
+            (
+                hold
+                for hold in fields(self)["holds"].lookup(self, "book_id", book_id)
+                if hold.status == HoldStatus.ACTIVE.value
+            ),
+            None,
+        )
+
+    def unreturned_checkout_of(self, book_id: Identifier):
+        """The checkout of `book_id` that is yet to be returned, if any. Returned
+        checkouts of the same book are skipped.
+        """
+        return next(
+            (
+                checkout
+                for checkout in fields(self)["checkouts"].lookup(
+                    self, "book_id", book_id
+                )
+                if checkout.status not in ENDED_CHECKOUT_STATUSES
+            ),
+            None,
+        )
+
+    def expire_hold(self, hold_id: Identifier):
+        self.hold(hold_id).expire()
+
+    def cancel_hold(self, hold_id: Identifier):
+        self.hold(hold_id).cancel()
 
     def return_book(self, book_id: Identifier):
-        try:
-            checkout = self.get_one_from_checkouts(book_id=book_id)
-        except ObjectNotFoundError:
+        checkout = self.unreturned_checkout_of(book_id)
+        if checkout is None:
             raise ValidationError({"checkout": ["Checkout does not exist"]})
 
         checkout.return_()
+
+    def archive_ended_items(self) -> tuple[list, list]:
+        """Remove the ended holds and checkouts among those loaded, and return
+        them to be written to the patron's history.
+        """
+        holds = [hold for hold in self.holds if hold.status in ENDED_HOLD_STATUSES]
+        checkouts = [
+            checkout
+            for checkout in self.checkouts
+            if checkout.status in ENDED_CHECKOUT_STATUSES
+        ]
+
+        if holds:
+            self.remove_holds(holds)
+        if checkouts:
+            self.remove_checkouts(checkouts)
+
+        return holds, checkouts
@@ -0,0 +1,75 @@
+from protean.exceptions import ExpectedVersionError
+from protean.utils.reflection import fields
+
+from lending.domain import lending
+from lending.utils.changes import clear_changes, update_changes
+from lending.utils.internals import add_to_identity_map, pending_children
+
+from .fact_events import delta_of, fact_event_for
+from .patron import Patron
+
+
+class RelationalStorage:
+    """Saving of patrons stored in tables, for `PatronRepository`.
+
+    Only what changed is written. On SQL providers, changed children, like the
+    patron itself, are updated in just the columns that were set. The fact
+    event raised is full or a delta, as set by `PATRON_FACT_EVENTS`.
+    """
+
+    def _save(self, patron: Patron) -> None:
+        if not patron.state_.is_persisted:
+            super().add(patron)
+            return
+
+        dialect = self._provider.conn_info["provider"]
+        entities = (patron, *patron.holds, *patron.checkouts)
+        delta = (
+            delta_of(patron)
+            if patron.state_.is_changed
+            and lending.config["custom"]["PATRON_FACT_EVENTS"] == "delta"
+            else None
+        )
+
+        if dialect in ("postgresql", "sqlite"):
+            self._update_children(patron)
+
+        if patron.state_.is_changed:
+            if dialect in ("postgresql", "sqlite"):
+                self._update(patron)
+            else:
+                self._dao.save(patron)
+
+            patron.raise_(fact_event_for(patron, delta))
+
+        # Insert added children and delete removed ones
+        super().add(patron)
+
+        for entity in entities:
+            clear_changes(entity)
+
+    def _update_children(self, patron: Patron) -> None:
+        for field_name in ("holds", "checkouts"):
+            field = fields(patron)[field_name]
+            dao = lending.repository_for(field.to_cls)._dao
+            pending = pending_children(patron, field_name)
+            for item in getattr(patron, field_name):
+                if (
+                    item.state_.is_persisted
+                    and item.state_.is_changed
+                    and item.id not in pending["updated"]
+                    and item.id not in pending["added"]
+                ):
+                    update_changes(dao, item)
+
+    def _update(self, patron: Patron) -> None:
+        expected_version = patron._version
+        patron._version = patron._next_version
+        if not update_changes(self._dao, patron, _version=expected_version):
+            raise ExpectedVersionError(
+                f"Wrong expected version: {expected_version} "
+                f"(Aggregate: Patron({patron.id}))"
+            )
+
+        # As the DAO does on save, so events are dispatched on commit
+        add_to_identity_map(patron)
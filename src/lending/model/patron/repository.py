@@ -0,0 +1,140 @@
+from contextlib import nullcontext
+
+from protean import UnitOfWork, current_uow
+from protean.core.repository import BaseRepository
+from protean.fields import Identifier
+from protean.utils.reflection import fields
+
+from lending.domain import lending
+from lending.utils.associations import ALL, load_scope, scope_of
+from lending.utils.cache import aggregate_cache
+from lending.utils.identity_map import loaded
+from lending.utils.rehydration import trusted_loads
+
+from .checkout import CheckoutStatus
+from .event_storage import EventStorage, state_of
+from .patron import Patron
+from .relational_storage import RelationalStorage
+
+
+def _ids_scope(ids: set[Identifier] | None):
+    if ids is None:
+        return ALL
+    if not ids:
+        return None
+
+    return {"id__in": sorted(ids)}
+
+
+@lending.repository(part_of=Patron)
+class PatronRepository(EventStorage, RelationalStorage, BaseRepository):
+    """`get` loads a patron with all its holds and checkouts. The `get_with_*`
+    variants load only the children a command touches, so their cost does not
+    grow with the patron's history. A patron already loaded in the active Unit
+    of Work is returned as it is, with any children asked for that it lacks
+    loaded into it, so that its pending changes are kept.
+
+    Patrons are saved as set by `PATRON_STORAGE`: in tables, writing only what
+    changed (see `RelationalStorage`), or as their own events (see
+    `EventStorage`).
+
+    With `AGGREGATE_CACHE` on, patrons loaded in full are read through the
+    aggregate cache, and invalidated there as they are saved.
+    """
+
+    def _stored_as_events(self) -> bool:
+        return lending.config["custom"]["PATRON_STORAGE"] == "events"
+
+    def get(self, identifier: Identifier) -> Patron:
+        if patron := loaded(Patron, identifier):
+            for field_name in ("holds", "checkouts"):
+                fields(patron)[field_name].widen(patron)
+            return patron
+
+        if self._stored_as_events():
+            return self._get_from_events(identifier)
+
+        # Only patrons loaded in full are cached
+        cache = (
+            aggregate_cache()
+            if scope_of("holds") is ALL and scope_of("checkouts") is ALL
+            else None
+        )
+        if cache and (entry := cache.get(Patron, identifier)):
+            return self._from_state(
+                entry["state"]["patron"],
+                entry["version"],
+                entry["state"]["event_position"],
+            )
+
+        with trusted_loads():
+            patron = super().get(identifier)
+
+        if cache:
+            cache.put(
+                Patron,
+                identifier,
+                patron._version,
+                {"patron": state_of(patron), "event_position": patron._event_position},
+            )
+
+        return patron
+
+    def add(self, patron: Patron) -> Patron:
+        if self._stored_as_events():
+            return self._add_as_events(patron)
+
+        with nullcontext() if current_uow and current_uow.in_progress else UnitOfWork():
+            changed = not patron.state_.is_persisted or patron.state_.is_changed
+            self._save(patron)
+
+            if cache := aggregate_cache():
+                # States must reach the version written to be cached again, or
+                #   the next one when only children were written
+                cache.invalidate(
+                    Patron,
+                    patron.id,
+                    patron._version if changed else patron._version + 1,
+                )
+
+        return patron
+
+    def get_with_hold(self, patron_id: Identifier, hold_id: Identifier) -> Patron:
+        with load_scope(holds={"id": hold_id}, checkouts=None):
+            return self.get(patron_id)
+
+    def get_with_checkout_of(
+        self, patron_id: Identifier, book_id: Identifier
+    ) -> Patron:
+        """Load the patron with the checkout of `book_id` that is yet to be returned"""
+        return self.get_with_checkouts_of(patron_id, [book_id])
+
+    def get_with_checkouts_of(
+        self, patron_id: Identifier, book_ids: list[Identifier]
+    ) -> Patron:
+        """Load the patron with the checkouts of `book_ids` that are yet to be
+        returned
+        """
+        with load_scope(
+            holds=None,
+            checkouts={
+                "book_id__in": list(book_ids),
+                "status__in": [
+                    CheckoutStatus.ACTIVE.value,
+                    CheckoutStatus.OVERDUE.value,
+                ],
+            },
+        ):
+            return self.get(patron_id)
+
+    def get_with_items(
+        self,
+        patron_id: Identifier,
+        hold_ids: set[Identifier] | None = None,
+        checkout_ids: set[Identifier] | None = None,
+    ) -> Patron:
+        """Load the patron with only the holds and checkouts in `hold_ids` and
+        `checkout_ids`. A collection whose ids are `None` is loaded in full.
+        """
+        with load_scope(holds=_ids_scope(hold_ids), checkouts=_ids_scope(checkout_ids)):
+            return self.get(patron_id)
@@ -0,0 +1,333 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+
+from protean import Engine
+from protean.server.subscription import Subscription
+from protean.utils.mixins import Message
+
+from lending.app.partitions import PartitionLease, PartitionWorker, partition_of
+from lending.domain import lending
+from lending.utils.internals import last_message
+from lending.utils.streams import STREAM_CATEGORY, read_category
+
+logger = logging.getLogger(__name__)
+
+
+async def _handle_batch(subscription: Subscription, messages: list[Message]) -> bool:
+    """Hand `messages` to the subscription's `handle_batch`, and shut the
+    engine down if it fails. Returns whether the batch was handled.
+    """
+    with subscription.engine.domain.domain_context():
+        try:
+            subscription.handler.handle_batch(messages)
+        # Any error of a handler stops the engine, as in `Engine.handle_message`
+        except Exception as exc:  # noqa: BLE001
+            logger.error(
+                f"Error handling batch ending at {messages[-1].global_position} "
+                f"in {subscription.handler.__name__}"
+            )
+            logger.error(traceback.format_exc())
+            subscription.handler.handle_error(exc, messages[-1])
+
+            await subscription.engine.shutdown(exit_code=1)
+            return False
+
+    return True
+
+
+class BatchSubscription(Subscription):
+    """Subscription that hands each batch of messages to the handler at once.
+
+    The handler's `handle_batch` must persist the whole batch before returning.
+    The read position is advanced and written to the store only after that, so
+    a crash mid-batch replays the batch instead of skipping it.
+    """
+
+    async def process_batch(self, messages: list[Message]) -> int:
+        if self.engine.shutting_down:
+            return 0
+
+        if not await _handle_batch(self, messages):
+            return 0
+
+        self.current_position = messages[-1].global_position
+        self.write_position(self.current_position)
+
+        return len(messages)
+
+
+class PartitionedSubscription(Subscription):
+    """Subscription to `library::patron` that handles only the partitions of
+    the category leased to its worker, so that workers share the category.
+
+    Streams are hash partitioned by patron id, so each patron's events are
+    handled by one worker at a time, in order. Every third of a lease, the
+    worker renews its membership among the subscription's workers, and the
+    partitions are dealt out anew between the members: the worker releases
+    partitions dealt to others and claims those dealt to it, once released or
+    run out. Workers joining or leaving, or stopping to renew, so move
+    partitions between them.
+
+    Each lease holds the position of its partition, advanced only by the
+    worker holding it, after the batch read up to there is handled. Leases
+    start from the position of the subscription without partitions, if any.
+    Every worker reads the whole category, and skips the messages of the
+    partitions it does not hold, so reads from the event store grow with the
+    number of workers. Workers beyond the number of partitions would only add
+    reads, and `main` accepts no more of them than `PATRON_PARTITIONS`.
+    """
+
+    def __init__(
+        self,
+        engine,
+        subscriber_id: str,
+        stream_category: str,
+        handler,
+        worker_id: str,
+        **kwargs,
+    ) -> None:
+        super().__init__(engine, subscriber_id, stream_category, handler, **kwargs)
+
+        custom = engine.domain.config["custom"]
+        self.worker_id = worker_id
+        self.partitions = custom["PATRON_PARTITIONS"]
+        self.lease_seconds = custom["PARTITION_LEASE_SECONDS"]
+
+        self.positions: dict[int, int] = {}  # By partition leased
+        self.rebalanced_at: float | None = None
+
+    async def load_position_on_start(self) -> None:
+        pass  # Positions are kept with the leases
+
+    def rebalance(self, now: float | None = None) -> None:
+        now = now or time.time()
+        until = now + self.lease_seconds
+
+        with self.engine.domain.domain_context():
+            workers = lending.repository_for(PartitionWorker)
+            workers.renew(self.subscriber_id, self.worker_id, until)
+            live = workers.live(self.subscriber_id, now, self.partitions)
+
+            last = last_message(self.subscriber_stream_name)
+            leases = lending.repository_for(PartitionLease)
+            for lease in leases.for_subscriber(
+                self.subscriber_id,
+                self.partitions,
+                last["data"]["position"] if last else -1,
+            ):
+                # Workers beyond the number of partitions stand by
+                dealt = (
+                    self.worker_id in live
+                    and live[lease.partition % len(live)] == self.worker_id
+                )
+                if dealt and leases.claim(lease.id, self.worker_id, until, now):
+                    if lease.partition not in self.positions:
+                        logger.info(
+                            f"{self.worker_id} took partition {lease.partition} "
+                            f"of {self.subscriber_id}"
+                        )
+                        self.positions[lease.partition] = leases.get(lease.id).position
+                    continue
+
+                if lease.owner == self.worker_id:
+                    leases.release(lease.id, self.worker_id)
+                self.positions.pop(lease.partition, None)
+
+        self.rebalanced_at = now
+
+    async def tick(self) -> None:
+        if self.engine.shutting_down:
+            return
+
+        now = time.time()
+        if self.rebalanced_at is None or now - self.rebalanced_at >= (
+            self.lease_seconds / 3
+        ):
+            self.rebalance(now)
+        if not self.positions:
+            return
+
+        messages = read_category(
+            min(self.positions.values()) + 1, self.messages_per_tick
+        )
+        if not messages:
+            return
+
+        held = [
+            message
+            for message in self.filter_on_origin(messages)
+            if message.global_position
+            > self.positions.get(
+                partition_of(message.stream_name, self.partitions), float("inf")
+            )
+        ]
+        if held and not await self.process_batch(held):
+            return
+
+        self.advance(messages[-1].global_position)
+
+    async def process_batch(self, messages: list[Message]) -> int:
+        if hasattr(self.handler, "handle_batch"):
+            return len(messages) if await _handle_batch(self, messages) else 0
+
+        for message in messages:
+            await self.engine.handle_message(self.handler, message)
+            if self.engine.shutting_down:
+                return 0
+
+        return len(messages)
+
+    def advance(self, position: int) -> None:
+        behind = [
+            partition
+            for partition, read_to in self.positions.items()
+            if read_to < position
+        ]
+        with self.engine.domain.domain_context():
+            lending.repository_for(PartitionLease).advance(
+                self.subscriber_id, self.worker_id, behind, position
+            )
+
+        for partition in behind:
+            self.positions[partition] = position
+
+    async def shutdown(self) -> None:
+        """Leave the workers, releasing the partitions held"""
+        self.keep_going = False
+
+        with self.engine.domain.domain_context():
+            leases = lending.repository_for(PartitionLease)
+            for partition in self.positions:
+                leases.release(f"{self.subscriber_id}-{partition}", self.worker_id)
+            lending.repository_for(PartitionWorker).leave(
+                self.subscriber_id, self.worker_id
+            )
+
+        self.positions.clear()
+        logger.debug(f"{self.worker_id} left {self.subscriber_id}")
+
+
+class LendingEngine(Engine):
+    """Protean Engine that runs handlers supporting `handle_batch` in batch mode.
+
+    With `workers`, subscriptions to `library::patron` are shared by partition
+    between the workers named, and the workers of other engines subscribed
+    with the same handlers (see `PartitionedSubscription`).
+    """
+
+    def __init__(
+        self,
+        domain,
+        test_mode: bool = False,
+        debug: bool = False,
+        workers: list[str] | None = None,
+    ) -> None:
+        super().__init__(domain, test_mode=test_mode, debug=debug)
+
+        batch_size = domain.config["custom"]["PROJECTION_BATCH_SIZE"]
+        for name, subscription in list(self._subscriptions.items()):
+            if workers and subscription.stream_category == STREAM_CATEGORY:
+                del self._subscriptions[name]
+                for worker_id in workers:
+                    self._subscriptions[f"{name}@{worker_id}"] = (
+                        PartitionedSubscription(
+                            self,
+                            subscription.subscriber_id,
+                            subscription.stream_category,
+                            subscription.handler,
+                            worker_id,
+                            messages_per_tick=batch_size,
+                            origin_stream=subscription.origin_stream,
+                        )
+                    )
+            elif hasattr(subscription.handler, "handle_batch"):
+                self._subscriptions[name] = BatchSubscription(
+                    self,
+                    subscription.subscriber_id,
+                    subscription.stream_category,
+                    subscription.handler,
+                    messages_per_tick=batch_size,
+                    origin_stream=subscription.origin_stream,
+                )
+
+
+def _worker_id(index: int) -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+
+def _run_worker(worker_id: str) -> None:
+    lending.init()
+
+    engine = LendingEngine(lending, workers=[worker_id])
+    engine.run()
+
+    raise SystemExit(engine.exit_code)
+
+
+def run_workers(count: int) -> int:
+    """Run `count` worker processes, each with its own engine, until they all
+    stop, and return the highest exit code among them
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_run_worker, args=(_worker_id(index),))
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # Workers release their partitions
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for process in processes:
+        process.join()
+
+    return max(process.exitcode or 0 for process in processes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the lending server")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help=(
+            "Workers sharing the partitions of library::patron, each in its own "
+            "process, or all in this one with the memory event store. Other "
+            "servers started with --workers join them. By default, one consumer "
+            "processes the category. At most PATRON_PARTITIONS, as every worker "
+            "reads the whole category."
+        ),
+    )
+    args = parser.parse_args()
+
+    partitions = lending.config["custom"]["PATRON_PARTITIONS"]
+    if args.workers > partitions:
+        parser.error(f"--workers cannot exceed PATRON_PARTITIONS ({partitions})")
+
+    lending.init()
+    if args.workers and lending.config["event_store"]["provider"] != "memory":
+        raise SystemExit(run_workers(args.workers))
+
+    # The memory event store is only seen by this process
+    engine = LendingEngine(
+        lending, workers=[_worker_id(index) for index in range(args.workers)]
+    )
+    engine.run()
+
+    raise SystemExit(engine.exit_code)
+
+
+if __name__ == "__main__":
+    main()
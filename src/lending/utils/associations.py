@@ -0,0 +1,279 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+
+from protean import current_domain
+from protean.core.queryset import QuerySet
+from protean.fields import HasMany
+from protean.utils.reflection import id_field
+
+from .internals import pending_children
+from .rehydration import trusted_loads
+
+# Load every child of a collection
+ALL: Mapping = MappingProxyType({})
+
+_scopes: ContextVar[dict | None] = ContextVar("load_scopes", default=None)
+
+
+@contextmanager
+def load_scope(**scopes: Mapping | None):
+    """Restrict the `ScopedHasMany` collections loaded while the block runs.
+
+    Each keyword names a collection, with a mapping of filters that its children
+    must match, or `None` to leave the collection unloaded. Collections not
+    named are loaded in full.
+    """
+    token = _scopes.set(scopes)
+    try:
+        yield
+    finally:
+        _scopes.reset(token)
+
+
+def scope_of(field_name: str) -> Mapping | None:
+    """The scope in effect for the collection named `field_name`"""
+    scopes = _scopes.get()
+    return ALL if scopes is None else scopes.get(field_name, ALL)
+
+
+def _all(query: QuerySet) -> list:
+    """Every record matching `query`, beyond the page Protean reads by default"""
+    result = query.all()
+    if result.has_next:
+        result = query.limit(result.total).all()
+
+    return result.items
+
+
+class ScopedHasMany(HasMany):
+    """A `HasMany` association that loads only the children in scope.
+
+    Protean resolves associations as soon as an entity is built, so the scope
+    in effect at that time (see `load_scope`) is remembered on the instance and
+    reapplied whenever the collection is refreshed. Only children that are
+    loaded can be changed, and only changed children are persisted, so the
+    children left out are never touched.
+
+    `on_add` and `on_remove` optionally name methods of the owner, called with
+    each child added to or removed from the collection.
+    """
+
+    def __init__(
+        self,
+        to_cls,
+        on_add: str | None = None,
+        on_remove: str | None = None,
+        **kwargs,
+    ):
+        super().__init__(to_cls, **kwargs)
+
+        self.on_add = on_add
+        self.on_remove = on_remove
+
+    def _identities(self, instance) -> set:
+        return {
+            getattr(item, id_field(item).field_name)
+            for item in getattr(instance, self.field_name)
+        }
+
+    def add(self, instance, items) -> None:
+        items = items if isinstance(items, list) else [items]
+        if self.on_add:
+            existing = self._identities(instance)
+            added = {
+                getattr(item, id_field(item).field_name): item
+                for item in items
+                if getattr(item, id_field(item).field_name) not in existing
+            }
+
+        super().add(instance, items)
+
+        if self.on_add:
+            for item in added.values():
+                getattr(instance, self.on_add)(item)
+
+    def remove(self, instance, items) -> None:
+        items = items if isinstance(items, list) else [items]
+        if self.on_remove:
+            existing = self._identities(instance)
+            removed = [
+                item
+                for item in items
+                if getattr(item, id_field(item).field_name) in existing
+            ]
+
+        super().remove(instance, items)
+
+        if self.on_remove:
+            for item in removed:
+                getattr(instance, self.on_remove)(item)
+
+    def _scope(self, instance) -> Mapping | None:
+        scope = pending_children(instance, self.field_name)["scope"]
+        if "criteria" not in scope:
+            scope["criteria"] = scope_of(self.field_name)
+
+        return scope["criteria"]
+
+    def covers(self, instance) -> bool:
+        """Whether the loaded collection holds every child that the scope now in
+        effect would load
+        """
+        requested = scope_of(self.field_name)
+        loaded = self._scope(instance)
+        return (
+            requested is None
+            or loaded is ALL
+            or "items" in pending_children(instance, self.field_name)["scope"]
+            or loaded == requested
+        )
+
+    def widen(self, instance) -> None:
+        """Load into the collection the children that the scope now in effect
+        would load and that it lacks.
+
+        The children already loaded are kept as they are, with their changes,
+        and refreshing the collection later reads all of them again.
+        """
+        if self.covers(instance):
+            return
+
+        requested = scope_of(self.field_name)
+        items = list(getattr(instance, self.field_name))
+        loaded = self._identities(instance)
+        pending = pending_children(instance, self.field_name)
+
+        key = self._linked_attribute(type(instance))
+        owner_id = getattr(instance, id_field(instance).field_name)
+        children_repo = current_domain.repository_for(self.to_cls)
+        with trusted_loads():
+            stored = _all(
+                children_repo._dao.query.filter(**{key: owner_id}, **requested)
+            )
+
+        for item in stored:
+            identity = getattr(item, id_field(item).field_name)
+            if identity not in loaded and identity not in pending["removed"]:
+                setattr(item, key, owner_id)
+                item._set_root_and_owner(instance._root, instance)
+                items.append(item)
+
+        if requested is not ALL:
+            # The stored children loaded before, and those just loaded
+            requested = {
+                "id__in": sorted(
+                    getattr(item, id_field(item).field_name)
+                    for item in items
+                    if getattr(item, id_field(item).field_name) not in pending["added"]
+                )
+            }
+        pending["scope"]["criteria"] = requested
+        # Not `_set_own_value`, which would mark the owner as changed
+        instance.__dict__[self.field_name] = items
+        self.set_cached_value(instance, items)
+
+    def lookup(self, instance, attribute: str, value) -> list:
+        """Loaded children whose `attribute` is `value`, found through a dict
+        index instead of a scan of the collection.
+
+        Indexes are built on first use and dropped whenever the collection is
+        refreshed, as it is after children are added or removed. Only index
+        attributes that do not change, and filter on the others.
+        """
+        items = getattr(instance, self.field_name)
+        indexes = pending_children(instance, self.field_name)["indexes"]
+        if indexes.get("_items") is not items:
+            indexes.clear()
+            indexes["_items"] = items
+
+        if attribute not in indexes:
+            index = defaultdict(list)
+            for item in items:
+                index[getattr(item, attribute)].append(item)
+            indexes[attribute] = index
+
+        return indexes[attribute].get(value, [])
+
+    def preload(self, instance, items: list) -> None:
+        """Use `items`, built from elsewhere than the children's table, as the
+        stored children of `instance`. The collection is then complete, and is
+        not read from storage, even when refreshed.
+        """
+        for item in items:
+            setattr(item, self._linked_attribute(type(instance)), instance.id)
+            item._set_root_and_owner(instance._root, instance)
+
+        scope = pending_children(instance, self.field_name)["scope"]
+        scope["criteria"] = None
+        scope["items"] = items
+        self.delete_cached_value(instance)
+
+    def complete(self, instance) -> list:
+        """Every child, loaded or not, with the changes made since loading.
+
+        Children out of scope are read from storage on every call.
+        """
+        items = getattr(instance, self.field_name)
+        if (
+            self._scope(instance) is ALL
+            or "items" in pending_children(instance, self.field_name)["scope"]
+        ):
+            return items
+
+        loaded = {getattr(item, id_field(item).field_name): item for item in items}
+        removed = pending_children(instance, self.field_name)["removed"]
+        children_repo = current_domain.repository_for(self.to_cls)
+        with trusted_loads():
+            stored = _all(
+                children_repo._dao.query.filter(
+                    **{
+                        self._linked_attribute(type(instance)): getattr(
+                            instance, id_field(instance).field_name
+                        )
+                    }
+                )
+            )
+
+        complete = []
+        for item in stored:
+            identity = getattr(item, id_field(item).field_name)
+            if identity not in removed:
+                complete.append(loaded.pop(identity, item))
+
+        # Children added since loading
+        complete.extend(loaded.values())
+
+        return complete
+
+    def _fetch_objects(self, instance, key, value) -> list:
+        criteria = self._scope(instance)
+
+        data = []
+        preloaded = pending_children(instance, self.field_name)["scope"].get("items")
+        if preloaded is not None:
+            data = list(preloaded)
+        elif criteria is not None:
+            children_repo = current_domain.repository_for(self.to_cls)
+            with trusted_loads():
+                data = _all(children_repo._dao.query.filter(**{key: value}, **criteria))
+
+        # Set up linkage with owner element
+        for item in data:
+            setattr(item, key, value)
+
+        # Overlay the changes made since the collection was last fetched
+        pending = pending_children(instance, self.field_name)
+        data = [
+            pending["updated"].get(getattr(item, id_field(item).field_name), item)
+            for item in data
+        ]
+        data.extend(pending["added"].values())
+
+        return [
+            item
+            for item in data
+            if getattr(item, id_field(item).field_name) not in pending["removed"]
+        ]
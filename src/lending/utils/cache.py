@@ -0,0 +1,215 @@
+import json
+import time
+from collections import Counter
+from threading import RLock
+from uuid import uuid4
+from weakref import WeakKeyDictionary
+
+from protean import current_domain
+from protean.adapters.cache.memory import TTLDict
+from protean.utils.inflection import underscore
+
+KEY_PREFIX = "lending::aggregate-cache::"
+# Redis pub/sub channel of the invalidations made by each process
+INVALIDATIONS_CHANNEL = "lending:aggregate-cache:invalidations"
+
+# Aggregate caches, by cache provider
+_caches: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def aggregate_cache() -> "AggregateCache | None":
+    """The aggregate cache over the domain's default cache provider, when
+    `AGGREGATE_CACHE` is on
+    """
+    if not current_domain.config["custom"]["AGGREGATE_CACHE"]:
+        return None
+
+    provider = current_domain.caches["default"]
+    if provider not in _caches:
+        _caches[provider] = AggregateCache(provider)
+
+    return _caches[provider]
+
+
+class AggregateCache:
+    """A versioned read-through cache of aggregates' stored state.
+
+    Each entry holds the state of an aggregate at a version. Saving an
+    aggregate replaces its entry, before the Unit of Work commits, with a
+    marker of the version being written. States read from storage are cached
+    only if they are at least that version, so a state read before the commit
+    is never cached after it. If the commit fails, the marker stays until it
+    expires, and reads go to storage meanwhile.
+
+    With the memory provider, entries are kept by the process alone, so saves
+    made by other processes, like server workers, go unseen until entries
+    expire. Only turn the cache on there with a single process. With Redis,
+    entries are shared, and each process also keeps those it reads in memory.
+    These are dropped as the invalidations that other processes publish over
+    Redis pub/sub arrive. The time they take to arrive is reported as
+    staleness, along with the hit ratio (see `metrics`).
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.ttl = provider.conn_info.get("TTL") or 300
+
+        self._lock = RLock()
+        self._counts = Counter(
+            hits=0, misses=0, puts=0, stale_puts=0, invalidations=0, remote=0
+        )
+        self._max_staleness = 0.0
+
+        # Entries kept by this process: all of them with the memory provider,
+        #   which is process-local anyway, or those read from Redis
+        self._local = TTLDict(self.ttl)
+
+        self._redis = None
+        self._origin = uuid4().hex
+        if provider.conn_info["provider"] == "redis":
+            self._redis = provider.get_connection()
+            self._listener = self._redis.pubsub(ignore_subscribe_messages=True)
+            self._listener.subscribe(**{INVALIDATIONS_CHANNEL: self._on_invalidation})
+            self._listener.run_in_thread(sleep_time=1, daemon=True)
+
+    @staticmethod
+    def key(aggregate_cls, identifier) -> str:
+        return f"{KEY_PREFIX}{underscore(aggregate_cls.__name__)}-{identifier}"
+
+    ###################
+    # Provider access #
+    ###################
+    def _read(self, key: str) -> dict | None:
+        if self._redis is None:
+            return self._local.get(key)
+
+        value = self._redis.get(key)
+        return json.loads(value) if value else None
+
+    def _compare_and_write(self, key: str, replaces) -> bool:
+        """Write the entry `replaces` returns for the cached one, unless it
+        returns `None`, without another writer in between
+        """
+        if self._redis is None:
+            with self._lock:
+                entry = replaces(self._local.get(key))
+                if entry is not None:
+                    self._local[key] = entry
+                return entry is not None
+
+        import redis  # Installed along with the Redis cache provider
+
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                value = pipe.get(key)
+                entry = replaces(json.loads(value) if value else None)
+                if entry is None:
+                    return False
+
+                pipe.multi()
+                pipe.psetex(key, int(self.ttl * 1000), json.dumps(entry))
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False  # Written meanwhile, and left to the other writer
+
+    #######
+    # API #
+    #######
+    def get(self, aggregate_cls, identifier) -> dict | None:
+        """The cached entry of the aggregate, with its `version` and `state`"""
+        key = self.key(aggregate_cls, identifier)
+
+        entry = self._local.get(key) if self._redis is not None else None
+        if entry is None:
+            entry = self._read(key)
+            if entry is not None and self._redis is not None and "state" in entry:
+                self._local[key] = entry
+
+        if entry is None or "state" not in entry:
+            self._counts["misses"] += 1
+            return None
+
+        self._counts["hits"] += 1
+        return entry
+
+    def put(self, aggregate_cls, identifier, version: int, state: dict) -> bool:
+        """Cache `state`, read from storage at `version`, unless a later
+        version is cached or being written. Returns whether it was cached.
+        """
+
+        def replaces(cached: dict | None) -> dict | None:
+            if cached is not None and (
+                cached["version"] > version
+                or (cached["version"] == version and "state" in cached)
+            ):
+                return None
+
+            return {"version": version, "state": state}
+
+        cached = self._compare_and_write(self.key(aggregate_cls, identifier), replaces)
+        self._counts["puts" if cached else "stale_puts"] += 1
+        return cached
+
+    def invalidate(self, aggregate_cls, identifier, version: int) -> None:
+        """Mark the aggregate as being written at `version`, before commit"""
+        key = self.key(aggregate_cls, identifier)
+
+        def replaces(cached: dict | None) -> dict:
+            return {"version": max(version, cached["version"] if cached else version)}
+
+        while not self._compare_and_write(key, replaces):
+            pass  # Retried until no other writer interferes
+        self._counts["invalidations"] += 1
+
+        if self._redis is not None:
+            self._local.pop(key, None)
+            self._redis.publish(
+                INVALIDATIONS_CHANNEL,
+                json.dumps(
+                    {
+                        "key": key,
+                        "version": version,
+                        "at": time.time(),
+                        "origin": self._origin,
+                    }
+                ),
+            )
+
+    def _on_invalidation(self, message: dict) -> None:
+        invalidation = json.loads(message["data"])
+        if invalidation["origin"] == self._origin:
+            return
+
+        entry = self._local.get(invalidation["key"])
+        if entry is not None and entry["version"] < invalidation["version"]:
+            self._local.pop(invalidation["key"], None)
+
+        self._counts["remote"] += 1
+        self._max_staleness = max(
+            self._max_staleness, (time.time() - invalidation["at"]) * 1000
+        )
+
+    def metrics(self) -> dict:
+        """Hits and misses with the hit ratio, states cached and rejected as
+        stale, invalidations made and received from other processes, and the
+        longest a process kept serving an entry after it was invalidated
+        elsewhere, in milliseconds
+        """
+        lookups = self._counts["hits"] + self._counts["misses"]
+        return {
+            **self._counts,
+            "hit_ratio": self._counts["hits"] / lookups if lookups else 0.0,
+            "max_staleness_ms": self._max_staleness,
+        }
+
+    def clear(self) -> None:
+        """Drop every entry and reset the metrics, as after a restart"""
+        self._local.clear()
+        if self._redis is not None:
+            for key in self._redis.scan_iter(f"{KEY_PREFIX}*"):
+                self._redis.delete(key)
+
+        self._counts = Counter(dict.fromkeys(self._counts, 0))
+        self._max_staleness = 0.0
@@ -0,0 +1,70 @@
+from protean import current_uow
+from protean.utils.reflection import attributes, id_field
+from sqlalchemy import update
+
+from .internals import temp_cache
+
+
+def track_changes(cls):
+    """Record the attributes set to new values on persisted instances of `cls`,
+    so that only the columns that changed are written back (see `update_changes`).
+
+    Apply above the domain decorator, which rebuilds the class it is given.
+    """
+    setattr_ = cls.__setattr__
+
+    def __setattr__(self, name, value):
+        if (
+            self.__dict__.get("_initialized")
+            and self.state_.is_persisted
+            and name in attributes(self)
+            and getattr(self, name) != value
+        ):
+            temp_cache(self)["changes"]["attributes"][name] = True
+
+        setattr_(self, name, value)
+
+    cls.__setattr__ = __setattr__
+    return cls
+
+
+def changed_attributes(entity) -> list[str]:
+    """Attributes set on `entity` since it was loaded or last saved"""
+    return list(temp_cache(entity)["changes"]["attributes"])
+
+
+def clear_changes(entity) -> None:
+    temp_cache(entity)["changes"]["attributes"] = {}
+
+
+def update_changes(dao, entity, **criteria) -> bool:
+    """Write only the changed attributes of a persisted `entity` to its row on a
+    SQL provider, without reading the row first, and mark `entity` as saved.
+
+    `criteria` restrict the update further, like to an expected version.
+    Returns whether a row was updated.
+    """
+    values = {name: getattr(entity, name) for name in changed_attributes(entity)}
+
+    updated = True
+    if values:
+        table = dao.model_cls.__table__
+        identifier = id_field(entity).attribute_name
+        statement = (
+            update(table)
+            .where(table.c[identifier] == getattr(entity, identifier))
+            .where(*(table.c[name] == value for name, value in criteria.items()))
+            .values(values)
+        )
+
+        conn = dao._get_session()
+        updated = conn.execute(statement).rowcount == 1
+        if not current_uow:
+            conn.commit()
+            conn.close()
+
+    if updated:
+        clear_changes(entity)
+        entity.state_.mark_saved()
+
+    return updated
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+
+from protean import current_domain, current_uow
+
+from .identity_map import remember
+from .internals import identity_map
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="lending-loads")
+        return _executor
+
+
+def _get(domain, aggregate_cls, identifier):
+    # Pool threads start without the caller's domain context or Unit of Work
+    with domain.domain_context():
+        return current_domain.repository_for(aggregate_cls).get(identifier)
+
+
+def load_concurrently(*loads: tuple) -> list:
+    """Load the aggregates named by `(aggregate class, identifier)` pairs with
+    `get` of their repositories, at the same time when `CONCURRENT_LOADS` is
+    on, and return them in order.
+
+    The calling thread loads the first aggregate and a thread pool the others,
+    each over its own connection. Aggregates already in the identity map of
+    the active Unit of Work are loaded by the calling thread too, and the
+    others are added to it once loaded, so the Unit of Work saves their events
+    as if it had loaded them. They are read outside its transaction, which
+    sees the same committed rows before anything is written, and optimistic
+    concurrency still rejects a save over a newer version.
+
+    If loads fail, the error of the first of them is raised once every load
+    ends.
+
+    `CONCURRENT_LOADS` is off by default: the reads see neither the writes nor
+    the locks of the transaction, and each thread needs a connection of its
+    own, which the memory provider does not give.
+    """
+    if not current_domain.config["custom"]["CONCURRENT_LOADS"] or len(loads) < 2:
+        return [
+            current_domain.repository_for(aggregate_cls).get(identifier)
+            for aggregate_cls, identifier in loads
+        ]
+
+    in_uow = bool(current_uow and current_uow.in_progress)
+    domain = current_domain._get_current_object()
+
+    futures = {
+        index: _pool().submit(_get, domain, aggregate_cls, identifier)
+        for index, (aggregate_cls, identifier) in enumerate(loads)
+        if index > 0 and not (in_uow and identifier in identity_map())
+    }
+
+    def result(index, aggregate_cls, identifier):
+        if index not in futures:
+            return current_domain.repository_for(aggregate_cls).get(identifier)
+
+        aggregate = futures[index].result()
+        if in_uow:
+            remember(aggregate)
+        return aggregate
+
+    try:
+        return [result(index, *load) for index, load in enumerate(loads)]
+    finally:
+        wait(futures.values())  # Even after a load fails
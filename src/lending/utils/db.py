@@ -22,11 +22,19 @@ def setup_db():
 
                 for _, entity_record in lending.registry.views.items():
                     if entity_record.cls.meta_.provider == provider.name:
-                        lending.repository_for(entity_record.cls)._dao
+                        repo = lending.repository_for(entity_record.cls)
+                        # Views stored through other views have no table
+                        if getattr(repo, "has_table", True):
+                            repo._dao
 
                 # Create RDBMS Tables
                 provider._metadata.create_all(engine)
 
+                # Create indexes declared after their tables already existed
+                for table in provider._metadata.sorted_tables:
+                    for index in table.indexes:
+                        index.create(engine, checkfirst=True)
+
 
 def drop_db():
     """Drop database schema"""
@@ -0,0 +1,51 @@
+from collections import Counter
+from weakref import WeakKeyDictionary
+
+from protean import current_uow
+
+from .internals import add_to_identity_map, identity_map
+
+# Identity map hits and misses, by Unit of Work
+_stats: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def loaded(aggregate_cls, identifier):
+    """The instance of `aggregate_cls` with `identifier` already loaded in the
+    active Unit of Work, if any, so that it is not read from storage again.
+
+    Protean records every aggregate the Unit of Work loads or saves, to store
+    their events on commit. Each lookup counts as a hit or a miss (see
+    `identity_map_stats`).
+    """
+    if not (current_uow and current_uow.in_progress):
+        return None
+
+    uow = current_uow._get_current_object()
+    stats = _stats.setdefault(uow, Counter(hits=0, misses=0))
+    aggregate = identity_map(uow).get(identifier)
+    if isinstance(aggregate, aggregate_cls) and not aggregate.state_.is_destroyed:
+        stats["hits"] += 1
+        return aggregate
+
+    stats["misses"] += 1
+    return None
+
+
+def remember(aggregate) -> None:
+    """Add `aggregate`, loaded outside the active Unit of Work after missing it
+    in the identity map, so that the Unit of Work saves its events on commit
+    """
+    uow = current_uow._get_current_object()
+    _stats.setdefault(uow, Counter(hits=0, misses=0))["misses"] += 1
+    add_to_identity_map(aggregate, uow)
+
+
+def identity_map_stats(uow=None) -> dict:
+    """Hits and misses of lookups in the identity map of `uow`, or of the active
+    Unit of Work. They stay available after the Unit of Work commits.
+    """
+    if uow is None and current_uow:
+        uow = current_uow._get_current_object()
+
+    stats = _stats.get(uow) if uow is not None else None
+    return dict(stats or Counter(hits=0, misses=0))
@@ -0,0 +1,59 @@
+"""Protean internals that lending builds on, each behind a function of its own,
+so that what depends on a Protean release is found here when upgrading.
+"""
+
+from collections.abc import Callable
+
+from protean import current_uow
+
+from lending.domain import lending
+
+
+def temp_cache(entity) -> dict:
+    """The per-instance cache of `entity`, where Protean keeps the children
+    pending for each association, and lending the attributes changed
+    """
+    return entity._temp_cache
+
+
+def pending_children(entity, field_name: str) -> dict:
+    """Children of `entity` in `field_name` not yet saved, as Protean tracks
+    them: dicts of the items `added`, `updated` and `removed`, by id
+    """
+    return entity._temp_cache[field_name]
+
+
+def identity_map(uow=None) -> dict:
+    """Aggregates loaded or saved in `uow`, or the active Unit of Work, by id"""
+    return (uow or current_uow)._identity_map
+
+
+def add_to_identity_map(aggregate, uow=None) -> None:
+    """Record `aggregate` in `uow`, or the active Unit of Work, so that its
+    events are stored when it commits
+    """
+    (uow or current_uow)._add_to_identity_map(aggregate)
+
+
+def write_message(
+    stream: str, message_type: str, data: dict, metadata: dict | None = None
+) -> None:
+    """Append a raw message to `stream` of the event store"""
+    lending.event_store.store._write(stream, message_type, data, metadata)
+
+
+def last_message(stream: str) -> dict | None:
+    """The last raw message of `stream`, if any"""
+    return lending.event_store.store._read_last_message(stream)
+
+
+def read_messages(stream: str, position: int, no_of_messages: int) -> list[dict]:
+    """Up to `no_of_messages` raw messages of `stream` from `position`, as dicts"""
+    return lending.event_store.store._read(
+        stream, position=position, no_of_messages=no_of_messages
+    )
+
+
+def undecorated(handler_method: Callable) -> Callable:
+    """A handler method without the Unit of Work `@handle` runs it in"""
+    return handler_method.__wrapped__
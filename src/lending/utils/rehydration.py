@@ -0,0 +1,98 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from protean import current_domain
+from protean.core.entity import _EntityState
+from protean.fields import HasMany
+from protean.fields.association import Association
+from protean.utils import DomainObjects
+from protean.utils.reflection import attributes, declared_fields
+
+_trusted: ContextVar[bool] = ContextVar("trusted_loads", default=False)
+
+
+@contextmanager
+def trusted_loads():
+    """Build the entities loaded from storage while the block runs from their
+    stored values as they are, when `TRUSTED_REHYDRATION` is on.
+
+    Only wrap reads from a repository or DAO, whose values were validated as
+    they were written. Values built elsewhere must go through validation.
+    """
+    token = _trusted.set(current_domain.config["custom"]["TRUSTED_REHYDRATION"])
+    try:
+        yield
+    finally:
+        _trusted.reset(token)
+
+
+def rehydrate_trusted(cls):
+    """Construct instances of `cls` inside `trusted_loads` without loading each
+    value through its field, which casts and validates it, and without
+    checking invariants. Values set afterwards are validated as usual.
+
+    Apply above the domain decorator, which rebuilds the class it is given.
+    """
+    init = cls.__init__
+
+    def __init__(self, *template, **kwargs):
+        if not _trusted.get():
+            init(self, *template, **kwargs)
+            return
+
+        values = {}
+        for dictionary in template:
+            values.update(dictionary)
+        values.update(kwargs)
+
+        _rehydrate(self, values)
+
+    cls.__init__ = __init__
+    return cls
+
+
+def _rehydrate(entity, values: dict) -> None:
+    # The instance state `BaseEntity.__init__` sets up
+    entity._initialized = False
+    entity.errors = defaultdict(list)
+    entity.state_ = _EntityState()
+    entity._temp_cache = defaultdict(lambda: defaultdict(dict))
+    entity._owner = None
+    entity._root = None
+    entity._disable_invariant_checks = False
+    entity._events = []
+
+    for name, field_obj in attributes(entity).items():
+        value = values.get(name)
+        if value is None and field_obj.default is not None:
+            # As loading the missing value through the field would
+            default = field_obj.default
+            value = default() if callable(default) else default
+        entity.__dict__[name] = value
+
+    # Children are loaded as soon as the entity is built
+    for field_name, field_obj in declared_fields(entity).items():
+        if isinstance(field_obj, Association):
+            getattr(entity, field_name)
+
+            if isinstance(field_obj, HasMany):
+                setattr(entity, f"add_{field_name}", partial(field_obj.add, entity))
+                setattr(
+                    entity, f"remove_{field_name}", partial(field_obj.remove, entity)
+                )
+                setattr(
+                    entity,
+                    f"get_one_from_{field_name}",
+                    partial(field_obj.get, entity),
+                )
+                setattr(
+                    entity, f"filter_{field_name}", partial(field_obj.filter, entity)
+                )
+
+    entity._initialized = True
+
+    if entity.element_type == DomainObjects.AGGREGATE:
+        entity._set_root_and_owner(entity, entity)
+        entity._next_version = entity._version + 1
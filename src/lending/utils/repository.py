@@ -0,0 +1,105 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+
+from protean import current_uow
+from protean.core.repository import BaseRepository
+from protean.exceptions import ObjectNotFoundError
+from protean.fields import Identifier
+from protean.utils.reflection import attributes
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+
+from lending.domain import lending
+
+
+class BulkRepository(BaseRepository):
+    """Bulk writes and constant-memory reads for the repositories of views
+    maintained in bulk, like the daily sheets and the patron history
+    """
+
+    def upsert(self, record, *update_fields: str) -> None:
+        """Insert `record`, or update `update_fields` of the existing row with
+        the same id, in a single statement on PostgreSQL and SQLite. Without
+        `update_fields`, an existing row is left as it is.
+        """
+        self.upsert_many([(record, update_fields)])
+
+    def upsert_many(
+        self,
+        rows: Iterable[tuple[object, Iterable[str]]],
+        table: Table | None = None,
+    ) -> None:
+        """Upsert many records, with one statement per distinct set of update fields.
+
+        On SQL providers, `table` redirects the writes to a table of the same
+        shape, like a shadow table being rebuilt.
+        """
+        dialect = self._provider.conn_info["provider"]
+        if dialect not in ("postgresql", "sqlite"):
+            for record, update_fields in rows:
+                try:
+                    existing = self._dao.get(record.id)
+                except ObjectNotFoundError:
+                    self.add(record)
+                    continue
+
+                if update_fields:
+                    for field_name in update_fields:
+                        setattr(existing, field_name, getattr(record, field_name))
+                    self.add(existing)
+            return
+
+        records_by_update_fields = defaultdict(list)
+        for record, update_fields in rows:
+            records_by_update_fields[frozenset(update_fields)].append(record)
+
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        columns = attributes(self.meta_.part_of)
+        conn = self._dao._get_session()
+        for update_fields, records in records_by_update_fields.items():
+            statement = insert(
+                self._dao.model_cls.__table__ if table is None else table
+            ).values(
+                [
+                    {name: getattr(record, name) for name in columns}
+                    for record in records
+                ]
+            )
+            if update_fields:
+                statement = statement.on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={name: statement.excluded[name] for name in update_fields},
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=["id"])
+            conn.execute(statement)
+
+        if not current_uow:
+            conn.commit()
+            conn.close()
+
+    def find_for_patron(self, patron_id: Identifier, id: Identifier):
+        try:
+            return self._dao.find_by(id=id, patron_id=patron_id)
+        except ObjectNotFoundError:
+            return None
+
+    def _iterate(self, criteria: dict, batch_size: int | None = None) -> Iterator:
+        """Stream records matching `criteria`, one keyset-paginated page at a time"""
+        batch_size = batch_size or lending.config["custom"]["DAILY_SHEET_PAGE_SIZE"]
+        query = self._dao.query.filter(**criteria).order_by("id").limit(batch_size)
+
+        last_id = None
+        while True:
+            page = query if last_id is None else query.filter(id__gt=last_id)
+            records = page.all().items
+            yield from records
+
+            if len(records) < batch_size:
+                return
+
+            last_id = records[-1].id
+
+    def _count(self, criteria: dict) -> int:
+        # An empty page still carries the total, without hydrating any record
+        return self._dao.query.filter(**criteria).limit(0).all().total
@@ -0,0 +1,76 @@
+import sys
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from protean.fields import Identifier
+from protean.utils.mixins import Message
+
+from lending.domain import lending
+from lending.model.patron import Patron
+
+STREAM_CATEGORY = "library::patron"
+
+
+def all_patron_ids(batch_size: int | None = None) -> Iterator[Identifier]:
+    """Stream the identities of all patrons in ascending order, one page at a time."""
+    batch_size = batch_size or lending.config["custom"]["DAILY_SHEET_CHUNK_SIZE"]
+    repo = lending.repository_for(Patron)
+
+    last_id = None
+    while True:
+        query = repo._dao.query.order_by("id").limit(batch_size)
+        if last_id is not None:
+            query = query.filter(id__gt=last_id)
+
+        patrons = query.all().items
+        for patron in patrons:
+            yield patron.id
+
+        if len(patrons) < batch_size:
+            return
+
+        last_id = patrons[-1].id
+
+
+def shard_for(patron_id: Identifier, shards: int) -> int:
+    """Stable hash partition of a patron id, identical across processes"""
+    return zlib.crc32(str(patron_id).encode()) % shards
+
+
+def read_category(position: int, batch_size: int) -> list[Message]:
+    """Up to `batch_size` messages of the category from global `position`"""
+    with lending.domain_context():
+        store = lending.event_store.store
+        if lending.config["event_store"]["provider"] != "memory":
+            return store.read(
+                STREAM_CATEGORY, position=position, no_of_messages=batch_size
+            )
+
+        # The memory event store pages categories on stream positions instead
+        #   of global positions, so page over the whole category here
+        messages = sorted(
+            store.read(STREAM_CATEGORY, no_of_messages=sys.maxsize),
+            key=lambda message: message.global_position,
+        )
+        return [message for message in messages if message.global_position >= position][
+            :batch_size
+        ]
+
+
+def read_ahead(position: int, batch_size: int) -> Iterator[list[Message]]:
+    """Read the category in batches from `position`, fetching the next batch
+    while the current one is being processed.
+    """
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(read_category, position, batch_size)
+        while messages := pending.result():
+            if len(messages) == batch_size:
+                pending = reader.submit(
+                    read_category, messages[-1].global_position + 1, batch_size
+                )
+
+            yield messages
+
+            if len(messages) < batch_size:
+                return
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from protean import current_domain, g
+from pytest_bdd import given
+
+from lending import CheckoutSheet, HoldSheet
+
+# Globals steps share within a scenario
+SCENARIO_GLOBALS = (
+    "current_user",
+    "current_users",
+    "current_book",
+    "current_books",
+    "current_exception",
+    "current_patrons",
+    "current_report",
+    "current_fact",
+    "current_checkout_id",
+    "current_hold_id",
+    "rejected_book",
+    "version",
+    "workers",
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_globals():
+    yield
+
+    for name in SCENARIO_GLOBALS:
+        if hasattr(g, name):
+            delattr(g, name)
+
+
+@pytest.fixture
+def event_loop_per_test():
+    """A new event loop for scenarios running the server's subscriptions"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    yield
+
+    if not loop.is_closed():
+        loop.close()
+    asyncio.set_event_loop(None)
+
+
+@given("the daily sheet has been cleared")
+def daily_sheet_cleared():
+    current_domain.repository_for(HoldSheet)._dao.delete_all()
+    current_domain.repository_for(CheckoutSheet)._dao.delete_all()
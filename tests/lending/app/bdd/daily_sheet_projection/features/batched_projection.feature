@@ -0,0 +1,22 @@
+Feature: Project the daily sheet in batches
+
+  Scenario: Events for the same hold are coalesced within a batch
+    Given a patron has an active hold
+    And the patron has cancelled the hold
+    And the daily sheet has been cleared
+    When the daily sheet projects the patron's events in one batch
+    Then the daily sheet contains the CANCELLED hold record
+    And the daily sheet contains one record for the patron
+
+  Scenario: Server advances the projection position after flushing a batch
+    Given a patron has an active hold
+    And the daily sheet has been cleared
+    When the server projects pending events in batches
+    Then the daily sheet contains the ACTIVE hold record
+    And the projection position is at the last patron event
+
+  Scenario: A hold placement redelivered in a batch leaves an ended hold as it is
+    Given a patron has an active hold
+    And the patron has cancelled the hold
+    When the patron's HoldPlaced event is projected again in a batch
+    Then the daily sheet contains the CANCELLED hold record
@@ -0,0 +1,81 @@
+from protean import UnitOfWork, current_domain, g
+from protean.utils import fqn
+from pytest_bdd import given, then, when
+from pytest_bdd.parsers import cfparse
+
+from lending import DailySheet, HoldSheet, HoldType, Patron, place_hold
+from lending.app.dailysheet import DailySheetManager
+from lending.server import LendingEngine
+
+
+def _patron_messages():
+    return current_domain.event_store.store.read(f"library::patron-{g.current_user.id}")
+
+
+@given("a patron has an active hold")
+def patron_with_active_hold(patron, book):
+    g.current_user = patron
+
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+@given("the patron has cancelled the hold")
+def patron_cancelled_hold():
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(g.current_user.id)
+        refreshed_patron.cancel_hold(refreshed_patron.holds[0].id)
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+@when("the daily sheet projects the patron's events in one batch")
+def project_patron_events_in_one_batch():
+    DailySheetManager.handle_batch(_patron_messages())
+
+
+@when("the patron's HoldPlaced event is projected again in a batch")
+def project_hold_placed_again():
+    DailySheetManager.handle_batch(
+        [
+            message
+            for message in _patron_messages()
+            if message.metadata.type == "Library.HoldPlaced.v1"
+        ]
+    )
+
+
+@when("the server projects pending events in batches")
+def server_projects_pending_events():
+    engine = LendingEngine(current_domain, test_mode=True)
+    engine.run()
+
+
+@then(cfparse("the daily sheet contains the {status} hold record"))
+def daily_sheet_contains_hold(status):
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    record = current_domain.repository_for(DailySheet).find_hold_for_patron(
+        patron.id, patron.holds[0].id
+    )
+    assert record is not None
+    assert record.hold_status == status
+
+
+@then("the daily sheet contains one record for the patron")
+def daily_sheet_contains_one_record():
+    records = (
+        current_domain.repository_for(HoldSheet)
+        ._dao.query.filter(patron_id=g.current_user.id)
+        .all()
+    )
+    assert records.total == 1
+
+
+@then("the projection position is at the last patron event")
+def projection_position_at_last_event():
+    message = current_domain.event_store.store._read_last_message(
+        f"position-${fqn(DailySheetManager)}"
+    )
+    last_message = current_domain.event_store.store.read("library::patron")[-1]
+    assert message["data"]["position"] == last_message.global_position
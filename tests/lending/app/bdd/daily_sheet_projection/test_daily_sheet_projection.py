@@ -0,0 +1,8 @@
+import pytest
+from pytest_bdd import scenarios
+
+from .step_defs.projection_steps import *
+
+pytestmark = pytest.mark.usefixtures("event_loop_per_test")
+
+scenarios("./features")
@@ -0,0 +1,39 @@
+Feature: Rebuild the daily sheet from the event store
+
+  Scenario: System rebuilds the daily sheet from patron events
+    Given 3 patrons have placed holds
+    And the first patron has cancelled the hold
+    And the daily sheet has been cleared
+    When the system rebuilds the daily sheet in batches of 2
+    Then the daily sheet contains the hold of every patron
+    And the daily sheet contains the CANCELLED hold of the first patron
+    And the rebuild is checkpointed at the last patron event
+
+  Scenario: System resumes an interrupted rebuild
+    Given 3 patrons have placed holds
+    And a previous rebuild was checkpointed after the first patron
+    And the daily sheet has been cleared
+    When the system rebuilds the daily sheet in batches of 2
+    Then only the holds of the last two patrons are on the daily sheet
+
+  Scenario: Completed rebuild is not run again
+    Given 3 patrons have placed holds
+    And the system has rebuilt the daily sheet
+    And the daily sheet has been cleared
+    When the system rebuilds the daily sheet in batches of 2
+    Then the daily sheet is empty
+
+  Scenario: System rebuilds the holds of many patrons with the default workers
+    Given 12 patrons have placed holds
+    And the daily sheet has been cleared
+    When the system rebuilds the daily sheet in batches of 5
+    Then the daily sheet contains the hold of every patron
+    And the rebuild is checkpointed at the last patron event
+
+  Scenario: System finishes a rebuild interrupted after swapping the sheets in
+    Given 3 patrons have placed holds
+    And a previous rebuild was interrupted after swapping the sheets in
+    And another patron has placed a hold
+    When the system rebuilds the daily sheet in batches of 2
+    Then the daily sheet contains the hold of every patron
+    And the rebuild is checkpointed at the last patron event
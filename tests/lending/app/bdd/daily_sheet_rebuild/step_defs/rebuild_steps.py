@@ -0,0 +1,142 @@
+import pytest
+from faker import Faker
+from protean import UnitOfWork, current_domain, g
+from pytest_bdd import given, then, when
+from pytest_bdd.parsers import cfparse
+
+from lending import (
+    Book,
+    DailySheet,
+    HoldSheet,
+    HoldStatus,
+    HoldType,
+    Patron,
+    place_hold,
+)
+from lending.app.rebuild import DailySheetRebuild
+
+fake = Faker()
+
+REBUILD_ID = "test"
+
+
+def _rebuild(batch_size=None):
+    DailySheetRebuild(REBUILD_ID, batch_size=batch_size).run()
+
+
+def _place_hold():
+    patron_repo = current_domain.repository_for(Patron)
+
+    patron = Patron()
+    patron_repo.add(patron)
+
+    book = Book(isbn=fake.isbn13())
+    current_domain.repository_for(Book).add(book)
+
+    with UnitOfWork():
+        patron = patron_repo.get(patron.id)
+        place_hold(patron, book, "1", HoldType.CLOSED_ENDED.value)()
+        patron_repo.add(patron)
+
+    return patron
+
+
+def _hold_sheet_records():
+    return current_domain.repository_for(HoldSheet)._dao.query.all().items
+
+
+@given(cfparse("{count:d} patrons have placed holds"))
+def patrons_with_holds(count):
+    g.current_patrons = [_place_hold() for _ in range(count)]
+
+
+@given("another patron has placed a hold")
+def another_patron_with_hold():
+    g.current_patrons.append(_place_hold())
+
+
+@given("the first patron has cancelled the hold")
+def first_patron_cancelled_hold():
+    patron_repo = current_domain.repository_for(Patron)
+    with UnitOfWork():
+        patron = patron_repo.get(g.current_patrons[0].id)
+        patron.cancel_hold(patron.holds[0].id)
+        patron_repo.add(patron)
+
+
+@given("a previous rebuild was checkpointed after the first patron")
+def previous_rebuild_checkpointed():
+    last_message = current_domain.event_store.store.read(
+        f"library::patron-{g.current_patrons[0].id}"
+    )[-1]
+    rebuild = DailySheetRebuild(REBUILD_ID)
+    rebuild._prepare()
+    rebuild._write_checkpoint(last_message.global_position)
+
+
+@given("a previous rebuild was interrupted after swapping the sheets in")
+def previous_rebuild_interrupted_after_swap(monkeypatch):
+    rebuild = DailySheetRebuild(REBUILD_ID, batch_size=2)
+    if rebuild.shadow_tables is None:
+        pytest.skip("Sheets are only swapped in on SQL providers")
+
+    write_checkpoint = rebuild._write_checkpoint
+
+    def interrupted(position, swapped=False):
+        if swapped:
+            raise RuntimeError("Interrupted")
+        write_checkpoint(position, swapped)
+
+    monkeypatch.setattr(rebuild, "_write_checkpoint", interrupted)
+    with pytest.raises(RuntimeError):
+        rebuild.run()
+
+
+@given("the system has rebuilt the daily sheet")
+def system_rebuilt_daily_sheet():
+    _rebuild()
+
+
+@when(cfparse("the system rebuilds the daily sheet in batches of {batch_size:d}"))
+def system_rebuilds_daily_sheet(batch_size):
+    _rebuild(batch_size)
+
+
+@then("the daily sheet contains the hold of every patron")
+def daily_sheet_contains_every_hold():
+    assert {record.patron_id for record in _hold_sheet_records()} == {
+        patron.id for patron in g.current_patrons
+    }
+
+
+@then(cfparse("the daily sheet contains the {status} hold of the first patron"))
+def daily_sheet_contains_hold_of_first_patron(status):
+    patron = g.current_patrons[0]
+    record = current_domain.repository_for(DailySheet).find_hold_for_patron(
+        patron.id, patron.holds[0].id
+    )
+    assert record.hold_status == status
+
+
+@then("only the holds of the last two patrons are on the daily sheet")
+def only_last_two_holds_on_daily_sheet():
+    records = _hold_sheet_records()
+    assert {record.patron_id for record in records} == {
+        patron.id for patron in g.current_patrons[1:]
+    }
+    assert all(record.status == HoldStatus.ACTIVE.value for record in records)
+
+
+@then("the rebuild is checkpointed at the last patron event")
+def rebuild_checkpointed_at_last_event():
+    last_position = max(
+        message.global_position
+        for message in current_domain.event_store.store.read("library::patron")
+    )
+    checkpoint = DailySheetRebuild(REBUILD_ID).last_checkpoint()
+    assert checkpoint == {"position": last_position, "swapped": True}
+
+
+@then("the daily sheet is empty")
+def daily_sheet_is_empty():
+    assert _hold_sheet_records() == []
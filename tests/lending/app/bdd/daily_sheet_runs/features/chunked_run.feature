@@ -0,0 +1,13 @@
+Feature: Run the daily sheet in resumable chunks
+
+  Scenario: System commits the daily sheet run in chunks
+    Given three patrons have holds that expired yesterday
+    When the system runs the daily sheet in chunks of 2
+    Then all the holds are marked as expired
+    And the run is checkpointed at the last patron
+
+  Scenario: System resumes an interrupted daily sheet run
+    Given three patrons have holds that expired yesterday
+    And a previous run was checkpointed after the first two patrons
+    When the system runs the daily sheet in chunks of 2
+    Then only the hold of the last patron is marked as expired
@@ -0,0 +1,28 @@
+Feature: Run the daily sheet from the items falling due
+
+  Scenario: System expires holds listed on the daily sheet
+    Given a patron has a hold that expired yesterday
+    When the system runs the daily sheet
+    Then the hold is marked as expired
+    And the daily sheet contains the EXPIRED hold record
+
+  Scenario: System marks checkouts listed on the daily sheet as overdue
+    Given a patron has a checkout that fell due yesterday
+    When the system runs the daily sheet
+    Then the checkout is marked as overdue
+    And the daily sheet contains the OVERDUE checkout record
+
+  Scenario: System expires holds left over from days the daily sheet did not run
+    Given a patron has a hold that expired 3 days ago
+    When the system runs the daily sheet
+    Then the hold is marked as expired
+
+  Scenario: System marks checkouts left over from days the daily sheet did not run as overdue
+    Given a patron has a checkout that fell due 3 days ago
+    When the system runs the daily sheet
+    Then the checkout is marked as overdue
+
+  Scenario: System leaves holds that are not yet due untouched
+    Given a patron has an active hold
+    When the system runs the daily sheet
+    Then the hold is still active
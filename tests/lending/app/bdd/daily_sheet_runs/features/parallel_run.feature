@@ -0,0 +1,13 @@
+Feature: Run the daily sheet in parallel shards
+
+  Scenario: System runs the daily sheet across shards
+    Given three patrons have holds that expired yesterday
+    When the system runs the daily sheet across 4 shards
+    Then all the holds are marked as expired
+    And the report shows 3 holds expired and no failures
+
+  Scenario: System reports patrons that could not be processed
+    Given three patrons have holds that expired yesterday
+    And one of the patrons has been removed
+    When the system runs the daily sheet across 2 shards
+    Then the report shows 2 holds expired and 1 failure
@@ -0,0 +1,223 @@
+from datetime import date, timedelta
+
+from faker import Faker
+from protean import UnitOfWork, current_domain, g
+from pytest_bdd import given, then, when
+from pytest_bdd.parsers import cfparse
+
+from lending import (
+    Book,
+    CheckoutStatus,
+    DailySheet,
+    HoldStatus,
+    HoldType,
+    Patron,
+    checkout,
+    place_hold,
+)
+from lending.app.daily_run import (
+    DailySheetRun,
+    run_daily_sheet,
+    run_daily_sheet_in_parallel,
+)
+
+fake = Faker()
+
+
+@given("a patron has an active hold")
+def patron_with_active_hold(patron, book):
+    g.current_user = patron
+    g.current_book = book
+
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+def _place_hold_expiring(patron, book, expires_on):
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        refreshed_patron.holds[0].expires_on = expires_on
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+    daily_sheet_repo = current_domain.repository_for(DailySheet)
+    record = daily_sheet_repo.find_hold_for_patron(
+        refreshed_patron.id, refreshed_patron.holds[0].id
+    )
+    record.hold_expires_on = expires_on
+    daily_sheet_repo.add(record)
+
+
+@given("a patron has a hold that expired yesterday")
+def patron_with_hold_expired_yesterday(patron, book):
+    g.current_user = patron
+    g.current_book = book
+
+    _place_hold_expiring(patron, book, date.today() - timedelta(days=1))
+
+
+@given(cfparse("a patron has a hold that expired {days:d} days ago"))
+def patron_with_hold_expired_days_ago(patron, book, days):
+    g.current_user = patron
+    g.current_book = book
+
+    # As left by daily sheet runs that were missed since
+    _place_hold_expiring(patron, book, date.today() - timedelta(days=days))
+
+
+@given("three patrons have holds that expired yesterday")
+def three_patrons_with_holds_expired_yesterday():
+    patrons = [Patron() for _ in range(3)]
+    for patron in patrons:
+        current_domain.repository_for(Patron).add(patron)
+
+        book = Book(isbn=fake.isbn13())
+        current_domain.repository_for(Book).add(book)
+
+        _place_hold_expiring(patron, book, date.today() - timedelta(days=1))
+
+    g.current_patrons = sorted(patrons, key=lambda patron: patron.id)
+
+
+@given("a previous run was checkpointed after the first two patrons")
+def previous_run_checkpointed():
+    yesterday = date.today() - timedelta(days=1)
+    DailySheetRun(yesterday.isoformat())._write_checkpoint(g.current_patrons[1].id)
+
+
+@given("one of the patrons has been removed")
+def one_patron_removed():
+    current_domain.repository_for(Patron)._dao.delete(g.current_patrons[0])
+
+
+def _checkout_falling_due(patron, book, due_on):
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        checkout(refreshed_patron, book, "1")()
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+    with UnitOfWork():
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        refreshed_patron.checkouts[0].due_on = due_on
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+    daily_sheet_repo = current_domain.repository_for(DailySheet)
+    record = daily_sheet_repo.find_checkout_for_patron(
+        refreshed_patron.id, refreshed_patron.checkouts[0].id
+    )
+    record.checkout_due_on = due_on
+    daily_sheet_repo.add(record)
+
+
+@given("a patron has a checkout that fell due yesterday")
+def patron_with_checkout_due_yesterday(patron, book):
+    g.current_user = patron
+    g.current_book = book
+
+    _checkout_falling_due(patron, book, date.today() - timedelta(days=1))
+
+
+@given(cfparse("a patron has a checkout that fell due {days:d} days ago"))
+def patron_with_checkout_due_days_ago(patron, book, days):
+    g.current_user = patron
+    g.current_book = book
+
+    _checkout_falling_due(patron, book, date.today() - timedelta(days=days))
+
+
+@when("the system runs the daily sheet")
+def system_runs_daily_sheet():
+    run_daily_sheet()
+
+
+@when(cfparse("the system runs the daily sheet in chunks of {chunk_size:d}"))
+def system_runs_daily_sheet_in_chunks(chunk_size):
+    run_daily_sheet(chunk_size=chunk_size)
+
+
+@when(cfparse("the system runs the daily sheet across {shards:d} shards"))
+def system_runs_daily_sheet_in_parallel(shards):
+    g.current_report = run_daily_sheet_in_parallel(shards)
+
+
+@then("the hold is marked as expired")
+def hold_marked_expired():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert patron.holds[0].status == HoldStatus.EXPIRED.value
+
+
+@then("the hold is still active")
+def hold_still_active():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert patron.holds[0].status == HoldStatus.ACTIVE.value
+
+
+@then("all the holds are marked as expired")
+def all_holds_marked_expired():
+    for patron in g.current_patrons:
+        refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+        assert refreshed_patron.holds[0].status == HoldStatus.EXPIRED.value
+
+
+@then("only the hold of the last patron is marked as expired")
+def only_last_hold_marked_expired():
+    statuses = [
+        current_domain.repository_for(Patron).get(patron.id).holds[0].status
+        for patron in g.current_patrons
+    ]
+    assert statuses == [
+        HoldStatus.ACTIVE.value,
+        HoldStatus.ACTIVE.value,
+        HoldStatus.EXPIRED.value,
+    ]
+
+
+@then(cfparse("the report shows {count:d} holds expired and no failures"))
+def report_without_failures(count):
+    assert g.current_report.holds_expired == count
+    assert g.current_report.failures == 0
+
+
+@then(cfparse("the report shows {count:d} holds expired and {failures:d} failure"))
+def report_with_failures(count, failures):
+    assert g.current_report.holds_expired == count
+    assert g.current_report.failures == failures
+
+
+@then("the run is checkpointed at the last patron")
+def run_checkpointed_at_last_patron():
+    yesterday = date.today() - timedelta(days=1)
+    run = DailySheetRun(yesterday.isoformat())
+    assert run.last_checkpoint() == g.current_patrons[-1].id
+
+
+@then("the checkout is marked as overdue")
+def checkout_marked_overdue():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert patron.checkouts[0].status == CheckoutStatus.OVERDUE.value
+
+
+@then(cfparse("the daily sheet contains the {status} hold record"))
+def daily_sheet_contains_hold(status):
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    record = current_domain.repository_for(DailySheet).find_hold_for_patron(
+        patron.id, patron.holds[0].id
+    )
+    assert record is not None
+    assert record.hold_status == status
+
+
+@then(cfparse("the daily sheet contains the {status} checkout record"))
+def daily_sheet_contains_checkout(status):
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    record = current_domain.repository_for(DailySheet).find_checkout_for_patron(
+        patron.id, patron.checkouts[0].id
+    )
+    assert record is not None
+    assert record.checkout_status == status
@@ -0,0 +1,5 @@
+from pytest_bdd import scenarios
+
+from .step_defs.daily_run_steps import *
+
+scenarios("./features")
@@ -0,0 +1,16 @@
+Feature: Schedule and fire checkout due deadlines
+
+  Scenario: Checking out a book schedules its due date
+    Given a patron has checked out a book
+    Then a deadline is scheduled for the day after the checkout is due
+
+  Scenario: Returning a book removes its deadline
+    Given a patron has checked out a book
+    When the patron returns the book
+    Then no deadline is scheduled
+
+  Scenario: Scheduler marks checkouts overdue when their deadline falls due
+    Given a patron has a checkout that fell due yesterday
+    When the scheduler fires due deadlines
+    Then the checkout is marked as overdue
+    And no deadline is scheduled
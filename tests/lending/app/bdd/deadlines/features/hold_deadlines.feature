@@ -0,0 +1,31 @@
+Feature: Schedule and fire hold expiry deadlines
+
+  Scenario: Placing a closed-ended hold schedules its expiry
+    Given a patron has an active hold
+    Then a deadline is scheduled for the day after the hold expires
+
+  Scenario: Cancelling a hold removes its deadline
+    Given a patron has an active hold
+    When the patron cancels the hold
+    Then no deadline is scheduled
+
+  Scenario: Scheduler expires holds whose deadline has fallen due
+    Given a patron has a hold that expired yesterday
+    When the scheduler fires due deadlines
+    Then the hold is marked as expired
+    And no deadline is scheduled
+
+  Scenario: Scheduler leaves deadlines that are not yet due
+    Given a patron has an active hold
+    When the scheduler fires due deadlines
+    Then the hold is still active
+    And a deadline is scheduled for the day after the hold expires
+
+  Scenario: Scheduler retries deadlines of a patron changed concurrently
+    Given a patron has a hold that expired yesterday
+    When the scheduler fires due deadlines while the patron is changed elsewhere
+    Then the hold is still active
+    And a deadline is scheduled for the day after the hold expires
+    When the scheduler fires due deadlines
+    Then the hold is marked as expired
+    And no deadline is scheduled
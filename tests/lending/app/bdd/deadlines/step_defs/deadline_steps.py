@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+
+from protean import UnitOfWork, current_domain, g
+from protean.exceptions import ExpectedVersionError
+from pytest_bdd import given, then, when
+
+from lending import (
+    CheckoutStatus,
+    DailySheetService,
+    Deadline,
+    HoldStatus,
+    HoldType,
+    Patron,
+    checkout,
+    place_hold,
+)
+from lending.app.deadlines import fire_due_deadlines
+
+
+def _refreshed_patron():
+    return current_domain.repository_for(Patron).get(g.current_user.id)
+
+
+@given("a patron has an active hold")
+def patron_with_active_hold(patron, book):
+    g.current_user = patron
+    g.current_book = book
+
+    with UnitOfWork():
+        refreshed_patron = _refreshed_patron()
+        place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+@given("a patron has a hold that expired yesterday")
+def patron_with_hold_expired_yesterday(patron, book):
+    patron_with_active_hold(patron, book)
+
+    with UnitOfWork():
+        refreshed_patron = _refreshed_patron()
+        refreshed_patron.holds[0].expires_on = date.today() - timedelta(days=1)
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+    deadline_repo = current_domain.repository_for(Deadline)
+    deadline = deadline_repo.get(refreshed_patron.holds[0].id)
+    deadline.fire_on = date.today()
+    deadline_repo.add(deadline)
+
+
+@given("a patron has checked out a book")
+def patron_with_checkout(patron, book):
+    g.current_user = patron
+    g.current_book = book
+
+    with UnitOfWork():
+        refreshed_patron = _refreshed_patron()
+        checkout(refreshed_patron, book, "1")()
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+@given("a patron has a checkout that fell due yesterday")
+def patron_with_checkout_due_yesterday(patron, book):
+    patron_with_checkout(patron, book)
+
+    with UnitOfWork():
+        refreshed_patron = _refreshed_patron()
+        refreshed_patron.checkouts[0].due_on = date.today() - timedelta(days=1)
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+    deadline_repo = current_domain.repository_for(Deadline)
+    deadline = deadline_repo.get(refreshed_patron.checkouts[0].id)
+    deadline.fire_on = date.today()
+    deadline_repo.add(deadline)
+
+
+@when("the patron cancels the hold")
+def patron_cancels_hold():
+    with UnitOfWork():
+        refreshed_patron = _refreshed_patron()
+        refreshed_patron.cancel_hold(refreshed_patron.holds[0].id)
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+@when("the patron returns the book")
+def patron_returns_book():
+    with UnitOfWork():
+        refreshed_patron = _refreshed_patron()
+        refreshed_patron.return_book(g.current_book.id)
+        current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+@when("the scheduler fires due deadlines")
+def scheduler_fires_due_deadlines():
+    fire_due_deadlines()
+
+
+@when("the scheduler fires due deadlines while the patron is changed elsewhere")
+def scheduler_fires_due_deadlines_on_stale_patron(monkeypatch):
+    def changed_elsewhere(self):
+        raise ExpectedVersionError("Patron was changed by another writer")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(DailySheetService, "run", changed_elsewhere)
+        report = fire_due_deadlines()
+
+    assert report.failures == 1
+
+
+@then("a deadline is scheduled for the day after the hold expires")
+def deadline_scheduled_for_hold():
+    hold = _refreshed_patron().holds[0]
+    deadline = current_domain.repository_for(Deadline).get(hold.id)
+    assert deadline.fire_on == hold.expires_on + timedelta(days=1)
+
+
+@then("a deadline is scheduled for the day after the checkout is due")
+def deadline_scheduled_for_checkout():
+    checkout = _refreshed_patron().checkouts[0]
+    deadline = current_domain.repository_for(Deadline).get(checkout.id)
+    assert deadline.fire_on == checkout.due_on + timedelta(days=1)
+
+
+@then("no deadline is scheduled")
+def no_deadline_scheduled():
+    assert current_domain.repository_for(Deadline)._dao.query.all().total == 0
+
+
+@then("the hold is marked as expired")
+def hold_marked_expired():
+    assert _refreshed_patron().holds[0].status == HoldStatus.EXPIRED.value
+
+
+@then("the hold is still active")
+def hold_still_active():
+    assert _refreshed_patron().holds[0].status == HoldStatus.ACTIVE.value
+
+
+@then("the checkout is marked as overdue")
+def checkout_marked_overdue():
+    assert _refreshed_patron().checkouts[0].status == CheckoutStatus.OVERDUE.value
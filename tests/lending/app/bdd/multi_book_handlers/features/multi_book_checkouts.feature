@@ -0,0 +1,27 @@
+Feature: Check out and return several books at once
+
+  Scenario: Patron checks out several books at the desk
+    Given a regular patron brings three circulating books to the desk
+    When the patron checks out the books
+    Then each book is checked out
+    And the patron is saved once
+
+  Scenario: Restricted book is rejected among books checked out
+    Given a regular patron brings two circulating books and a restricted book to the desk
+    When the patron checks out the books
+    Then the circulating books are checked out
+    And the checkout of the restricted book is rejected
+    And the patron is saved once
+
+  Scenario: Books in the drop box are returned
+    Given a patron has checked out three books
+    When the books are returned through the drop box
+    Then each book is returned
+    And the patron is saved once
+
+  Scenario: Book not checked out is rejected among books returned
+    Given a patron has checked out three books
+    When the books and a book not checked out are returned through the drop box
+    Then each book is returned
+    And the return of the book not checked out is rejected
+    And the patron is saved once
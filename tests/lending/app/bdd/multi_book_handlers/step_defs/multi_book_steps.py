@@ -0,0 +1,135 @@
+from protean import current_domain, g
+from pytest_bdd import given, then, when
+
+from lending import (
+    Book,
+    CheckoutBooks,
+    CheckoutStatus,
+    Patron,
+    ReturnBooks,
+)
+
+
+def _events_of(patron_id, event_name):
+    return [
+        message
+        for message in current_domain.event_store.store.read(
+            f"library::patron-{patron_id}"
+        )
+        if message.metadata.type == f"Library.{event_name}.v1"
+    ]
+
+
+def _saved_version():
+    return current_domain.repository_for(Patron).get(g.current_user.id)._version
+
+
+@given("a regular patron brings three circulating books to the desk")
+def patron_brings_circulating_books(regular_patron, five_books):
+    g.current_user = regular_patron
+    g.current_books = five_books[:3]
+    g.version = _saved_version()
+
+
+@given(
+    "a regular patron brings two circulating books and a restricted book to the desk"
+)
+def patron_brings_a_restricted_book(regular_patron, five_books, restricted_book):
+    g.current_user = regular_patron
+    g.current_books = five_books[:2]
+    g.rejected_book = restricted_book
+    g.version = _saved_version()
+
+
+@given("a patron has checked out three books")
+def patron_has_checked_out_books(regular_patron, five_books):
+    g.current_user = regular_patron
+    g.current_books = five_books[:3]
+    current_domain.process(
+        CheckoutBooks(
+            patron_id=regular_patron.id,
+            book_ids=[book.id for book in g.current_books],
+            branch_id="1",
+        )
+    )
+    g.version = _saved_version()
+
+
+@when("the patron checks out the books")
+def patron_checks_out_books():
+    books = g.current_books + ([g.rejected_book] if hasattr(g, "rejected_book") else [])
+    current_domain.process(
+        CheckoutBooks(
+            patron_id=g.current_user.id,
+            book_ids=[book.id for book in books],
+            branch_id="1",
+        )
+    )
+
+
+@when("the books are returned through the drop box")
+def books_returned_through_drop_box():
+    current_domain.process(
+        ReturnBooks(
+            patron_id=g.current_user.id,
+            book_ids=[book.id for book in g.current_books],
+        )
+    )
+
+
+@when("the books and a book not checked out are returned through the drop box")
+def books_and_another_returned_through_drop_box():
+    g.rejected_book = Book(isbn="9780306406157")
+    current_domain.repository_for(Book).add(g.rejected_book)
+
+    current_domain.process(
+        ReturnBooks(
+            patron_id=g.current_user.id,
+            book_ids=[book.id for book in g.current_books] + [g.rejected_book.id],
+        )
+    )
+
+
+@then("each book is checked out")
+@then("the circulating books are checked out")
+def books_checked_out():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert sorted(checkout.book_id for checkout in patron.checkouts) == sorted(
+        book.id for book in g.current_books
+    )
+
+    events = _events_of(g.current_user.id, "BookCheckedOut")
+    assert sorted(event.data["book_id"] for event in events) == sorted(
+        book.id for book in g.current_books
+    )
+
+
+@then("the checkout of the restricted book is rejected")
+def restricted_book_rejected():
+    (event,) = _events_of(g.current_user.id, "BookCheckoutRejected")
+    assert event.data["book_id"] == g.rejected_book.id
+    assert event.data["reasons"] == {
+        "restricted": ["Regular patron cannot place a hold on a restricted book"]
+    }
+
+
+@then("each book is returned")
+def books_returned():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert [checkout.status for checkout in patron.checkouts] == [
+        CheckoutStatus.RETURNED.value
+    ] * len(g.current_books)
+
+    assert len(_events_of(g.current_user.id, "BookReturned")) == len(g.current_books)
+
+
+@then("the return of the book not checked out is rejected")
+def return_rejected():
+    (event,) = _events_of(g.current_user.id, "BookReturnRejected")
+    assert event.data["book_id"] == g.rejected_book.id
+    assert event.data["reasons"] == {"checkout": ["Checkout does not exist"]}
+
+
+@then("the patron is saved once")
+def patron_saved_once():
+    assert _saved_version() == g.version + 1
@@ -0,0 +1,30 @@
+Feature: Share the processing of patron events between server workers
+
+  Scenario: Workers split the partitions of the category between them
+    Given two workers of the server
+    When the workers rebalance
+    Then each worker holds half of the partitions
+
+  Scenario: Workers project the events of the partitions they hold
+    Given several patrons have active holds
+    And the daily sheet has been cleared
+    And two workers of the server
+    When the workers rebalance
+    And the workers process pending events
+    Then the daily sheet contains a record for each patron
+    And the partitions are read up to the last patron event
+
+  Scenario: A worker shutting down hands its partitions over
+    Given several patrons have active holds
+    And two workers of the server
+    And the workers have processed pending events
+    When the first worker shuts down
+    And the second worker rebalances
+    Then the second worker holds all the partitions
+    And the partitions are read up to the last patron event
+
+  Scenario: The partitions of a worker that stopped renewing are taken over
+    Given two workers of the server
+    And the workers have rebalanced
+    When the second worker rebalances after the leases run out
+    Then the second worker holds all the partitions
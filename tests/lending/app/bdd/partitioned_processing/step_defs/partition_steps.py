@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from protean import UnitOfWork, current_domain, g
+from protean.utils import fqn
+from pytest_bdd import given, then, when
+
+from lending import HoldSheet, HoldType, Patron, place_hold
+from lending.app.dailysheet import DailySheetManager
+from lending.server import LendingEngine, PartitionedSubscription
+
+
+def _partitions():
+    return current_domain.config["custom"]["PATRON_PARTITIONS"]
+
+
+def _rebalance(now=None):
+    # Twice, so that partitions released by one worker are claimed by the other
+    for _ in range(2):
+        for worker in g.workers:
+            worker.rebalance(now)
+
+
+def _process():
+    for worker in g.workers:
+        asyncio.get_event_loop().run_until_complete(worker.tick())
+
+
+@given("several patrons have active holds")
+def patrons_with_active_holds(five_books):
+    g.current_users = []
+    for book in five_books:
+        patron = Patron()
+        current_domain.repository_for(Patron).add(patron)
+
+        with UnitOfWork():
+            refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+            place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+            current_domain.repository_for(Patron).add(refreshed_patron)
+
+        g.current_users.append(patron)
+
+
+@given("two workers of the server")
+def two_workers():
+    engine = LendingEngine(current_domain, test_mode=True, workers=["w1", "w2"])
+    g.workers = [
+        subscription
+        for subscription in engine._subscriptions.values()
+        if isinstance(subscription, PartitionedSubscription)
+        and subscription.subscriber_id == fqn(DailySheetManager)
+    ]
+    assert [worker.worker_id for worker in g.workers] == ["w1", "w2"]
+
+
+@given("the workers have rebalanced")
+@when("the workers rebalance")
+def workers_rebalance():
+    _rebalance()
+
+
+@given("the workers have processed pending events")
+def workers_have_processed_pending_events():
+    _rebalance()
+    _process()
+
+
+@when("the workers process pending events")
+def workers_process_pending_events():
+    _process()
+
+
+@when("the first worker shuts down")
+def first_worker_shuts_down():
+    asyncio.get_event_loop().run_until_complete(g.workers[0].shutdown())
+
+
+@when("the second worker rebalances")
+def second_worker_rebalances():
+    g.workers[1].rebalance()
+
+
+@when("the second worker rebalances after the leases run out")
+def second_worker_rebalances_later():
+    g.workers[1].rebalance(time.time() + g.workers[1].lease_seconds + 1)
+
+
+@then("each worker holds half of the partitions")
+def each_worker_holds_half():
+    first, second = (set(worker.positions) for worker in g.workers)
+    assert len(first) == len(second) == _partitions() // 2
+    assert first | second == set(range(_partitions()))
+
+
+@then("the second worker holds all the partitions")
+def second_worker_holds_all():
+    assert set(g.workers[1].positions) == set(range(_partitions()))
+
+
+@then("the daily sheet contains a record for each patron")
+def daily_sheet_contains_each_patron():
+    for patron in g.current_users:
+        records = (
+            current_domain.repository_for(HoldSheet)
+            ._dao.query.filter(patron_id=patron.id)
+            .all()
+        )
+        assert records.total == 1
+
+
+@then("the partitions are read up to the last patron event")
+def partitions_read_to_last_event():
+    last_message = current_domain.event_store.store.read("library::patron")[-1]
+    for worker in g.workers:
+        assert all(
+            position == last_message.global_position
+            for position in worker.positions.values()
+        )
@@ -0,0 +1,38 @@
+Feature: Compact patron fact events
+
+  Scenario: System compacts the fact events of a patron
+    Given a patron has placed two holds and cancelled one
+    When the system compacts patron fact events
+    Then the compacted segment has one fact event for the patron
+    And the fact event has the latest state of the patron
+    And the compacted segment has every domain event of the patron
+
+  Scenario: System compacts the fact events of each patron in turn
+    Given a patron has placed two holds and cancelled one
+    And another patron has placed a hold
+    When the system compacts patron fact events
+    Then the compacted segment has one fact event for each patron
+    And the fact events follow every domain event
+
+  Scenario: System folds delta fact events when compacting
+    Given patron fact events are deltas
+    And a patron has placed two holds and cancelled one
+    When the system compacts patron fact events
+    Then the compacted segment has one fact event for the patron
+    And the fact event has the latest state of the patron
+
+  Scenario: System compacts the previous segment with the events after it
+    Given a patron has placed two holds and cancelled one
+    And the system has compacted patron fact events
+    And the patron has placed another hold
+    When the system compacts patron fact events
+    Then the compacted segment has one fact event for the patron
+    And the fact event has the latest state of the patron
+    And the compacted segment has every domain event of the patron
+    And reading the compacted category yields every domain event of the patron once
+
+  Scenario: Compaction without new events writes no segment
+    Given a patron has placed two holds and cancelled one
+    And the system has compacted patron fact events
+    When the system compacts patron fact events
+    Then only one compacted segment has been written
@@ -0,0 +1,139 @@
+from protean import UnitOfWork, current_domain, g
+from pytest_bdd import given, then, when
+
+from lending import HoldType, Patron, place_hold
+from lending.app.compaction import (
+    SEGMENTS_STREAM,
+    compact_patron_facts,
+    latest_segment,
+    read_compacted,
+)
+
+
+def _place_hold(patron, book):
+    repo = current_domain.repository_for(Patron)
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+        repo.add(refreshed_patron)
+
+
+def _segment_messages():
+    return current_domain.event_store.store.read(
+        latest_segment()["stream"], no_of_messages=10_000
+    )
+
+
+def _domain_events(messages):
+    stream = f"library::patron-{g.current_user.id}"
+    return [
+        (message.type, message.data["hold_id"])
+        for message in messages
+        if message.metadata.stream == stream
+    ]
+
+
+@given("patron fact events are deltas")
+def patron_fact_events_are_deltas(monkeypatch):
+    monkeypatch.setitem(current_domain.config["custom"], "PATRON_FACT_EVENTS", "delta")
+
+
+@given("a patron has placed two holds and cancelled one")
+def patron_placed_two_holds_and_cancelled_one(patron, five_books):
+    g.current_user = patron
+    for book in five_books[:2]:
+        _place_hold(patron, book)
+
+    repo = current_domain.repository_for(Patron)
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        refreshed_patron.cancel_hold(refreshed_patron.holds[0].id)
+        repo.add(refreshed_patron)
+
+
+@given("the patron has placed another hold")
+def patron_placed_another_hold(five_books):
+    _place_hold(g.current_user, five_books[2])
+
+
+@given("another patron has placed a hold")
+def another_patron_placed_a_hold(five_books):
+    other_patron = Patron()
+    current_domain.repository_for(Patron).add(other_patron)
+    _place_hold(other_patron, five_books[3])
+    g.current_users = [g.current_user, other_patron]
+
+
+@given("the system has compacted patron fact events")
+@when("the system compacts patron fact events")
+def system_compacts_patron_fact_events():
+    compact_patron_facts(batch_size=2)
+
+
+@then("the compacted segment has one fact event for the patron")
+def segment_has_one_fact_event():
+    stream = f"library::patron-fact-{g.current_user.id}"
+    facts = [
+        message for message in _segment_messages() if message.metadata.stream == stream
+    ]
+    assert len(facts) == 1
+    g.current_fact = facts[0]
+
+
+@then("the compacted segment has one fact event for each patron")
+def segment_has_one_fact_event_per_patron():
+    facts = [
+        message.metadata.stream
+        for message in _segment_messages()
+        if message.metadata.stream.startswith("library::patron-fact-")
+    ]
+    assert sorted(facts) == sorted(
+        f"library::patron-fact-{patron.id}" for patron in g.current_users
+    )
+
+
+@then("the fact events follow every domain event")
+def fact_events_follow_domain_events():
+    is_fact = [
+        message.metadata.stream.startswith("library::patron-fact-")
+        for message in _segment_messages()
+    ]
+    assert is_fact == sorted(is_fact)
+
+
+@then("the fact event has the latest state of the patron")
+def fact_event_has_latest_state():
+    fact = g.current_fact.to_object().payload
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+
+    assert fact["_version"] == patron._version
+    assert fact["active_holds"] == patron.active_holds
+    assert {hold["id"]: hold["status"] for hold in fact["holds"]} == {
+        hold.id: hold.status for hold in patron.holds
+    }
+
+
+@then("the compacted segment has every domain event of the patron")
+def segment_has_every_domain_event():
+    raw = current_domain.event_store.store.read(
+        f"library::patron-{g.current_user.id}", no_of_messages=10_000
+    )
+    assert _domain_events(_segment_messages()) == _domain_events(raw)
+
+
+@then("reading the compacted category yields every domain event of the patron once")
+def compacted_category_yields_every_domain_event_once():
+    raw = current_domain.event_store.store.read(
+        f"library::patron-{g.current_user.id}", no_of_messages=10_000
+    )
+    compacted = [
+        message for messages in read_compacted(batch_size=2) for message in messages
+    ]
+    assert _domain_events(compacted) == _domain_events(raw)
+    assert len(_domain_events(raw)) == 4
+
+
+@then("only one compacted segment has been written")
+def only_one_segment_written():
+    segments = current_domain.event_store.store._read(SEGMENTS_STREAM)
+    assert len(segments) == 1
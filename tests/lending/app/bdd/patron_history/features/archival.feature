@@ -0,0 +1,37 @@
+Feature: Archive ended holds and checkouts out of the patron
+
+  Scenario: System archives a checkout returned long ago
+    Given a patron returned a book 40 days ago
+    When the system archives patron history
+    Then the patron no longer has the checkout
+    And the patron's checkout history lists the returned checkout
+
+  Scenario: System archives ended holds and keeps active holds
+    Given a patron has an active hold and a hold cancelled 40 days ago
+    When the system archives patron history
+    Then the patron only has the active hold
+    And the patron's hold history lists the cancelled hold
+
+  Scenario: System keeps recently ended items on the patron
+    Given a patron returned a book yesterday
+    When the system archives patron history
+    Then the patron still has the returned checkout
+    And the patron's checkout history is empty
+
+  Scenario: System dates holds by when they ended
+    Given a patron cancelled yesterday a hold requested 40 days ago
+    When the system archives patron history
+    Then the patron still has the cancelled hold
+    And the patron's hold history is empty
+
+  Scenario: System dates holds ended before their end was recorded by their last event
+    Given a patron cancelled a hold before its end was recorded
+    When the system archives patron history
+    Then the patron still has the cancelled hold
+    And the patron's hold history is empty
+
+  Scenario: System archives holds ended before their end was recorded
+    Given a patron cancelled a hold before its end was recorded
+    When the system archives patron history ended before tomorrow
+    Then the patron only has the active hold
+    And the patron's hold history lists the cancelled hold
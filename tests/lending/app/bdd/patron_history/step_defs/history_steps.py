@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+
+from protean import UnitOfWork, current_domain, g
+from pytest_bdd import given, then, when
+from pytest_bdd.parsers import cfparse
+
+from lending import (
+    CheckoutHistory,
+    HoldHistory,
+    HoldStatus,
+    HoldType,
+    Patron,
+    checkout,
+    place_hold,
+)
+from lending.app.history import archive_patron_history
+
+
+def _return_a_book(patron, book, days):
+    g.current_user = patron
+    repo = current_domain.repository_for(Patron)
+
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        checkout(refreshed_patron, book, "1")()
+        repo.add(refreshed_patron)
+
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        refreshed_patron.return_book(book.id)
+        repo.add(refreshed_patron)
+
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.checkouts[0].returned_at = datetime.now() - timedelta(days=days)
+    repo.add(refreshed_patron)
+
+    g.current_checkout_id = refreshed_patron.checkouts[0].id
+
+
+@given(cfparse("a patron returned a book {days:d} days ago"))
+def patron_returned_a_book_days_ago(patron, book, days):
+    _return_a_book(patron, book, days)
+
+
+@given("a patron returned a book yesterday")
+def patron_returned_a_book_yesterday(patron, book):
+    _return_a_book(patron, book, 1)
+
+
+def _cancel_a_hold(patron, five_books, requested_days, ended_days):
+    g.current_user = patron
+    repo = current_domain.repository_for(Patron)
+
+    for book in five_books[:2]:
+        with UnitOfWork():
+            refreshed_patron = repo.get(patron.id)
+            place_hold(refreshed_patron, book, "1", HoldType.CLOSED_ENDED.value)()
+            repo.add(refreshed_patron)
+
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        hold = refreshed_patron.get_one_from_holds(book_id=five_books[0].id)
+        refreshed_patron.cancel_hold(hold.id)
+        repo.add(refreshed_patron)
+
+    refreshed_patron = repo.get(patron.id)
+    hold = refreshed_patron.get_one_from_holds(book_id=five_books[0].id)
+    hold.requested_at = datetime.now() - timedelta(days=requested_days)
+    hold.ended_at = datetime.now() - timedelta(days=ended_days)
+    repo.add(refreshed_patron)
+
+    g.current_hold_id = hold.id
+
+
+@given("a patron has an active hold and a hold cancelled 40 days ago")
+def patron_with_active_and_cancelled_holds(patron, five_books):
+    _cancel_a_hold(patron, five_books, 40, 40)
+
+
+@given("a patron cancelled yesterday a hold requested 40 days ago")
+def patron_cancelled_an_old_hold_yesterday(patron, five_books):
+    _cancel_a_hold(patron, five_books, 40, 1)
+
+
+@given("a patron cancelled a hold before its end was recorded")
+def patron_cancelled_a_hold_before_end_recorded(patron, five_books):
+    _cancel_a_hold(patron, five_books, 40, 40)
+
+    repo = current_domain.repository_for(Patron)
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.get_one_from_holds(id=g.current_hold_id).ended_at = None
+    repo.add(refreshed_patron)
+
+
+@when("the system archives patron history")
+def system_archives_patron_history():
+    archive_patron_history()
+
+
+@when("the system archives patron history ended before tomorrow")
+def system_archives_patron_history_before_tomorrow():
+    archive_patron_history(before=datetime.now() + timedelta(days=1))
+
+
+@then("the patron no longer has the checkout")
+def patron_no_longer_has_checkout():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert patron.checkouts == []
+
+
+@then("the patron still has the returned checkout")
+def patron_still_has_returned_checkout():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert [checkout.id for checkout in patron.checkouts] == [g.current_checkout_id]
+
+
+@then("the patron's checkout history lists the returned checkout")
+def checkout_history_lists_returned_checkout():
+    history = list(
+        current_domain.repository_for(CheckoutHistory).for_patron(g.current_user.id)
+    )
+    assert [record.id for record in history] == [g.current_checkout_id]
+    assert history[0].status == "RETURNED"
+
+
+@then("the patron's checkout history is empty")
+def checkout_history_is_empty():
+    history = current_domain.repository_for(CheckoutHistory).for_patron(
+        g.current_user.id
+    )
+    assert list(history) == []
+
+
+@then("the patron only has the active hold")
+def patron_only_has_active_hold():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert [hold.status for hold in patron.holds] == [HoldStatus.ACTIVE.value]
+
+
+@then("the patron still has the cancelled hold")
+def patron_still_has_cancelled_hold():
+    patron = current_domain.repository_for(Patron).get(g.current_user.id)
+    assert g.current_hold_id in [hold.id for hold in patron.holds]
+
+
+@then("the patron's hold history is empty")
+def hold_history_is_empty():
+    history = current_domain.repository_for(HoldHistory).for_patron(g.current_user.id)
+    assert list(history) == []
+
+
+@then("the patron's hold history lists the cancelled hold")
+def hold_history_lists_cancelled_hold():
+    history = list(
+        current_domain.repository_for(HoldHistory).for_patron(g.current_user.id)
+    )
+    assert [record.id for record in history] == [g.current_hold_id]
+    assert history[0].status == HoldStatus.CANCELLED.value
+    assert history[0].ended_at is not None
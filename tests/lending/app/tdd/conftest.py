@@ -0,0 +1,45 @@
+import pytest
+from protean import current_domain
+from sqlalchemy import event
+
+
+@pytest.fixture
+def postgres_provider():
+    provider = current_domain.providers["default"]
+    if provider.conn_info["provider"] != "postgresql":
+        pytest.skip("Query plans are only checked on PostgreSQL")
+
+    return provider
+
+
+@pytest.fixture
+def captured_statements(postgres_provider):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = postgres_provider._engine
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def query_plans(postgres_provider, captured_statements):
+    """Plans of the SELECT statements run so far in the test"""
+
+    def plans() -> list[str]:
+        found = []
+        with postgres_provider._engine.connect() as conn:
+            # Tables are near empty in tests, so make the planner prefer any
+            #   usable index
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            for statement, parameters in captured_statements:
+                rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+                found.append("\n".join(row[0] for row in rows))
+
+        return found
+
+    return plans
@@ -0,0 +1,163 @@
+"""This test file contains tests for processing checkout, hold and return
+commands in batches grouped by patron
+"""
+
+import pytest
+from protean import current_domain
+from protean.exceptions import IncorrectUsageError, ObjectNotFoundError
+
+from lending import (
+    Book,
+    CancelHold,
+    CheckoutBook,
+    Patron,
+    PlaceHold,
+    ReturnBook,
+)
+from lending.app.patron.batch import process_batch
+
+
+@pytest.fixture
+def patron_calls(monkeypatch):
+    """Count loads and saves of patrons"""
+    calls = {"get": 0, "add": 0}
+    repository_cls = type(current_domain.repository_for(Patron))
+
+    def counting(name):
+        method = getattr(repository_cls, name)
+
+        def counted(self, *args):
+            calls[name] += 1
+            return method(self, *args)
+
+        return counted
+
+    for name in calls:
+        monkeypatch.setattr(repository_cls, name, counting(name))
+
+    return calls
+
+
+def hold(patron, book, hold_type="CLOSED_ENDED"):
+    return PlaceHold(
+        patron_id=patron.id, book_id=book.id, branch_id="1", hold_type=hold_type
+    )
+
+
+def checkout(patron, book):
+    return CheckoutBook(patron_id=patron.id, book_id=book.id, branch_id="1")
+
+
+def return_(patron, book):
+    return ReturnBook(patron_id=patron.id, book_id=book.id)
+
+
+def test_commands_of_a_patron_share_one_load_and_one_save(
+    patron, five_books, patron_calls
+):
+    books = five_books[:3]
+    commands = [
+        *(hold(patron, book) for book in books),
+        *(checkout(patron, book) for book in books),
+        return_(patron, books[0]),
+    ]
+
+    results = process_batch(commands)
+
+    assert [result.succeeded for result in results] == [True] * 7
+    assert patron_calls == {"get": 1, "add": 1}
+
+    refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+    assert refreshed_patron._version == patron._version + 1
+    assert refreshed_patron.active_holds == 0
+    assert [checkout.status for checkout in refreshed_patron.checkouts] == [
+        "RETURNED",
+        "ACTIVE",
+        "ACTIVE",
+    ]
+    for book in books:
+        assert current_domain.repository_for(Book).get(book.id).status == "ON_HOLD"
+
+
+def test_rejected_commands_fail_alone(regular_patron, five_books):
+    results = process_batch(
+        [
+            hold(regular_patron, five_books[0]),
+            hold(regular_patron, five_books[1], hold_type="OPEN_ENDED"),
+            return_(regular_patron, five_books[2]),
+            hold(regular_patron, five_books[0]),
+            checkout(regular_patron, five_books[0]),
+        ]
+    )
+
+    assert [result.succeeded for result in results] == [
+        True,
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert results[1].error.messages == {
+        "hold_type": ["Regular patrons cannot place open-ended holds"]
+    }
+    assert results[2].error.messages == {"checkout": ["Checkout does not exist"]}
+    # Placed on hold by the first command
+    assert results[3].error.messages == {"book": ["Book is already on hold"]}
+
+    refreshed_patron = current_domain.repository_for(Patron).get(regular_patron.id)
+    assert len(refreshed_patron.holds) == 1
+    assert len(refreshed_patron.checkouts) == 1
+
+
+def test_results_follow_the_order_of_commands_across_patrons(five_books):
+    patrons = [Patron(), Patron()]
+    for patron in patrons:
+        current_domain.repository_for(Patron).add(patron)
+
+    commands = [
+        hold(patrons[0], five_books[0]),
+        hold(patrons[1], five_books[1]),
+        checkout(patrons[0], five_books[0]),
+        hold(patrons[1], five_books[0]),
+        return_(patrons[1], five_books[1]),
+    ]
+
+    results = process_batch(commands)
+
+    assert [result.command for result in results] == commands
+    assert [result.succeeded for result in results] == [
+        True,
+        True,
+        True,
+        False,  # Placed on hold for the first patron
+        False,
+    ]
+
+
+def test_commands_for_a_missing_book_or_patron_fail(patron, book):
+    missing_patron = Patron()
+
+    results = process_batch(
+        [
+            hold(patron, Book(isbn="9780306406157")),
+            hold(patron, book),
+            hold(missing_patron, book),
+            checkout(missing_patron, book),
+        ]
+    )
+
+    assert [result.succeeded for result in results] == [False, True, False, False]
+    assert all(
+        isinstance(result.error, ObjectNotFoundError)
+        for result in results
+        if not result.succeeded
+    )
+
+
+def test_other_commands_cannot_be_batched(patron, book):
+    with pytest.raises(IncorrectUsageError):
+        process_batch(
+            [hold(patron, book), CancelHold(patron_id=patron.id, hold_id="1")]
+        )
+
+    assert current_domain.repository_for(Book).get(book.id).status == "AVAILABLE"
@@ -0,0 +1,105 @@
+"""This test file contains tests for loading the patron and book of a command at
+the same time
+"""
+
+from threading import Barrier, current_thread
+
+import pytest
+from protean import UnitOfWork, current_domain
+from protean.exceptions import ObjectNotFoundError
+
+from lending import Book, Patron, PlaceHold
+from lending.utils.concurrency import load_concurrently
+from lending.utils.identity_map import identity_map_stats
+
+
+@pytest.fixture
+def loads_meet(monkeypatch, concurrent_loads):
+    """Hold the first two loads until both are running, which fails after a
+    timeout unless they run at the same time. Returns the threads that ran
+    them.
+    """
+    barrier = Barrier(2, timeout=5)
+    threads = []
+
+    for aggregate_cls in (Patron, Book):
+        repository_cls = type(current_domain.repository_for(aggregate_cls))
+
+        def get(self, identifier, get=repository_cls.get):
+            if len(threads) < 2:
+                threads.append(current_thread().name)
+                barrier.wait()
+            return get(self, identifier)
+
+        monkeypatch.setattr(repository_cls, "get", get)
+
+    return threads
+
+
+@pytest.fixture
+def concurrent_loads(monkeypatch):
+    monkeypatch.setitem(current_domain.config["custom"], "CONCURRENT_LOADS", True)
+
+
+def test_patron_and_book_are_loaded_at_the_same_time(patron, book, loads_meet):
+    loaded_patron, loaded_book = load_concurrently((Patron, patron.id), (Book, book.id))
+
+    assert (loaded_patron.id, loaded_book.id) == (patron.id, book.id)
+    assert loads_meet[0] != loads_meet[1]
+    assert current_thread().name in loads_meet
+
+
+def test_loaded_aggregates_join_the_unit_of_work(patron, book, concurrent_loads):
+    with UnitOfWork() as uow:
+        loaded_patron, loaded_book = load_concurrently(
+            (Patron, patron.id), (Book, book.id)
+        )
+
+        assert current_domain.repository_for(Book).get(book.id) is loaded_book
+        assert current_domain.repository_for(Patron).get(patron.id) is loaded_patron
+
+    assert identity_map_stats(uow) == {"hits": 2, "misses": 2}
+
+
+def test_aggregates_already_loaded_are_returned_as_they_are(
+    patron, book, concurrent_loads
+):
+    with UnitOfWork():
+        book_in_uow = current_domain.repository_for(Book).get(book.id)
+
+        _, loaded_book = load_concurrently((Patron, patron.id), (Book, book.id))
+
+        assert loaded_book is book_in_uow
+
+
+def test_error_of_the_first_failed_load_is_raised(patron, book, concurrent_loads):
+    with pytest.raises(ObjectNotFoundError) as exc:
+        load_concurrently((Patron, patron.id), (Book, "unknown"))
+    assert "`Book`" in str(exc.value)
+
+    with pytest.raises(ObjectNotFoundError) as exc:
+        load_concurrently((Patron, "unknown"), (Book, "unknown"))
+    assert "`Patron`" in str(exc.value)
+
+
+def test_aggregates_are_loaded_in_turn_by_default(patron, book):
+    loaded_patron, loaded_book = load_concurrently((Patron, patron.id), (Book, book.id))
+
+    assert (loaded_patron.id, loaded_book.id) == (patron.id, book.id)
+
+
+def test_hold_is_placed_with_concurrent_loads(patron, book, loads_meet):
+    current_domain.process(
+        PlaceHold(
+            patron_id=patron.id,
+            book_id=book.id,
+            branch_id="1",
+            hold_type="CLOSED_ENDED",
+        )
+    )
+
+    assert loads_meet[0] != loads_meet[1]
+    refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+    assert refreshed_patron.holds[0].book_id == book.id
+
+    assert current_domain.repository_for(Book).get(book.id).status == "ON_HOLD"
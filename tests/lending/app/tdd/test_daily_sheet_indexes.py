@@ -0,0 +1,34 @@
+from datetime import date
+
+import pytest
+from protean import current_domain
+
+from lending import DailySheet
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        lambda repo: repo.find_hold_for_patron("patron-1", "hold-1"),
+        lambda repo: repo.find_checkout_for_patron("patron-1", "checkout-1"),
+        lambda repo: list(repo.expiring_holds()),
+        lambda repo: list(repo.checkouts_to_be_marked_overdue()),
+        lambda repo: repo.count_expired_holds(since=date.today()),
+        lambda repo: repo.count_overdue_checkouts(since=date.today()),
+    ],
+    ids=[
+        "find_hold_for_patron",
+        "find_checkout_for_patron",
+        "expiring_holds",
+        "checkouts_to_be_marked_overdue",
+        "count_expired_holds",
+        "count_overdue_checkouts",
+    ],
+)
+def test_daily_sheet_query_does_not_scan_sequentially(query_plans, query):
+    query(current_domain.repository_for(DailySheet))
+
+    plans = query_plans()
+    assert plans
+    for plan in plans:
+        assert "Seq Scan" not in plan, plan
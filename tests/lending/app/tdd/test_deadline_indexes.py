@@ -0,0 +1,12 @@
+from protean import current_domain
+
+from lending.app.deadlines import Deadline
+
+
+def test_due_deadlines_are_read_without_scanning_sequentially(query_plans):
+    current_domain.repository_for(Deadline).due()
+
+    plans = query_plans()
+    assert plans
+    for plan in plans:
+        assert "Seq Scan" not in plan, plan
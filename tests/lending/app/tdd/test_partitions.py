@@ -0,0 +1,60 @@
+"""This test file contains tests for the partitions of `library::patron` and
+their leases to server workers
+"""
+
+import sys
+import time
+
+import pytest
+from protean import current_domain
+
+from lending.app.partitions import PartitionLease, partition_of
+from lending.server import main
+
+
+def test_fact_stream_falls_in_the_partition_of_the_patron():
+    for patron_id in ("1", "b2c8e7a4-53e1-4f3c-9f4a-0d4b1c2e3f5a", "patron-7"):
+        assert partition_of(f"library::patron-fact-{patron_id}", 16) == partition_of(
+            f"library::patron-{patron_id}", 16
+        )
+
+
+def test_a_lease_is_claimed_by_one_worker_until_it_runs_out_or_is_released():
+    leases = current_domain.repository_for(PartitionLease)
+    (lease,) = leases.for_subscriber("subscriber", 1, -1)
+    now = time.time()
+
+    assert leases.claim(lease.id, "w1", now + 15, now)
+    assert not leases.claim(lease.id, "w2", now + 15, now)
+    assert leases.claim(lease.id, "w1", now + 30, now + 10)
+    assert leases.claim(lease.id, "w2", now + 45, now + 31)
+
+    leases.release(lease.id, "w2")
+    assert leases.claim(lease.id, "w1", now + 45, now + 32)
+
+
+def test_only_the_holder_advances_a_lease():
+    leases = current_domain.repository_for(PartitionLease)
+    (lease,) = leases.for_subscriber("subscriber", 1, 3)
+    now = time.time()
+    leases.claim(lease.id, "w1", now + 15, now)
+
+    leases.advance("subscriber", "w2", [0], 9)
+    assert leases.get(lease.id).position == 3
+
+    leases.advance("subscriber", "w1", [0], 9)
+    leases.advance("subscriber", "w1", [0], 5)
+    assert leases.get(lease.id).position == 9
+
+
+def test_server_takes_no_more_workers_than_partitions(monkeypatch, capsys):
+    partitions = current_domain.config["custom"]["PATRON_PARTITIONS"]
+    monkeypatch.setattr(
+        sys, "argv", ["lending.server", "--workers", str(partitions + 1)]
+    )
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 2
+    assert "cannot exceed PATRON_PARTITIONS" in capsys.readouterr().err
@@ -3,9 +3,10 @@ from datetime import timedelta
 
 import pytest
 from faker import Faker
-from protean import current_domain
+from protean import UnitOfWork, current_domain
 
 import lending
+from lending.utils import utc_now
 
 Faker.seed(0)
 fake = Faker()
@@ -59,6 +60,12 @@ def run_around_tests():
     # Drain event stores
     current_domain.event_store.store._data_reset()
 
+    # Empty the aggregate cache
+    from lending.utils.cache import aggregate_cache
+
+    if cache := aggregate_cache():
+        cache.clear()
+
 
 ############
 # FIXTURES #
@@ -115,6 +122,51 @@ def overdue_checkouts_patron(patron):
     return patron
 
 
+@pytest.fixture
+def long_history_patron(patron):
+    """A patron with more active holds than Protean reads at once by default"""
+    # Written straight to the tables, as building and saving the holds through
+    #   the aggregate takes a while on the memory provider
+    with UnitOfWork():
+        dao = current_domain.repository_for(lending.Hold)._dao
+        for index in range(1003):
+            hold = lending.Hold(
+                patron_id=patron.id,
+                book_id=f"book-{index}",
+                branch_id="1",
+                requested_at=utc_now(),
+            )
+            dao._create(dao.model_cls.from_entity(hold))
+
+        current_domain.repository_for(lending.Patron)._dao.query.filter(
+            id=patron.id
+        ).update_all(active_holds=1003)
+
+    return patron
+
+
+@pytest.fixture
+def place_holds():
+    """Place a closed-ended hold on each of `books` for `patron`, saving the
+    patron after each one
+    """
+
+    def place(patron, books):
+        repo = current_domain.repository_for(lending.Patron)
+        for book in books:
+            refreshed_patron = repo.get(patron.id)
+            lending.place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+            repo.add(refreshed_patron)
+
+    return place
+
+
+@pytest.fixture
+def patron_with_holds(patron, five_books, place_holds):
+    place_holds(patron, five_books[:3])
+    return current_domain.repository_for(lending.Patron).get(patron.id)
+
+
 @pytest.fixture
 def book():
     book = lending.Book(
@@ -20,3 +20,11 @@ Feature: Track Checkouts
     And the checkout is beyond its due date
     When the system processes the overdue checkouts
     Then the daily sheet contains the OVERDUE checkout record
+
+  Scenario: A redelivered checkout leaves a returned checkout as it is
+    Given a circulating book is available
+    And a patron is logged in
+    And the patron has checked out a book
+    When the patron returns the book
+    And the patron's BookCheckedOut event is redelivered onto the daily sheet
+    Then the daily sheet contains the RETURNED checkout record
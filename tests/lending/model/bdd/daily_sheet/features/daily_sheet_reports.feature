@@ -0,0 +1,19 @@
+Feature: Report on the daily sheet in constant memory
+
+  Scenario: Expired holds are streamed page by page
+    Given 5 holds expired 3 days ago at branch 1
+    When the expired holds are listed in pages of 2
+    Then all 5 expired holds are listed once
+
+  Scenario: Expired holds are counted by branch and date window
+    Given 3 holds expired 10 days ago at branch 1
+    And 2 holds expired 1 days ago at branch 2
+    Then there are 5 expired holds in all
+    And there are 3 expired holds at branch 1
+    And there are 2 expired holds since 2 days ago
+
+  Scenario: Overdue checkouts are counted by branch and date window
+    Given 2 checkouts fell overdue 10 days ago at branch 1
+    And 1 checkouts fell overdue 1 days ago at branch 1
+    Then there are 3 overdue checkouts at branch 1
+    And there is 1 overdue checkout at branch 1 since 2 days ago
@@ -18,3 +18,16 @@ Feature: Track holds
     And the hold has reached its expiry date
     When the system checks for expiring holds
     Then the daily sheet contains the EXPIRED hold record
+
+  Scenario: Replaying hold events leaves a single daily sheet record
+    Given a patron has an active hold
+    When the patron cancels the hold
+    And the patron's events are replayed onto the daily sheet
+    Then the daily sheet contains the CANCELLED hold record
+    And the daily sheet contains one record for the patron
+
+  Scenario: A redelivered hold placement leaves an ended hold as it is
+    Given a patron has an active hold
+    When the patron cancels the hold
+    And the patron's HoldPlaced event is redelivered onto the daily sheet
+    Then the daily sheet contains the CANCELLED hold record
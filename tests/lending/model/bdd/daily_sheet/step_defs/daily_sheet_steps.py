@@ -1,4 +1,5 @@
 from datetime import date, timedelta
+from uuid import uuid4
 
 import pytest
 from protean import UnitOfWork, current_domain, g
@@ -10,11 +11,13 @@ from lending import (
     Book,
     DailySheet,
     DailySheetService,
+    HoldSheet,
     HoldType,
     Patron,
     checkout,
     place_hold,
 )
+from lending.app.dailysheet import DailySheetManager
 
 
 @pytest.fixture(autouse=True)
@@ -27,6 +30,8 @@ def reset_globals():
         delattr(g, "current_book")
     if hasattr(g, "current_exception"):
         delattr(g, "current_exception")
+    if hasattr(g, "current_records"):
+        delattr(g, "current_records")
 
 
 @given("a circulating book is available")
@@ -166,6 +171,31 @@ def cancel_hold():
         current_domain.repository_for(Patron).add(refreshed_patron)
 
 
+@when("the patron's events are replayed onto the daily sheet")
+def replay_patron_events():
+    messages = current_domain.event_store.store.read(
+        f"library::patron-{g.current_user.id}"
+    )
+    assert messages
+
+    for message in messages:
+        DailySheetManager._handle(message)
+
+
+@when(cfparse("the patron's {event_name} event is redelivered onto the daily sheet"))
+def redeliver_patron_event(event_name):
+    messages = [
+        message
+        for message in current_domain.event_store.store.read(
+            f"library::patron-{g.current_user.id}"
+        )
+        if message.metadata.type == f"Library.{event_name}.v1"
+    ]
+    assert messages
+
+    DailySheetManager._handle(messages[-1])
+
+
 @when("the system checks for expiring holds")
 @when("the system processes the overdue checkouts")
 @when("the system processes the expiring holds")
@@ -284,10 +314,20 @@ def confirm_daily_sheet_contains_checkout(status):
     assert daily_sheet.checkout_status == status
 
 
+@then("the daily sheet contains one record for the patron")
+def confirm_daily_sheet_contains_one_record():
+    records = (
+        current_domain.repository_for(HoldSheet)
+        ._dao.query.filter(patron_id=g.current_user.id)
+        .all()
+    )
+    assert records.total == 1
+
+
 @then("the daily sheet lists all expiring holds")
 def confirm_daily_sheet_contains_all_expiring_holds():
     repo = current_domain.repository_for(DailySheet)
-    daily_sheets = repo.expiring_holds()
+    daily_sheets = list(repo.expiring_holds())
     assert len(daily_sheets) == 1
     assert daily_sheets[0].hold_status == "ACTIVE"
     assert daily_sheets[0].hold_expires_on == date.today() - timedelta(days=1)
@@ -296,7 +336,7 @@ def confirm_daily_sheet_contains_all_expiring_holds():
 @then("the hold statuses are updated to expired")
 def confirm_hold_statuses_are_updated_to_expired():
     repo = current_domain.repository_for(DailySheet)
-    daily_sheets = repo.expired_holds()
+    daily_sheets = list(repo.expired_holds())
     assert len(daily_sheets) == 1
     assert daily_sheets[0].hold_status == "EXPIRED"
 
@@ -304,7 +344,7 @@ def confirm_hold_statuses_are_updated_to_expired():
 @then("the daily sheet lists all overdue checkouts")
 def confirm_daily_sheet_contains_all_overdue_checkouts():
     repo = current_domain.repository_for(DailySheet)
-    daily_sheets = repo.checkouts_to_be_marked_overdue()
+    daily_sheets = list(repo.checkouts_to_be_marked_overdue())
     assert len(daily_sheets) == 1
     assert daily_sheets[0].checkout_status == "ACTIVE"
     assert daily_sheets[0].checkout_due_on == date.today() - timedelta(days=1)
@@ -313,6 +353,96 @@ def confirm_daily_sheet_contains_all_overdue_checkouts():
 @then("the checkouts are marked overdue")
 def confirm_checkouts_are_marked_overdue():
     repo = current_domain.repository_for(DailySheet)
-    daily_sheets = repo.overdue_checkouts()
+    daily_sheets = list(repo.overdue_checkouts())
     assert len(daily_sheets) == 1
     assert daily_sheets[0].checkout_status == "OVERDUE"
+
+
+def _days_ago(days):
+    return date.today() - timedelta(days=days)
+
+
+@given(cfparse("{count:d} holds expired {days:d} days ago at branch {branch_id}"))
+def holds_expired_days_ago(count, days, branch_id):
+    repo = current_domain.repository_for(DailySheet)
+    for _ in range(count):
+        hold_id = str(uuid4())
+        repo.add(
+            DailySheet(
+                id=hold_id,
+                patron_id=str(uuid4()),
+                patron_type="REGULAR",
+                hold_id=hold_id,
+                hold_branch_id=branch_id,
+                hold_status="EXPIRED",
+                hold_expires_on=_days_ago(days),
+            )
+        )
+
+
+@given(
+    cfparse("{count:d} checkouts fell overdue {days:d} days ago at branch {branch_id}")
+)
+def checkouts_overdue_days_ago(count, days, branch_id):
+    repo = current_domain.repository_for(DailySheet)
+    for _ in range(count):
+        checkout_id = str(uuid4())
+        repo.add(
+            DailySheet(
+                id=checkout_id,
+                patron_id=str(uuid4()),
+                patron_type="REGULAR",
+                checkout_id=checkout_id,
+                checkout_branch_id=branch_id,
+                checkout_status="OVERDUE",
+                checkout_due_on=_days_ago(days),
+            )
+        )
+
+
+@when(cfparse("the expired holds are listed in pages of {batch_size:d}"))
+def list_expired_holds_in_pages(batch_size):
+    repo = current_domain.repository_for(DailySheet)
+    g.current_records = list(repo.expired_holds(batch_size=batch_size))
+
+
+@then(cfparse("all {count:d} expired holds are listed once"))
+def confirm_expired_holds_listed_once(count):
+    assert len({record.id for record in g.current_records}) == count
+    assert len(g.current_records) == count
+
+
+@then(cfparse("there are {count:d} expired holds in all"))
+def confirm_expired_holds_count(count):
+    assert current_domain.repository_for(DailySheet).count_expired_holds() == count
+
+
+@then(cfparse("there are {count:d} expired holds at branch {branch_id}"))
+def confirm_expired_holds_count_at_branch(count, branch_id):
+    repo = current_domain.repository_for(DailySheet)
+    assert repo.count_expired_holds(branch_id=branch_id) == count
+
+
+@then(cfparse("there are {count:d} expired holds since {days:d} days ago"))
+def confirm_expired_holds_count_since(count, days):
+    repo = current_domain.repository_for(DailySheet)
+    assert repo.count_expired_holds(since=_days_ago(days)) == count
+
+
+@then(cfparse("there are {count:d} overdue checkouts at branch {branch_id}"))
+def confirm_overdue_checkouts_count_at_branch(count, branch_id):
+    repo = current_domain.repository_for(DailySheet)
+    assert repo.count_overdue_checkouts(branch_id=branch_id) == count
+
+
+@then(
+    cfparse(
+        "there is {count:d} overdue checkout at branch {branch_id} since {days:d} days ago"
+    )
+)
+def confirm_overdue_checkouts_count_at_branch_since(count, branch_id, days):
+    repo = current_domain.repository_for(DailySheet)
+    assert (
+        repo.count_overdue_checkouts(branch_id=branch_id, since=_days_ago(days))
+        == count
+    )
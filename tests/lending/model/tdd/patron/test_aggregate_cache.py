@@ -0,0 +1,108 @@
+"""This test file contains tests for the versioned read-through cache of `Book`
+and `Patron`
+"""
+
+import pytest
+from protean import UnitOfWork, current_domain
+
+from lending import Book, BookStatus, Patron, checkout, place_hold
+from lending.utils.cache import aggregate_cache
+
+
+@pytest.fixture(autouse=True)
+def cached_aggregates(monkeypatch):
+    monkeypatch.setitem(current_domain.config["custom"], "AGGREGATE_CACHE", True)
+
+    yield
+
+    aggregate_cache().clear()
+
+
+def test_book_is_read_from_storage_once(book):
+    repo = current_domain.repository_for(Book)
+
+    first = repo.get(book.id)
+    second = repo.get(book.id)
+
+    assert second is not first
+    assert second.to_dict() == first.to_dict()
+    assert second.state_.is_persisted and not second.state_.is_changed
+
+    metrics = aggregate_cache().metrics()
+    assert (metrics["hits"], metrics["misses"]) == (1, 1)
+    assert metrics["hit_ratio"] == 0.5
+
+
+def test_saved_book_is_read_again(book):
+    repo = current_domain.repository_for(Book)
+    refreshed_book = repo.get(book.id)
+    refreshed_book.status = BookStatus.ON_HOLD.value
+    repo.add(refreshed_book)
+
+    assert repo.get(book.id).status == BookStatus.ON_HOLD.value
+    assert repo.get(book.id)._version == refreshed_book._version
+    assert aggregate_cache().metrics()["invalidations"] == 2  # Created and saved
+
+
+def test_state_read_before_a_save_commits_is_not_cached(book):
+    repo = current_domain.repository_for(Book)
+    stale_book = repo.get(book.id)
+
+    with UnitOfWork():
+        refreshed_book = repo.get(book.id)
+        refreshed_book.status = BookStatus.ON_HOLD.value
+        repo.add(refreshed_book)
+
+        # Read by another process before the commit
+        assert not aggregate_cache().put(
+            Book, book.id, stale_book._version, stale_book.to_dict()
+        )
+
+    assert repo.get(book.id).status == BookStatus.ON_HOLD.value
+    assert aggregate_cache().metrics()["stale_puts"] == 1
+
+
+def test_patron_loaded_in_full_is_cached(patron, five_books, place_holds):
+    place_holds(patron, five_books[:2])
+    repo = current_domain.repository_for(Patron)
+
+    stored_patron = repo.get(patron.id)
+    cached_patron = repo.get(patron.id)
+    assert aggregate_cache().metrics()["hits"] == 1
+
+    assert cached_patron._version == stored_patron._version
+    assert cached_patron._event_position == stored_patron._event_position
+    assert cached_patron.active_holds == 2
+    assert {hold.id: hold.status for hold in cached_patron.holds} == {
+        hold.id: hold.status for hold in stored_patron.holds
+    }
+
+    # Scoped loads read only the children they need from storage
+    repo.get_with_hold(patron.id, stored_patron.holds[0].id)
+    assert aggregate_cache().metrics()["hits"] == 1
+
+
+def test_patron_saved_from_the_cache_is_read_again(patron, book):
+    repo = current_domain.repository_for(Patron)
+    repo.get(patron.id)
+
+    cached_patron = repo.get(patron.id)
+    place_hold(cached_patron, book, "1", "CLOSED_ENDED")()
+    repo.add(cached_patron)
+
+    assert repo.get(patron.id).active_holds == 1
+
+
+def test_patron_with_only_children_saved_is_read_again(patron, book):
+    repo = current_domain.repository_for(Patron)
+    refreshed_patron = repo.get(patron.id)
+    checkout(refreshed_patron, book, "1")()
+    repo.add(refreshed_patron)
+
+    # Marking a checkout overdue leaves the patron's own attributes as they were
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.checkouts[0].overdue()
+    repo.add(refreshed_patron)
+
+    assert repo.get(patron.id).checkouts[0].status == "OVERDUE"
+    assert repo.get(patron.id).checkouts[0].status == "OVERDUE"
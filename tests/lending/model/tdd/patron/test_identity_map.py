@@ -0,0 +1,99 @@
+"""This test file contains tests for the identity map that returns aggregates
+already loaded in the active Unit of Work instead of reading them again
+"""
+
+from protean import UnitOfWork, current_domain
+
+from lending import Book, Patron, place_hold
+from lending.app.patron.facts import patron_facts
+from lending.model.patron import HoldStatus
+from lending.utils.associations import load_scope
+from lending.utils.identity_map import identity_map_stats
+
+
+def test_repeated_gets_in_a_unit_of_work_return_the_loaded_instance(patron, book):
+    with UnitOfWork() as uow:
+        patron_repo = current_domain.repository_for(Patron)
+        book_repo = current_domain.repository_for(Book)
+
+        loaded_patron = patron_repo.get(patron.id)
+        loaded_book = book_repo.get(book.id)
+
+        assert patron_repo.get(patron.id) is loaded_patron
+        assert book_repo.get(book.id) is loaded_book
+
+    assert identity_map_stats(uow) == {"hits": 2, "misses": 2}
+
+
+def test_changes_are_seen_by_later_gets_in_the_unit_of_work(patron, book):
+    with UnitOfWork():
+        repo = current_domain.repository_for(Patron)
+        place_hold(repo.get(patron.id), book, "1", "CLOSED_ENDED")()
+
+        assert repo.get(patron.id).active_holds == 1
+
+
+def test_gets_in_separate_units_of_work_read_from_storage(patron):
+    repo = current_domain.repository_for(Patron)
+
+    with UnitOfWork() as first:
+        first_patron = repo.get(patron.id)
+    with UnitOfWork() as second:
+        second_patron = repo.get(patron.id)
+
+    assert first_patron is not second_patron
+    assert identity_map_stats(first) == {"hits": 0, "misses": 1}
+    assert identity_map_stats(second) == {"hits": 0, "misses": 1}
+
+
+def test_patron_loaded_with_fewer_children_gains_the_missing_ones(
+    patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+    repo = current_domain.repository_for(Patron)
+    hold_id = repo.get(patron.id).holds[0].id
+
+    with UnitOfWork() as uow:
+        scoped_patron = repo.get_with_hold(patron.id, hold_id)
+        scoped_hold = scoped_patron.hold(hold_id)
+        full_patron = repo.get(patron.id)
+
+        assert full_patron is scoped_patron
+        assert len(full_patron.holds) == 2
+        assert full_patron.hold(hold_id) is scoped_hold
+
+        # The patron loaded in full has every child a scoped load asks for
+        assert repo.get_with_hold(patron.id, hold_id) is full_patron
+        with load_scope(holds=None, checkouts=None):
+            assert repo.get(patron.id) is full_patron
+
+    assert identity_map_stats(uow) == {"hits": 3, "misses": 1}
+
+
+def test_changes_to_a_scoped_patron_are_kept_when_it_is_loaded_in_full(
+    patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+    repo = current_domain.repository_for(Patron)
+    hold_id = repo.get(patron.id).holds[0].id
+
+    with UnitOfWork():
+        scoped_patron = repo.get_with_hold(patron.id, hold_id)
+        scoped_patron.cancel_hold(hold_id)
+        repo.add(scoped_patron)
+
+        full_patron = repo.get(patron.id)
+        assert full_patron.hold(hold_id).status == HoldStatus.CANCELLED.value
+        assert full_patron.active_holds == 1
+
+    messages = current_domain.event_store.store.read(f"library::patron-{patron.id}")
+    assert messages[-1].metadata.type == "Library.HoldCancelled.v1"
+    assert sorted(
+        hold["status"] for hold in list(patron_facts(patron.id))[-1].payload["holds"]
+    ) == ["ACTIVE", "CANCELLED"]
+
+
+def test_gets_outside_a_unit_of_work_are_not_counted(patron):
+    current_domain.repository_for(Patron).get(patron.id)
+
+    assert identity_map_stats() == {"hits": 0, "misses": 0}
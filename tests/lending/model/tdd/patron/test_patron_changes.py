@@ -0,0 +1,95 @@
+"""This test file contains tests for the change tracking that lets a `Patron` be
+saved by writing only its changed rows and columns
+"""
+
+import pytest
+from protean import UnitOfWork, current_domain
+from protean.exceptions import ExpectedVersionError
+from sqlalchemy import event
+
+from lending import Patron
+from lending.utils.changes import changed_attributes
+
+
+@pytest.fixture
+def sql_provider():
+    provider = current_domain.providers["default"]
+    if provider.conn_info["provider"] not in ("postgresql", "sqlite"):
+        pytest.skip("Written statements are only checked on SQL providers")
+
+    return provider
+
+
+@pytest.fixture
+def captured_writes(sql_provider):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            statements.append(" ".join(statement.split()))
+
+    engine = sql_provider._engine
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+def test_only_attributes_set_to_new_values_are_tracked(patron_with_holds):
+    hold = patron_with_holds.holds[0]
+    hold.branch_id = hold.branch_id
+    assert changed_attributes(hold) == []
+
+    patron_with_holds.cancel_hold(hold.id)
+
+    assert changed_attributes(hold) == ["status", "ended_at"]
+    assert changed_attributes(patron_with_holds) == ["active_holds"]
+    assert [changed_attributes(other) for other in patron_with_holds.holds[1:]] == [
+        [],
+        [],
+    ]
+
+
+def test_saving_clears_tracked_changes(patron_with_holds):
+    patron_with_holds.cancel_hold(patron_with_holds.holds[0].id)
+    current_domain.repository_for(Patron).add(patron_with_holds)
+
+    assert changed_attributes(patron_with_holds) == []
+    assert changed_attributes(patron_with_holds.holds[0]) == []
+
+
+def test_only_changed_columns_of_changed_rows_are_written(
+    patron_with_holds, captured_writes
+):
+    with UnitOfWork():
+        patron_with_holds.cancel_hold(patron_with_holds.holds[0].id)
+        current_domain.repository_for(Patron).add(patron_with_holds)
+
+    patron_writes = [
+        statement
+        for statement in captured_writes
+        if statement.startswith(("UPDATE hold ", "UPDATE patron "))
+    ]
+    assert len(patron_writes) == 2
+    assert patron_writes[0].startswith("UPDATE hold SET status=")
+    assert "WHERE hold.id =" in patron_writes[0]
+    assert patron_writes[1].startswith("UPDATE patron SET _version=")
+    assert ", active_holds=" in patron_writes[1]
+
+    refreshed_patron = current_domain.repository_for(Patron).get(patron_with_holds.id)
+    assert refreshed_patron.active_holds == 2
+    assert sorted(hold.status for hold in refreshed_patron.holds) == [
+        "ACTIVE",
+        "ACTIVE",
+        "CANCELLED",
+    ]
+
+
+def test_saving_a_stale_patron_is_rejected(patron_with_holds, sql_provider):
+    stale_patron = current_domain.repository_for(Patron).get(patron_with_holds.id)
+
+    patron_with_holds.cancel_hold(patron_with_holds.holds[0].id)
+    current_domain.repository_for(Patron).add(patron_with_holds)
+
+    stale_patron.cancel_hold(stale_patron.holds[1].id)
+    with pytest.raises(ExpectedVersionError):
+        current_domain.repository_for(Patron).add(stale_patron)
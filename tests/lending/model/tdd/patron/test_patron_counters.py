@@ -0,0 +1,94 @@
+"""This test file contains tests for the counters that `Patron` maintains on its
+holds and checkouts
+"""
+
+from datetime import date, timedelta
+
+from protean import current_domain
+
+from lending import CheckoutStatus, HoldStatus, Patron, checkout, place_hold
+from lending.app.consistency import check_patron_counters
+
+
+def _refreshed(patron):
+    return current_domain.repository_for(Patron).get(patron.id)
+
+
+def _place_hold(patron, book):
+    refreshed_patron = _refreshed(patron)
+    place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+    current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+def _check_out(patron, book, branch_id="1"):
+    refreshed_patron = _refreshed(patron)
+    checkout(refreshed_patron, book, branch_id)()
+    current_domain.repository_for(Patron).add(refreshed_patron)
+
+
+def test_active_holds_track_hold_transitions(patron, five_books):
+    for book in five_books[:3]:
+        _place_hold(patron, book)
+    assert _refreshed(patron).active_holds == 3
+
+    refreshed_patron = _refreshed(patron)
+    refreshed_patron.cancel_hold(refreshed_patron.holds[0].id)
+    refreshed_patron.expire_hold(refreshed_patron.holds[1].id)
+    current_domain.repository_for(Patron).add(refreshed_patron)
+    _check_out(patron, five_books[2])
+
+    assert _refreshed(patron).active_holds == 0
+
+
+def test_due_dates_track_checkouts_and_returns(patron, five_books):
+    _check_out(patron, five_books[0], "1")
+    _check_out(patron, five_books[1], "1")
+    _check_out(patron, five_books[2], "2")
+
+    refreshed_patron = _refreshed(patron)
+    assert len(refreshed_patron.due_dates_by_branch["1"]) == 2
+    assert len(refreshed_patron.due_dates_by_branch["2"]) == 1
+
+    refreshed_patron.return_book(five_books[2].id)
+    current_domain.repository_for(Patron).add(refreshed_patron)
+
+    assert "2" not in _refreshed(patron).due_dates_by_branch
+
+
+def test_overdue_checkouts_in_branch_count_unreturned_checkouts_past_due(
+    overdue_checkouts_patron,
+):
+    patron = current_domain.repository_for(Patron).get(overdue_checkouts_patron.id)
+
+    assert patron.overdue_checkouts_in_branch("1") == 3
+    assert patron.overdue_checkouts_in_branch("2") == 0
+    assert (
+        patron.overdue_checkouts_in_branch("1", on=date.today() - timedelta(days=365))
+        == 0
+    )
+
+
+def test_recount_rebuilds_drifted_counters(patron, five_books):
+    _place_hold(patron, five_books[0])
+    _check_out(patron, five_books[1])
+
+    # Change children behind the transitions' back
+    refreshed_patron = _refreshed(patron)
+    refreshed_patron.holds[0].status = HoldStatus.CANCELLED.value
+    refreshed_patron.checkouts[0].status = CheckoutStatus.RETURNED.value
+    current_domain.repository_for(Patron).add(refreshed_patron)
+
+    assert check_patron_counters() == 1
+
+    refreshed_patron = _refreshed(patron)
+    assert refreshed_patron.active_holds == 0
+    assert refreshed_patron.due_dates_by_branch == {}
+    assert refreshed_patron.recount() is False
+
+
+def test_recount_counts_children_past_the_default_query_limit(long_history_patron):
+    assert check_patron_counters() == 0
+
+    refreshed_patron = _refreshed(long_history_patron)
+    assert len(refreshed_patron.holds) == 1003
+    assert refreshed_patron.active_holds == 1003
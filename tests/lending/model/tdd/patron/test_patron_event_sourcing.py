@@ -0,0 +1,105 @@
+"""This test file contains tests for storing a `Patron` as its own events, folded
+from the latest snapshot when it is loaded
+"""
+
+import pytest
+from protean import UnitOfWork, current_domain
+from protean.exceptions import ExpectedVersionError, ObjectNotFoundError
+
+from lending import Patron, checkout, place_hold
+from lending.model.patron.event_sourcing import snapshot_stream_name
+
+
+@pytest.fixture
+def patrons_as_events(monkeypatch):
+    config = current_domain.config
+    monkeypatch.setitem(config["custom"], "PATRON_STORAGE", "events")
+    monkeypatch.setitem(config, "snapshot_threshold", 3)
+
+
+def _snapshot_positions(patron_id):
+    return [
+        message["data"]["position"]
+        for message in current_domain.event_store.store._read(
+            snapshot_stream_name(patron_id)
+        )
+    ]
+
+
+def test_patron_is_folded_from_its_events(
+    patrons_as_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:3])
+    repo = current_domain.repository_for(Patron)
+
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.cancel_hold(refreshed_patron.active_hold_on(five_books[0].id).id)
+    checkout(refreshed_patron, five_books[1], "1")()
+    repo.add(refreshed_patron)
+
+    refreshed_patron = repo.get(patron.id)
+    assert {hold.book_id: hold.status for hold in refreshed_patron.holds} == {
+        five_books[0].id: "CANCELLED",
+        five_books[1].id: "CHECKED_OUT",
+        five_books[2].id: "ACTIVE",
+    }
+    assert [checkout.book_id for checkout in refreshed_patron.checkouts] == [
+        five_books[1].id
+    ]
+    assert refreshed_patron.active_holds == 1
+    assert list(refreshed_patron.due_dates_by_branch) == ["1"]
+
+
+def test_patron_tables_are_not_written(
+    patrons_as_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:1])
+
+    assert current_domain.repository_for(Patron)._dao.query.all().total == 0
+
+
+def test_snapshot_is_written_once_enough_events_are_folded(
+    patrons_as_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+    assert _snapshot_positions(patron.id) == [-1]
+
+    # The load before the third hold folds three events, and snapshots them
+    place_holds(patron, five_books[2:4])
+    assert _snapshot_positions(patron.id) == [-1, 2]
+
+    refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+    assert len(refreshed_patron.holds) == 4
+    assert refreshed_patron._event_position == 3
+
+
+def test_change_without_events_is_kept_in_a_snapshot(
+    patrons_as_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:1])
+    repo = current_domain.repository_for(Patron)
+
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.patron_type = "RESEARCHER"
+    repo.add(refreshed_patron)
+
+    refreshed_patron = repo.get(patron.id)
+    assert refreshed_patron.patron_type == "RESEARCHER"
+    assert len(refreshed_patron.holds) == 1
+
+
+def test_saving_a_stale_patron_is_rejected(
+    patrons_as_events, patron, five_books, place_holds
+):
+    repo = current_domain.repository_for(Patron)
+    stale_patron = repo.get(patron.id)
+    place_holds(patron, five_books[:1])
+
+    with pytest.raises(ExpectedVersionError), UnitOfWork():
+        place_hold(stale_patron, five_books[1], "1", "CLOSED_ENDED")()
+        repo.add(stale_patron)
+
+
+def test_unknown_patron_is_not_found(patrons_as_events):
+    with pytest.raises(ObjectNotFoundError):
+        current_domain.repository_for(Patron).get("unknown")
@@ -0,0 +1,141 @@
+"""This test file contains tests for the full and delta fact events raised as a
+`Patron` is saved, and for folding them back into the patron's state
+"""
+
+import pytest
+from protean import current_domain
+
+from lending import Patron, checkout
+from lending.app.patron.facts import fold_patron_facts, patron_facts, patron_state
+from lending.model.patron import PatronDeltaFactEvent
+
+
+@pytest.fixture
+def delta_fact_events(monkeypatch):
+    custom = current_domain.config["custom"]
+    monkeypatch.setitem(custom, "PATRON_FACT_EVENTS", "delta")
+    monkeypatch.setitem(custom, "PATRON_SNAPSHOT_EVERY", 3)
+
+
+def _summary(state):
+    """The version, counters, and child statuses by id of a patron's state"""
+    return {
+        "_version": state["_version"],
+        "active_holds": state["active_holds"],
+        "due_dates_by_branch": state["due_dates_by_branch"],
+        "holds": {hold["id"]: hold["status"] for hold in state["holds"]},
+        "checkouts": {
+            checkout["id"]: checkout["status"] for checkout in state["checkouts"]
+        },
+    }
+
+
+def test_full_fact_events_include_children_that_were_not_loaded(
+    patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+    repo = current_domain.repository_for(Patron)
+    hold_id = repo.get(patron.id).holds[0].id
+
+    refreshed_patron = repo.get_with_hold(patron.id, hold_id)
+    refreshed_patron.cancel_hold(hold_id)
+    repo.add(refreshed_patron)
+
+    last_fact = list(patron_facts(patron.id))[-1]
+    assert not isinstance(last_fact, PatronDeltaFactEvent)
+    assert sorted(hold["status"] for hold in last_fact.payload["holds"]) == [
+        "ACTIVE",
+        "CANCELLED",
+    ]
+
+
+def test_full_fact_events_include_children_past_the_default_query_limit(
+    long_history_patron,
+):
+    repo = current_domain.repository_for(Patron)
+    hold_id = repo.get(long_history_patron.id).holds[0].id
+
+    refreshed_patron = repo.get_with_hold(long_history_patron.id, hold_id)
+    refreshed_patron.cancel_hold(hold_id)
+    repo.add(refreshed_patron)
+
+    state = patron_state(long_history_patron.id)
+    assert len(state["holds"]) == 1003
+    assert state["active_holds"] == 1002
+
+
+def test_delta_fact_events_carry_only_what_changed(
+    delta_fact_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+    repo = current_domain.repository_for(Patron)
+
+    hold_id = repo.get(patron.id).holds[0].id
+    refreshed_patron = repo.get_with_hold(patron.id, hold_id)
+    refreshed_patron.cancel_hold(hold_id)
+    repo.add(refreshed_patron)
+
+    facts = list(patron_facts(patron.id))
+    assert [isinstance(fact, PatronDeltaFactEvent) for fact in facts] == [
+        False,  # Registered, at version 0
+        True,
+        True,
+        False,  # Version 3, a multiple of `PATRON_SNAPSHOT_EVERY`
+    ]
+
+    delta = facts[2]
+    assert len(delta.holds["added"]) == 1
+    assert delta.changes == {"active_holds": 2}
+
+
+def test_delta_fact_event_for_a_cancelled_hold(
+    delta_fact_events, patron, book, place_holds
+):
+    place_holds(patron, [book])
+    repo = current_domain.repository_for(Patron)
+
+    refreshed_patron = repo.get(patron.id)
+    hold_id = refreshed_patron.holds[0].id
+    refreshed_patron.cancel_hold(hold_id)
+    repo.add(refreshed_patron)
+
+    delta = list(patron_facts(patron.id))[-1]
+    assert isinstance(delta, PatronDeltaFactEvent)
+    assert delta.changes == {"active_holds": 0}
+    ended_at = refreshed_patron.holds[0].ended_at
+    assert delta.holds == {
+        "added": [],
+        "changed": {hold_id: {"status": "CANCELLED", "ended_at": str(ended_at)}},
+        "removed": [],
+    }
+    assert delta.checkouts == {"added": [], "changed": {}, "removed": []}
+
+
+def test_fact_events_fold_into_the_stored_state(
+    delta_fact_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+    repo = current_domain.repository_for(Patron)
+
+    refreshed_patron = repo.get(patron.id)
+    checkout(refreshed_patron, five_books[0], "1")()
+    repo.add(refreshed_patron)
+
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.cancel_hold(refreshed_patron.active_hold_on(five_books[1].id).id)
+    repo.add(refreshed_patron)
+
+    refreshed_patron = repo.get(patron.id)
+    refreshed_patron.remove_holds(refreshed_patron.holds)
+    repo.add(refreshed_patron)
+
+    assert len(list(patron_facts(patron.id))) == 6
+    assert _summary(patron_state(patron.id)) == _summary(repo.get(patron.id).to_dict())
+
+
+def test_deltas_before_the_first_full_fact_event_are_skipped(
+    delta_fact_events, patron, five_books, place_holds
+):
+    place_holds(patron, five_books[:2])
+
+    assert fold_patron_facts(list(patron_facts(patron.id))[1:]) is None
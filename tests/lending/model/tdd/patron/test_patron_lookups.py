@@ -0,0 +1,64 @@
+"""This test file contains tests for the indexed lookups of a `Patron`'s holds
+and checkouts
+"""
+
+import pytest
+from protean import current_domain
+from protean.exceptions import ValidationError
+
+from lending import Patron, checkout, place_hold
+
+
+def _refreshed(patron):
+    return current_domain.repository_for(Patron).get(patron.id)
+
+
+def _persist(patron):
+    current_domain.repository_for(Patron).add(patron)
+
+
+def test_hold_is_looked_up_by_id(patron, five_books):
+    refreshed_patron = _refreshed(patron)
+    place_hold(refreshed_patron, five_books[0], "1", "CLOSED_ENDED")()
+    place_hold(refreshed_patron, five_books[1], "1", "CLOSED_ENDED")()
+
+    hold = refreshed_patron.holds[1]
+    assert refreshed_patron.hold(hold.id) is hold
+
+    with pytest.raises(ValidationError) as exc:
+        refreshed_patron.hold("unknown")
+    assert exc.value.messages == {"hold": ["Hold does not exist"]}
+
+
+def test_active_hold_on_skips_ended_holds(patron, book):
+    refreshed_patron = _refreshed(patron)
+    place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+    _persist(refreshed_patron)
+
+    refreshed_patron = _refreshed(patron)
+    refreshed_patron.cancel_hold(refreshed_patron.holds[0].id)
+    assert refreshed_patron.active_hold_on(book.id) is None
+
+    place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+    assert refreshed_patron.active_hold_on(book.id).status == "ACTIVE"
+
+
+def test_return_book_skips_earlier_returned_checkouts_of_the_book(patron, book):
+    for _ in range(2):
+        refreshed_patron = _refreshed(patron)
+        checkout(refreshed_patron, book, "1")()
+        _persist(refreshed_patron)
+
+        refreshed_patron = _refreshed(patron)
+        refreshed_patron.return_book(book.id)
+        _persist(refreshed_patron)
+
+    refreshed_patron = _refreshed(patron)
+    assert sorted(checkout.status for checkout in refreshed_patron.checkouts) == [
+        "RETURNED",
+        "RETURNED",
+    ]
+
+    with pytest.raises(ValidationError) as exc:
+        refreshed_patron.return_book(book.id)
+    assert exc.value.messages == {"checkout": ["Checkout does not exist"]}
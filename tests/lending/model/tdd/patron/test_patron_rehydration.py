@@ -0,0 +1,94 @@
+"""This test file contains tests for building a `Patron` and its children from
+stored values without validating them again
+"""
+
+import pytest
+from protean import current_domain
+from protean.exceptions import ValidationError
+
+from lending import Hold, Patron, place_hold
+
+
+@pytest.fixture
+def validated_loads(monkeypatch):
+    monkeypatch.setitem(current_domain.config["custom"], "TRUSTED_REHYDRATION", False)
+
+
+def _corrupt_hold_statuses(patron):
+    current_domain.repository_for(Hold)._dao.query.filter(
+        patron_id=patron.id
+    ).update_all(status="NOT A STATUS")
+
+
+def _as_dict(patron):
+    payload = patron.to_dict()
+    payload["holds"] = sorted(payload["holds"], key=lambda hold: hold["id"])
+    return payload
+
+
+def test_trusted_load_matches_validated_load(monkeypatch, patron_with_holds):
+    repo = current_domain.repository_for(Patron)
+    trusted = repo.get(patron_with_holds.id)
+
+    monkeypatch.setitem(current_domain.config["custom"], "TRUSTED_REHYDRATION", False)
+    validated = repo.get(patron_with_holds.id)
+
+    assert _as_dict(trusted) == _as_dict(validated)
+
+
+def test_trusted_load_is_marked_as_stored_and_unchanged(patron_with_holds):
+    refreshed_patron = current_domain.repository_for(Patron).get(patron_with_holds.id)
+
+    for entity in (refreshed_patron, *refreshed_patron.holds):
+        assert entity.state_.is_persisted
+        assert not entity.state_.is_changed
+        assert entity._root is refreshed_patron
+
+    assert refreshed_patron._next_version == refreshed_patron._version + 1
+
+
+def test_trusted_load_skips_validation_of_stored_values(patron_with_holds):
+    _corrupt_hold_statuses(patron_with_holds)
+
+    refreshed_patron = current_domain.repository_for(Patron).get(patron_with_holds.id)
+
+    assert {hold.status for hold in refreshed_patron.holds} == {"NOT A STATUS"}
+
+
+def test_validated_load_rejects_invalid_stored_values(
+    validated_loads, patron_with_holds
+):
+    _corrupt_hold_statuses(patron_with_holds)
+
+    with pytest.raises(ValidationError):
+        current_domain.repository_for(Patron).get(patron_with_holds.id)
+
+
+@pytest.mark.parametrize("trusted", [True, False])
+def test_missing_stored_values_load_as_field_defaults(
+    monkeypatch, patron, book, trusted
+):
+    # As on patrons stored before the counters were introduced
+    current_domain.repository_for(Patron)._dao.query.filter(id=patron.id).update_all(
+        active_holds=None, due_dates_by_branch=None
+    )
+    monkeypatch.setitem(current_domain.config["custom"], "TRUSTED_REHYDRATION", trusted)
+    refreshed_patron = current_domain.repository_for(Patron).get(patron.id)
+
+    assert refreshed_patron.active_holds == 0
+    assert refreshed_patron.due_dates_by_branch == {}
+
+    place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+    assert refreshed_patron.active_holds == 1
+
+
+def test_values_set_after_a_trusted_load_are_validated(patron_with_holds):
+    refreshed_patron = current_domain.repository_for(Patron).get(patron_with_holds.id)
+
+    with pytest.raises(ValidationError):
+        refreshed_patron.holds[0].status = "NOT A STATUS"
+
+
+def test_entities_built_outside_loads_are_validated(patron_with_holds):
+    with pytest.raises(ValidationError):
+        Hold(book_id="1", branch_id="1", requested_at="not a date")
@@ -0,0 +1,95 @@
+"""This test file contains tests for the targeted loading of a `Patron`'s
+holds and checkouts by `PatronRepository`
+"""
+
+import pytest
+from protean import UnitOfWork, current_domain
+
+from lending import Patron, checkout, place_hold
+
+
+@pytest.fixture
+def patron_with_history(patron, five_books):
+    repo = current_domain.repository_for(Patron)
+    for book in five_books[:3]:
+        with UnitOfWork():
+            refreshed_patron = repo.get(patron.id)
+            checkout(refreshed_patron, book, "1")()
+            repo.add(refreshed_patron)
+
+    for book in five_books[3:]:
+        with UnitOfWork():
+            refreshed_patron = repo.get(patron.id)
+            place_hold(refreshed_patron, book, "1", "CLOSED_ENDED")()
+            repo.add(refreshed_patron)
+
+    # Return the first book, and check it out again
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        refreshed_patron.return_book(five_books[0].id)
+        repo.add(refreshed_patron)
+    with UnitOfWork():
+        refreshed_patron = repo.get(patron.id)
+        checkout(refreshed_patron, five_books[0], "1")()
+        repo.add(refreshed_patron)
+
+    return repo.get(patron.id)
+
+
+def test_get_loads_all_holds_and_checkouts(patron_with_history):
+    assert len(patron_with_history.holds) == 2
+    assert len(patron_with_history.checkouts) == 4
+
+
+def test_get_with_checkout_of_loads_only_the_unreturned_checkout(
+    patron_with_history, five_books
+):
+    patron = current_domain.repository_for(Patron).get_with_checkout_of(
+        patron_with_history.id, five_books[0].id
+    )
+
+    assert patron.holds == []
+    assert len(patron.checkouts) == 1
+    assert patron.checkouts[0].book_id == five_books[0].id
+    assert patron.checkouts[0].status == "ACTIVE"
+
+
+def test_get_with_hold_loads_only_the_hold(patron_with_history):
+    hold_id = patron_with_history.holds[0].id
+    patron = current_domain.repository_for(Patron).get_with_hold(
+        patron_with_history.id, hold_id
+    )
+
+    assert [hold.id for hold in patron.holds] == [hold_id]
+    assert patron.checkouts == []
+
+
+def test_get_with_items_loads_all_children_of_unscoped_collections(
+    patron_with_history,
+):
+    checkout_id = patron_with_history.checkouts[1].id
+    patron = current_domain.repository_for(Patron).get_with_items(
+        patron_with_history.id, hold_ids=None, checkout_ids={checkout_id}
+    )
+
+    assert len(patron.holds) == 2
+    assert [checkout.id for checkout in patron.checkouts] == [checkout_id]
+
+
+def test_changes_to_a_partially_loaded_patron_leave_other_children_intact(
+    patron_with_history, five_books
+):
+    repo = current_domain.repository_for(Patron)
+    with UnitOfWork():
+        patron = repo.get_with_checkout_of(patron_with_history.id, five_books[1].id)
+        patron.return_book(five_books[1].id)
+        repo.add(patron)
+
+    patron = repo.get(patron_with_history.id)
+    assert len(patron.holds) == 2
+    assert sorted(checkout.status for checkout in patron.checkouts) == [
+        "ACTIVE",
+        "ACTIVE",
+        "RETURNED",
+        "RETURNED",
+    ]